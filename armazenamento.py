@@ -0,0 +1,847 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Módulo de persistência (backends de armazenamento)
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from instrumentacao import contar
+
+try:
+    # Parser JSON acelerado, usado na leitura quando estiver instalado
+    import orjson
+except ImportError:
+    orjson = None
+
+Estado = Dict[str, Any]
+Operacao = Dict[str, Any]
+
+
+def ler_json(dados: bytes) -> Any:
+    """Decodifica JSON (bytes UTF-8) com o parser mais rápido disponível"""
+    if orjson is not None:
+        return orjson.loads(dados)
+    return json.loads(dados)
+
+
+class Armazenamento:
+    """Interface base dos backends de armazenamento"""
+
+    # Backends residentes entregam todas as despesas no snapshot e o
+    # gerenciador as mantém em memória; os demais respondem às consultas.
+    residente = True
+
+    # Operações acumuladas entre iniciar_lote e concluir_lote
+    _lote: Optional[List[Operacao]] = None
+
+    def carregar(self) -> Tuple[Optional[Estado], List[Operacao]]:
+        """Retorna o último snapshot e as operações gravadas depois dele"""
+        raise NotImplementedError
+
+    def registrar(self, operacao: Operacao, estado: Callable[[], Estado]) -> None:
+        """Persiste uma mutação (estado() devolve o snapshot completo, se necessário)"""
+        if self._lote is not None:
+            self._lote.append(operacao)
+        else:
+            self.registrar_lote([operacao], estado)
+
+    def registrar_lote(self, operacoes: List[Operacao], estado: Callable[[], Estado]) -> None:
+        """Persiste várias mutações com uma única gravação"""
+        raise NotImplementedError
+
+    def iniciar_lote(self) -> None:
+        """Passa a acumular as mutações até concluir_lote"""
+        self._lote = []
+
+    def concluir_lote(self, estado: Callable[[], Estado]) -> None:
+        """Grava de uma vez as mutações acumuladas"""
+        operacoes, self._lote = self._lote, None
+        if operacoes:
+            self.registrar_lote(operacoes, estado)
+
+    def cancelar_lote(self) -> None:
+        """Descarta as mutações acumuladas"""
+        self._lote = None
+
+    def descarregar(self) -> None:
+        """Garante que toda mutação registrada já está no disco"""
+
+    def compactar(self, estado: Callable[[], Estado]) -> None:
+        """Grava um snapshot completo do estado atual"""
+        raise NotImplementedError
+
+    def fechar(self) -> None:
+        """Libera arquivos/conexões abertos"""
+
+    def meses_historico(self) -> List[str]:
+        """Meses ('AAAA-MM') com registros arquivados, do mais antigo ao mais novo"""
+        return []
+
+    def ler_pagina_historico(self, pagina: int) -> List[Dict[str, Any]]:
+        """Registros arquivados de uma página (0 = mês mais recente), do mais novo ao mais antigo"""
+        return []
+
+    def ler_mes_historico(self, mes: str) -> List[Dict[str, Any]]:
+        """Registros arquivados de um mês ('AAAA-MM')"""
+        return []
+
+    def iterar_historico(self) -> Iterator[Dict[str, Any]]:
+        """Todos os registros arquivados, do mais antigo ao mais novo"""
+        return iter(())
+
+
+class ArmazenamentoJSON(Armazenamento):
+    """
+    Arquivo JSON único, reescrito por inteiro a cada mutação (formato original).
+
+    Quando o estado traz a chave 'arquivar', esses registros saem do snapshot
+    e vão para o histórico, particionado pelo mês do vencimento: cada
+    compactação grava, para cada mês, um segmento novo e imutável
+    (``trimoney_historico/AAAA-MM[.n].jsonl.gz``). O snapshot guarda em
+    'arquivo' o manifesto dos segmentos de cada mês; segmentos fora do
+    manifesto (compactação interrompida) são apagados na carga.
+
+    Gravação à prova de queda: o snapshot vai para ``<arquivo>.tmp`` (com
+    fsync) com um cabeçalho de versão, tamanho e CRC32 do conteúdo, e só
+    então substitui o arquivo por rename atômico; a geração anterior fica em
+    ``<arquivo>.bak``. Na carga, um arquivo inválido cede lugar à geração
+    válida mais recente e é preservado como ``<arquivo>.corrompido``.
+    """
+
+    indent: Optional[int] = 2
+    VERSAO = 1
+    ASSINATURA = b"TRIMONEY"
+
+    def __init__(self, data_file: Path):
+        self.data_file = Path(data_file)
+        self.tmp_file = self.data_file.with_name(self.data_file.name + '.tmp')
+        self.bak_file = self.data_file.with_name(self.data_file.name + '.bak')
+        self.historico_dir = self.data_file.with_name("trimoney_historico")
+        self.arquivo = self._arquivo_vazio()
+
+    @staticmethod
+    def _arquivo_vazio() -> Dict[str, Any]:
+        return {'meses': {}}
+
+    def carregar(self) -> Tuple[Optional[Estado], List[Operacao]]:
+        estado = self._ler_geracao_valida()
+        if estado is None:
+            self.arquivo = self._arquivo_vazio()
+            return None, []
+        self.arquivo = estado.get('arquivo') or self._arquivo_vazio()
+        self._descartar_historico_nao_confirmado()
+        return estado, []
+
+    def _ler_geracao_valida(self) -> Optional[Estado]:
+        """
+        Lê o snapshot atual ou, se ele faltar ou estiver corrompido, o .tmp
+        (queda entre os dois renames) ou o .bak (geração anterior)
+        """
+        erros = []
+        for caminho in (self.data_file, self.tmp_file, self.bak_file):
+            if not caminho.exists():
+                continue
+            try:
+                estado = self._ler_snapshot(caminho)
+            except ValueError as e:
+                erros.append(f"{caminho.name}: {e}")
+                continue
+            if caminho != self.data_file:
+                print(f"Dados recuperados de {caminho.name} ({'; '.join(erros) or 'arquivo ausente'})")
+                if self.data_file.exists():
+                    # Fora do caminho da rotação, para não sobrescrever o .bak bom
+                    os.replace(self.data_file, self.data_file.with_name(
+                        self.data_file.name + '.corrompido'))
+            return estado
+
+        if erros:
+            if self.data_file.exists():
+                # Preserva o arquivo para recuperação manual antes que uma
+                # nova gravação o substitua
+                os.replace(self.data_file, self.data_file.with_name(
+                    self.data_file.name + '.corrompido'))
+            raise ValueError(f"Nenhuma geração válida dos dados: {'; '.join(erros)}")
+        return None
+
+    def _ler_snapshot(self, caminho: Path) -> Estado:
+        """Lê e valida um snapshot (aceita também o JSON puro do formato antigo)"""
+        with open(caminho, 'rb') as f:
+            conteudo = f.read()
+
+        if not conteudo.startswith(self.ASSINATURA):
+            return ler_json(conteudo)
+
+        fim_cabecalho = conteudo.find(b'\n')
+        try:
+            _, versao, crc, tamanho = conteudo[:fim_cabecalho].split()
+            versao, crc, tamanho = int(versao), int(crc, 16), int(tamanho)
+        except ValueError:
+            raise ValueError("cabeçalho inválido")
+        if versao > self.VERSAO:
+            raise ValueError(f"versão {versao} não suportada")
+
+        corpo = conteudo[fim_cabecalho + 1:]
+        if len(corpo) != tamanho:
+            raise ValueError(f"tamanho {len(corpo)} diferente de {tamanho} (gravação interrompida)")
+        if zlib.crc32(corpo) != crc:
+            raise ValueError("checksum não confere")
+        return ler_json(corpo)
+
+    def _descartar_historico_nao_confirmado(self) -> None:
+        """Remove segmentos gravados por uma compactação que não chegou a gravar o snapshot"""
+        if not self.historico_dir.exists():
+            return
+        confirmados = {segmento['segmento'] for segmentos in self.arquivo['meses'].values()
+                       for segmento in segmentos}
+        for caminho in self.historico_dir.iterdir():
+            if caminho.name not in confirmados:
+                caminho.unlink()
+
+    def registrar_lote(self, operacoes: List[Operacao], estado: Callable[[], Estado]) -> None:
+        self._gravar_snapshot(estado())
+
+    def compactar(self, estado: Callable[[], Estado]) -> None:
+        self._gravar_snapshot(estado())
+
+    def _gravar_snapshot(self, dados: Estado) -> None:
+        """Grava o snapshot no arquivo JSON"""
+        arquivar = dados.pop('arquivar', None)
+        if arquivar:
+            self._gravar_segmentos(arquivar)
+        if 'historico' in dados:
+            dados['arquivo'] = self.arquivo
+
+        self._gravar_atomico(dados)
+
+        if 'historico' not in dados and self.arquivo['meses']:
+            # O estado não usa mais o histórico (modo sob demanda desligado):
+            # os registros arquivados já voltaram para o snapshot
+            self.arquivo = self._arquivo_vazio()
+            self._descartar_historico_nao_confirmado()
+
+    def _gravar_atomico(self, dados: Estado) -> None:
+        """Grava o snapshot com cabeçalho e checksum, via arquivo temporário + rename"""
+        corpo = json.dumps(dados, indent=self.indent, ensure_ascii=False).encode('utf-8')
+        cabecalho = b"%s %d %08x %d\n" % (self.ASSINATURA, self.VERSAO,
+                                          zlib.crc32(corpo), len(corpo))
+
+        # Uma única escrita sequencial; o checksum vem dos bytes em memória
+        with open(self.tmp_file, 'wb') as f:
+            f.write(cabecalho + corpo)
+            f.flush()
+            os.fsync(f.fileno())
+        contar("bytes_gravados.snapshot", len(cabecalho) + len(corpo))
+        contar("registros_gravados.snapshot", len(dados.get('despesas', ())))
+
+        if self.data_file.exists():
+            os.replace(self.data_file, self.bak_file)
+        os.replace(self.tmp_file, self.data_file)
+        self._sincronizar_diretorio()
+
+    def _sincronizar_diretorio(self, diretorio: Optional[Path] = None) -> None:
+        """Persiste os renames (sem efeito onde o SO não permite abrir diretórios)"""
+        try:
+            descritor = os.open(diretorio or self.data_file.parent, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(descritor)
+        except OSError:
+            pass
+        finally:
+            os.close(descritor)
+
+    def _gravar_segmentos(self, registros: List[Dict[str, Any]]) -> None:
+        """Grava um segmento novo por mês dos registros e atualiza o manifesto"""
+        por_mes: Dict[str, List[Dict[str, Any]]] = {}
+        for registro in registros:
+            por_mes.setdefault(registro['vencimento'][:7], []).append(registro)
+
+        self.historico_dir.mkdir(exist_ok=True)
+        meses = dict(self.arquivo['meses'])
+        for mes, registros_mes in sorted(por_mes.items()):
+            segmentos = list(meses.get(mes, []))
+            nome = f"{mes}.jsonl.gz" if not segmentos else f"{mes}.{len(segmentos) + 1}.jsonl.gz"
+            caminho = self.historico_dir / nome
+            temporario = caminho.with_name(nome + '.tmp')
+            # O snapshot vai apontar para este segmento: precisa estar no disco antes
+            with open(temporario, 'wb') as f:
+                with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=6, mtime=0) as compactado:
+                    for registro in registros_mes:
+                        compactado.write((json.dumps(registro, ensure_ascii=False,
+                                                     separators=(',', ':'))
+                                          + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+                contar("bytes_gravados.historico", f.tell())
+            os.replace(temporario, caminho)
+            contar("registros_gravados.historico", len(registros_mes))
+            segmentos.append({'segmento': nome, 'registros': len(registros_mes)})
+            meses[mes] = segmentos
+        self._sincronizar_diretorio(self.historico_dir)
+        self.arquivo = {'meses': meses}
+
+    def _ler_mes(self, mes: str) -> Iterator[Dict[str, Any]]:
+        for segmento in self.arquivo['meses'].get(mes, []):
+            with gzip.open(self.historico_dir / segmento['segmento'], 'rb') as f:
+                for linha in f:
+                    yield ler_json(linha)
+
+    def meses_historico(self) -> List[str]:
+        return sorted(self.arquivo['meses'])
+
+    def ler_pagina_historico(self, pagina: int) -> List[Dict[str, Any]]:
+        meses = self.meses_historico()
+        if pagina < 0 or pagina >= len(meses):
+            return []
+        return list(self._ler_mes(meses[-1 - pagina]))[::-1]
+
+    def ler_mes_historico(self, mes: str) -> List[Dict[str, Any]]:
+        return list(self._ler_mes(mes))
+
+    def iterar_historico(self) -> Iterator[Dict[str, Any]]:
+        for mes in self.meses_historico():
+            yield from self._ler_mes(mes)
+
+
+class ArmazenamentoJournal(ArmazenamentoJSON):
+    """
+    Snapshot JSON + log de operações append-only.
+
+    Cada mutação vira uma linha compacta em ``<arquivo>.journal``; a cada
+    ``limite_compactacao`` operações (ou tantas quantas despesas houver no
+    snapshot, se forem mais) o estado completo é gravado no snapshot e o
+    journal é esvaziado. Assim regravar o snapshot custa O(1) amortizado por
+    operação mesmo com muitas despesas, e o journal nunca passa do tamanho
+    do snapshot. O snapshot usa o mesmo formato do
+    ``ArmazenamentoJSON``, então arquivos existentes são lidos sem migração.
+    """
+
+    indent = None
+
+    def __init__(self, data_file: Path, limite_compactacao: int = 500):
+        super().__init__(data_file)
+        self.journal_file = self.data_file.with_suffix('.journal')
+        self.limite_compactacao = limite_compactacao
+        self.seq = 0  # número da última operação gravada
+        self.ops_pendentes = 0  # operações no journal desde o último snapshot
+        self.tamanho_snapshot = 0  # despesas no último snapshot
+        self._journal = None
+
+    def carregar(self) -> Tuple[Optional[Estado], List[Operacao]]:
+        estado, _ = super().carregar()
+        seq_snapshot = estado.get('seq', 0) if estado else 0
+        self.tamanho_snapshot = len(estado.get('despesas', ())) if estado else 0
+
+        operacoes = self._ler_journal(seq_snapshot)
+
+        self.seq = operacoes[-1]['seq'] if operacoes else seq_snapshot
+        self.ops_pendentes = len(operacoes)
+        return estado, operacoes
+
+    def _ler_journal(self, seq_snapshot: int) -> List[Operacao]:
+        """Lê o journal, ignorando operações já incluídas no snapshot"""
+        operacoes: List[Operacao] = []
+        if not self.journal_file.exists():
+            return operacoes
+
+        self._fechar_journal()
+        with open(self.journal_file, 'rb+') as f:
+            posicao = 0
+            for linha in f:
+                try:
+                    if not linha.endswith(b'\n'):
+                        raise ValueError("registro incompleto")
+                    operacao = ler_json(linha)
+                except ValueError:
+                    # Registro truncado (app encerrado no meio da escrita):
+                    # descarta a cauda para que novas operações não se misturem a ela
+                    f.truncate(posicao)
+                    break
+                posicao += len(linha)
+                if operacao.get('seq', 0) > seq_snapshot:
+                    operacoes.append(operacao)
+        return operacoes
+
+    def registrar_lote(self, operacoes: List[Operacao], estado: Callable[[], Estado]) -> None:
+        linhas = []
+        for operacao in operacoes:
+            self.seq += 1
+            registro = dict(operacao, seq=self.seq)
+            linhas.append(json.dumps(registro, ensure_ascii=False, separators=(',', ':')))
+        linhas.append('')
+
+        journal = self._abrir_journal()
+        contar("bytes_gravados.journal", journal.write('\n'.join(linhas).encode('utf-8')))
+        journal.flush()
+        contar("operacoes_gravadas", len(operacoes))
+        self.ops_pendentes += len(operacoes)
+
+        if self.ops_pendentes >= max(self.limite_compactacao, self.tamanho_snapshot):
+            self.compactar(estado)
+
+    def compactar(self, estado: Callable[[], Estado]) -> None:
+        if self.ops_pendentes == 0 and self.data_file.exists():
+            return
+
+        dados = dict(estado(), seq=self.seq)
+        self._gravar_snapshot(dados)
+        self.tamanho_snapshot = len(dados.get('despesas', ()))
+
+        # Snapshot contém todas as operações até self.seq: journal pode ser zerado
+        self._fechar_journal()
+        with open(self.journal_file, 'wb'):
+            pass
+        self.ops_pendentes = 0
+
+    def fechar(self) -> None:
+        self._fechar_journal()
+
+    def _abrir_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'ab')
+        return self._journal
+
+    def _fechar_journal(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """
+    Banco SQLite (modo WAL) com índices por status, vencimento e categoria.
+
+    As despesas não são carregadas no snapshot: filtros e totais são
+    resolvidos por consultas SQL, então a inicialização não depende do
+    tamanho do histórico. Os totais por mês dos relatórios ficam na tabela
+    totais_mensais, mantida por triggers a cada INSERT/UPDATE/DELETE.
+    """
+
+    residente = False
+
+    COLUNAS = "id, nome, valor, vencimento, categoria, status"
+
+    def __init__(self, db_file: Path):
+        self.db_file = Path(db_file)
+        self.conexao = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self.conexao.row_factory = sqlite3.Row
+        self._em_lote = False
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        # INSERT OR REPLACE também dispara o trigger de DELETE da linha substituída
+        self.conexao.execute("PRAGMA recursive_triggers=ON")
+        self._criar_tabelas()
+
+    def _criar_tabelas(self) -> None:
+        with self.conexao:
+            self.conexao.executescript("""
+                CREATE TABLE IF NOT EXISTS despesas (
+                    id INTEGER PRIMARY KEY,
+                    nome TEXT NOT NULL,
+                    valor REAL NOT NULL,
+                    vencimento TEXT NOT NULL,
+                    categoria TEXT NOT NULL,
+                    status TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_despesas_status
+                    ON despesas (status, vencimento, valor);
+                CREATE INDEX IF NOT EXISTS idx_despesas_vencimento
+                    ON despesas (vencimento);
+                CREATE INDEX IF NOT EXISTS idx_despesas_categoria
+                    ON despesas (categoria);
+                CREATE TABLE IF NOT EXISTS meta (
+                    chave TEXT PRIMARY KEY,
+                    valor
+                );
+                CREATE TABLE IF NOT EXISTS recorrencias (
+                    id INTEGER PRIMARY KEY,
+                    dados TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS ocorrencias_tratadas (
+                    regra INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    despesa INTEGER NOT NULL,
+                    PRIMARY KEY (regra, data)
+                );
+                CREATE TABLE IF NOT EXISTS totais_mensais (
+                    mes TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    categoria TEXT NOT NULL,
+                    centavos INTEGER NOT NULL,
+                    quantidade INTEGER NOT NULL,
+                    PRIMARY KEY (mes, status, categoria)
+                ) WITHOUT ROWID;
+                CREATE TRIGGER IF NOT EXISTS totais_inserir AFTER INSERT ON despesas BEGIN
+                    INSERT INTO totais_mensais VALUES (
+                        substr(NEW.vencimento, 1, 7), NEW.status, NEW.categoria,
+                        CAST(ROUND(NEW.valor * 100) AS INTEGER), 1)
+                    ON CONFLICT (mes, status, categoria) DO UPDATE SET
+                        centavos = centavos + excluded.centavos, quantidade = quantidade + 1;
+                END;
+                CREATE TRIGGER IF NOT EXISTS totais_excluir AFTER DELETE ON despesas BEGIN
+                    UPDATE totais_mensais SET
+                        centavos = centavos - CAST(ROUND(OLD.valor * 100) AS INTEGER),
+                        quantidade = quantidade - 1
+                    WHERE mes = substr(OLD.vencimento, 1, 7) AND status = OLD.status
+                        AND categoria = OLD.categoria;
+                END;
+                CREATE TRIGGER IF NOT EXISTS totais_alterar
+                AFTER UPDATE OF valor, vencimento, categoria, status ON despesas BEGIN
+                    UPDATE totais_mensais SET
+                        centavos = centavos - CAST(ROUND(OLD.valor * 100) AS INTEGER),
+                        quantidade = quantidade - 1
+                    WHERE mes = substr(OLD.vencimento, 1, 7) AND status = OLD.status
+                        AND categoria = OLD.categoria;
+                    INSERT INTO totais_mensais VALUES (
+                        substr(NEW.vencimento, 1, 7), NEW.status, NEW.categoria,
+                        CAST(ROUND(NEW.valor * 100) AS INTEGER), 1)
+                    ON CONFLICT (mes, status, categoria) DO UPDATE SET
+                        centavos = centavos + excluded.centavos, quantidade = quantidade + 1;
+                END;
+            """)
+
+    def _meta(self, chave: str, padrao: Any = None) -> Any:
+        linha = self.conexao.execute(
+            "SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else padrao
+
+    def _definir_meta(self, chave: str, valor: Any) -> None:
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)", (chave, valor))
+
+    def vazio(self) -> bool:
+        """Indica se o banco ainda não recebeu nenhum dado"""
+        # Incluir despesas e regras também grava em meta: um banco cujos
+        # dados foram todos excluídos não volta a ser vazio (os ids seguem)
+        return (self.conexao.execute("SELECT COUNT(*) FROM meta").fetchone()[0] == 0
+                and self.contar() == 0
+                and self.conexao.execute("SELECT COUNT(*) FROM recorrencias").fetchone()[0] == 0)
+
+    def carregar(self) -> Tuple[Optional[Estado], List[Operacao]]:
+        if self.vazio():
+            return None, []
+        maior_id = self.conexao.execute("SELECT MAX(id) FROM despesas").fetchone()[0] or 0
+        maior_regra = self.conexao.execute("SELECT MAX(id) FROM recorrencias").fetchone()[0] or 0
+        return {
+            'saldo': self._meta('saldo', 0.0),
+            'data_saldo': self._meta('data_saldo'),
+            'proximo_id': max(maior_id + 1, self._meta('proximo_id', 1)),
+            'recorrencias': self._carregar_recorrencias(),
+            'proximo_id_regra': max(maior_regra + 1, self._meta('proximo_id_regra', 1)),
+        }, []
+
+    def _carregar_recorrencias(self) -> List[Dict[str, Any]]:
+        """Regras no formato de RegraRecorrencia.to_dict, com as ocorrências tratadas"""
+        regras = {}
+        for id_regra, dados in self.conexao.execute("SELECT id, dados FROM recorrencias"):
+            regras[id_regra] = dict(json.loads(dados), tratadas={})
+        for id_regra, data, id_despesa in self.conexao.execute(
+                "SELECT regra, data, despesa FROM ocorrencias_tratadas ORDER BY regra, data"):
+            if id_regra in regras:
+                regras[id_regra]['tratadas'][data] = id_despesa
+        return list(regras.values())
+
+    def registrar(self, operacao: Operacao, estado: Callable[[], Estado]) -> None:
+        # Dentro de um lote a operação é executada na transação aberta (e fica
+        # visível para as consultas), mas só é confirmada em concluir_lote
+        self._executar(operacao)
+        contar("operacoes_gravadas")
+        if not self._em_lote:
+            self.conexao.commit()
+
+    def registrar_lote(self, operacoes: List[Operacao], estado: Callable[[], Estado]) -> None:
+        with self.conexao:
+            for operacao in operacoes:
+                self._executar(operacao)
+        contar("operacoes_gravadas", len(operacoes))
+
+    def iniciar_lote(self) -> None:
+        self._em_lote = True
+
+    def concluir_lote(self, estado: Callable[[], Estado]) -> None:
+        self._em_lote = False
+        self.conexao.commit()
+
+    def cancelar_lote(self) -> None:
+        self._em_lote = False
+        self.conexao.rollback()
+
+    def _executar(self, operacao: Operacao) -> None:
+        tipo = operacao['op']
+        if tipo == 'adicionar':
+            self._inserir([operacao['despesa']])
+            self._definir_meta('proximo_id', operacao['despesa']['id'] + 1)
+            if 'ocorrencia' in operacao:
+                self._tratar_ocorrencia(operacao['ocorrencia'], operacao['despesa']['id'])
+        elif tipo == 'pagar':
+            self.conexao.execute(
+                "UPDATE despesas SET status = 'Paga' WHERE id = ?", (operacao['id'],))
+            self._definir_meta('saldo', operacao['saldo'])
+        elif tipo == 'excluir':
+            self.conexao.execute("DELETE FROM despesas WHERE id = ?", (operacao['id'],))
+        elif tipo == 'saldo':
+            self._definir_meta('saldo', operacao['saldo'])
+            self._definir_meta('data_saldo', operacao['data'])
+        elif tipo == 'recorrencia':
+            self._inserir_recorrencias([operacao['regra']])
+            self._definir_meta('proximo_id_regra', max(self._meta('proximo_id_regra', 1),
+                                                       operacao['regra']['id'] + 1))
+        elif tipo == 'excluir_recorrencia':
+            self.conexao.execute("DELETE FROM recorrencias WHERE id = ?", (operacao['regra'],))
+            self.conexao.execute(
+                "DELETE FROM ocorrencias_tratadas WHERE regra = ?", (operacao['regra'],))
+        elif tipo == 'pular_ocorrencia':
+            self._tratar_ocorrencia(operacao, 0)
+        elif tipo == 'proximos_ids':
+            for chave in ('proximo_id', 'proximo_id_regra'):
+                self._definir_meta(chave, max(self._meta(chave, 1), operacao[chave]))
+        else:
+            raise ValueError(f"Operação desconhecida: {tipo}")
+
+    def _tratar_ocorrencia(self, ocorrencia: Dict[str, Any], id_despesa: int) -> None:
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO ocorrencias_tratadas (regra, data, despesa) VALUES (?, ?, ?)",
+            (ocorrencia['regra'], ocorrencia['data'], id_despesa))
+
+    def _inserir_recorrencias(self, regras: List[Dict[str, Any]]) -> None:
+        for regra in regras:
+            tratadas = regra.get('tratadas', {})
+            dados = {chave: valor for chave, valor in regra.items() if chave != 'tratadas'}
+            self.conexao.execute("INSERT OR REPLACE INTO recorrencias (id, dados) VALUES (?, ?)",
+                                 (regra['id'], json.dumps(dados, ensure_ascii=False)))
+            self.conexao.executemany(
+                "INSERT OR REPLACE INTO ocorrencias_tratadas (regra, data, despesa) VALUES (?, ?, ?)",
+                [(regra['id'], data, id_despesa) for data, id_despesa in tratadas.items()])
+
+    def compactar(self, estado: Callable[[], Estado]) -> None:
+        self.conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def fechar(self) -> None:
+        self.conexao.close()
+
+    def importar(self, estado: Estado) -> None:
+        """Grava um estado completo (migração de um arquivo JSON)"""
+        with self.conexao:
+            self._inserir(estado.get('despesas', []))
+            self._inserir_recorrencias(estado.get('recorrencias', []))
+            self._definir_meta('saldo', estado.get('saldo', 0.0))
+            self._definir_meta('data_saldo', estado.get('data_saldo'))
+            self._definir_meta('proximo_id', estado.get('proximo_id', 1))
+            self._definir_meta('proximo_id_regra', estado.get('proximo_id_regra', 1))
+
+    def _inserir(self, despesas: List[Dict[str, Any]]) -> None:
+        self.conexao.executemany(
+            f"INSERT OR REPLACE INTO despesas ({self.COLUNAS}) "
+            "VALUES (:id, :nome, :valor, :vencimento, :categoria, :status)",
+            despesas)
+
+    # Consultas (datas no formato YYYY-MM-DD; limites superiores exclusivos)
+
+    def _where(self, status: Optional[str], vencimento_de: Optional[str],
+               vencimento_ate: Optional[str]) -> Tuple[str, List[Any]]:
+        condicoes, parametros = [], []
+        if status is not None:
+            condicoes.append("status = ?")
+            parametros.append(status)
+        if vencimento_de is not None:
+            condicoes.append("vencimento >= ?")
+            parametros.append(vencimento_de)
+        if vencimento_ate is not None:
+            condicoes.append("vencimento < ?")
+            parametros.append(vencimento_ate)
+        where = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return where, parametros
+
+    def obter_despesa(self, id_despesa: int) -> Optional[Dict[str, Any]]:
+        linha = self.conexao.execute(
+            f"SELECT {self.COLUNAS} FROM despesas WHERE id = ?", (id_despesa,)).fetchone()
+        return dict(linha) if linha else None
+
+    def consultar(self, status: Optional[str] = None,
+                  vencimento_de: Optional[str] = None,
+                  vencimento_ate: Optional[str] = None) -> List[Dict[str, Any]]:
+        return list(self.iterar(status, vencimento_de, vencimento_ate))
+
+    def iterar(self, status: Optional[str] = None,
+               vencimento_de: Optional[str] = None,
+               vencimento_ate: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Como consultar, mas lendo as linhas do cursor aos poucos (exportação)"""
+        where, parametros = self._where(status, vencimento_de, vencimento_ate)
+        cursor = self.conexao.execute(
+            f"SELECT {self.COLUNAS} FROM despesas{where} ORDER BY id", parametros)
+        for linha in cursor:
+            yield dict(linha)
+
+    def somar(self, status: Optional[str] = None,
+              vencimento_de: Optional[str] = None,
+              vencimento_ate: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Retorna (soma em centavos, quantidade) das despesas que atendem ao
+        filtro; cada valor é convertido para centavos antes de somar, então
+        a soma é exata.
+        """
+        where, parametros = self._where(status, vencimento_de, vencimento_ate)
+        total, quantidade = self.conexao.execute(
+            "SELECT COALESCE(SUM(CAST(ROUND(valor * 100) AS INTEGER)), 0), COUNT(*) "
+            f"FROM despesas{where}",
+            parametros).fetchone()
+        return total, quantidade
+
+    def somar_por_dia(self, status: Optional[str] = None) -> List[Tuple[str, int]]:
+        """(vencimento, soma em centavos) por dia de vencimento, como em somar"""
+        where, parametros = self._where(status, None, None)
+        return self.conexao.execute(
+            "SELECT vencimento, SUM(CAST(ROUND(valor * 100) AS INTEGER)) "
+            f"FROM despesas{where} GROUP BY vencimento",
+            parametros).fetchall()
+
+    def contar(self) -> int:
+        return self.conexao.execute("SELECT COUNT(*) FROM despesas").fetchone()[0]
+
+    def totais_mensais(self, de_mes: Optional[str] = None,
+                       ate_mes: Optional[str] = None) -> List[Tuple[str, str, str, int, int]]:
+        """(mês, status, categoria, centavos, quantidade) de totais_mensais em [de_mes, ate_mes)"""
+        condicoes, parametros = ["quantidade > 0"], []
+        if de_mes is not None:
+            condicoes.append("mes >= ?")
+            parametros.append(de_mes)
+        if ate_mes is not None:
+            condicoes.append("mes < ?")
+            parametros.append(ate_mes)
+        return [tuple(linha) for linha in self.conexao.execute(
+            "SELECT mes, status, categoria, centavos, quantidade FROM totais_mensais "
+            f"WHERE {' AND '.join(condicoes)} ORDER BY mes", parametros)]
+
+
+class GravacaoAdiada(Armazenamento):
+    """
+    Write-behind sobre um backend residente: as mutações são acumuladas e
+    gravadas por uma thread em segundo plano depois de ``intervalo`` segundos
+    sem novas mutações (debounce), com uma única gravação por rajada.
+
+    ``trava`` deve ser a mesma trava que o gerenciador segura ao aplicar
+    mutações, para que a gravação veja um estado consistente com a fila.
+    descarregar() grava imediatamente o que estiver pendente.
+    """
+
+    def __init__(self, backend: Armazenamento, intervalo: float, trava: threading.RLock):
+        if not backend.residente:
+            raise ValueError("Gravação adiada exige um armazenamento residente")
+        self.backend = backend
+        self.intervalo = intervalo
+        self.trava = trava
+        self._pendentes: List[Operacao] = []
+        self._estado: Optional[Callable[[], Estado]] = None
+        self._inicio_lote: Optional[int] = None
+        self._timer: Optional[threading.Timer] = None
+
+    def __getattr__(self, nome: str) -> Any:
+        # Demais atributos (histórico, arquivos) vêm do backend
+        return getattr(self.backend, nome)
+
+    def carregar(self) -> Tuple[Optional[Estado], List[Operacao]]:
+        self.descarregar()
+        return self.backend.carregar()
+
+    def registrar(self, operacao: Operacao, estado: Callable[[], Estado]) -> None:
+        with self.trava:
+            self._pendentes.append(operacao)
+            self._estado = estado
+            if self._inicio_lote is None:
+                self._agendar()
+
+    def registrar_lote(self, operacoes: List[Operacao], estado: Callable[[], Estado]) -> None:
+        for operacao in operacoes:
+            self.registrar(operacao, estado)
+
+    def iniciar_lote(self) -> None:
+        # Grava antes o que está na fila: a gravação usa o estado inteiro
+        # (estado()), e durante o lote ele já traria as mutações do lote,
+        # que um cancelamento precisa descartar
+        with self.trava:
+            self.descarregar()
+            self._inicio_lote = len(self._pendentes)
+
+    def concluir_lote(self, estado: Callable[[], Estado]) -> None:
+        with self.trava:
+            self._inicio_lote = None
+            if self._pendentes:
+                self._agendar()
+
+    def cancelar_lote(self) -> None:
+        with self.trava:
+            if self._inicio_lote is not None:
+                del self._pendentes[self._inicio_lote:]
+            self._inicio_lote = None
+
+    def _agendar(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.intervalo, self._gravar_em_segundo_plano)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _gravar_em_segundo_plano(self) -> None:
+        try:
+            self.descarregar()
+        except Exception as e:
+            print(f"Erro ao salvar dados: {e}")
+
+    def descarregar(self) -> None:
+        with self.trava:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._inicio_lote is not None or not self._pendentes:
+                # Transação em andamento: a gravação fica para o seu fim
+                return
+            operacoes, self._pendentes = self._pendentes, []
+            try:
+                self.backend.registrar_lote(operacoes, self._estado)
+            except Exception:
+                # Mantém a fila para a próxima tentativa
+                self._pendentes[:0] = operacoes
+                raise
+
+    def compactar(self, estado: Callable[[], Estado]) -> None:
+        with self.trava:
+            self.descarregar()
+            self.backend.compactar(estado)
+
+    def fechar(self) -> None:
+        self.descarregar()
+        self.backend.fechar()
+
+    # Definidos na classe base, então não passam pelo __getattr__
+
+    def meses_historico(self) -> List[str]:
+        return self.backend.meses_historico()
+
+    def ler_pagina_historico(self, pagina: int) -> List[Dict[str, Any]]:
+        return self.backend.ler_pagina_historico(pagina)
+
+    def ler_mes_historico(self, mes: str) -> List[Dict[str, Any]]:
+        return self.backend.ler_mes_historico(mes)
+
+    def iterar_historico(self) -> Iterator[Dict[str, Any]]:
+        return self.backend.iterar_historico()
+
+
+def criar_armazenamento(tipo: str, data_dir: Path) -> Armazenamento:
+    """Cria o backend de armazenamento pelo nome ('json', 'journal' ou 'sqlite')"""
+    data_file = Path(data_dir) / "trimoney_data.json"
+    if tipo == "json":
+        return ArmazenamentoJSON(data_file)
+    if tipo == "journal":
+        return ArmazenamentoJournal(data_file)
+    if tipo == "sqlite":
+        return ArmazenamentoSQLite(Path(data_dir) / "trimoney.db")
+    raise ValueError(f"Armazenamento desconhecido: {tipo}")
@@ -0,0 +1,111 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Acesso aos dados fora da thread da interface
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from financeiro import GerenciadorFinanceiro
+
+
+def _entregar_no_clock(callback: Callable[[], None]) -> None:
+    """Chama `callback` na thread da interface, no próximo quadro"""
+    from kivy.clock import Clock
+    Clock.schedule_once(lambda dt: callback())
+
+
+class GerenciadorAssincrono:
+    """
+    Executa as chamadas ao GerenciadorFinanceiro numa única thread de
+    trabalho, na ordem em que foram pedidas: as mutações ficam serializadas
+    e uma consulta sempre vê as mutações pedidas antes dela. O resultado
+    (ou a exceção) volta pela função `entregar`, por padrão o Clock do
+    Kivy, para que os callbacks possam mexer nos widgets.
+
+    Uso nas telas:
+        dados.chamar('calcular_resumo', ao_concluir=self._exibir_resumo)
+        dados.chamar('definir_saldo', 100.0, ao_falhar=self._mostrar_erro)
+    
+    O gerenciador é lido na thread de trabalho, na hora de cada chamada, e
+    trocado nela mesma (trocar_gerenciador, na troca de perfil): as
+    chamadas pedidas antes da troca vão para o anterior, as pedidas depois
+    para o novo.
+    """
+
+    def __init__(self, gerenciador: GerenciadorFinanceiro,
+                 entregar: Optional[Callable[[Callable[[], None]], None]] = None):
+        self.gerenciador = gerenciador
+        self._entregar = entregar or _entregar_no_clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trimoney-dados")
+
+    def executar(self, funcao: Callable[..., Any], *args,
+                 ao_concluir: Optional[Callable[[Any], None]] = None,
+                 ao_falhar: Optional[Callable[[BaseException], None]] = None,
+                 **kwargs) -> Future:
+        """
+        Enfileira `funcao(*args, **kwargs)` na thread de trabalho. Útil para
+        juntar várias chamadas ao gerenciador num só passo; o Future
+        retornado permite esperar o resultado fora da interface.
+        """
+        return self._executor.submit(self._executar, funcao, args, kwargs,
+                                     ao_concluir, ao_falhar)
+
+    def chamar(self, metodo: str, *args,
+               ao_concluir: Optional[Callable[[Any], None]] = None,
+               ao_falhar: Optional[Callable[[BaseException], None]] = None,
+               **kwargs) -> Future:
+        """Enfileira um método do gerenciador pelo nome"""
+        return self.executar(self._chamar, metodo, *args,
+                             ao_concluir=ao_concluir, ao_falhar=ao_falhar, **kwargs)
+    
+    def _chamar(self, metodo: str, *args, **kwargs) -> Any:
+        return getattr(self.gerenciador, metodo)(*args, **kwargs)
+    
+    def aplicar(self, funcao: Callable[..., Any], *args,
+                ao_concluir: Optional[Callable[[Any], None]] = None,
+                ao_falhar: Optional[Callable[[BaseException], None]] = None,
+                **kwargs) -> Future:
+        """Enfileira `funcao(gerenciador, *args, **kwargs)` (relatórios, importação...)"""
+        return self.executar(self._aplicar, funcao, *args,
+                             ao_concluir=ao_concluir, ao_falhar=ao_falhar, **kwargs)
+    
+    def _aplicar(self, funcao: Callable[..., Any], *args, **kwargs) -> Any:
+        return funcao(self.gerenciador, *args, **kwargs)
+    
+    def trocar_gerenciador(self, abrir: Callable[..., GerenciadorFinanceiro], *args,
+                           ao_concluir: Optional[Callable[[Any], None]] = None,
+                           ao_falhar: Optional[Callable[[BaseException], None]] = None
+                           ) -> Future:
+        """Enfileira `abrir(*args)` e passa a usar o gerenciador retornado (entregue a ao_concluir)"""
+        return self.executar(self._trocar, abrir, *args,
+                             ao_concluir=ao_concluir, ao_falhar=ao_falhar)
+    
+    def _trocar(self, abrir: Callable[..., GerenciadorFinanceiro], *args) -> GerenciadorFinanceiro:
+        self.gerenciador = abrir(*args)
+        return self.gerenciador
+
+    def _executar(self, funcao, args, kwargs, ao_concluir, ao_falhar) -> Any:
+        # Entrega aqui, na thread de trabalho: um add_done_callback rodaria na
+        # thread que enfileirou se a chamada já tivesse terminado, e respostas
+        # pedidas de threads diferentes poderiam chegar fora de ordem
+        try:
+            resultado = funcao(*args, **kwargs)
+        except BaseException as erro:
+            if ao_falhar is not None:
+                self._entregar(partial(ao_falhar, erro))
+            else:
+                print(f"Erro ao acessar dados: {erro}")
+            raise
+        if ao_concluir is not None:
+            self._entregar(partial(ao_concluir, resultado))
+        return resultado
+
+    def aguardar(self) -> None:
+        """Bloqueia até as chamadas já enfileiradas terminarem"""
+        self._executor.submit(lambda: None).result()
+
+    def encerrar(self) -> None:
+        """Termina as chamadas pendentes e para a thread de trabalho"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,4 @@
+"""
+TRIMONEY - Benchmarks
+Executar a partir da raiz do projeto, ex.: python -m benchmarks.bench_memoria
+"""
@@ -0,0 +1,62 @@
+"""
+TRIMONEY - Benchmark da busca por nome
+
+Indexa N despesas sintéticas (nomes de benchmarks.bench_memoria com um
+número, para haver muitos termos distintos) e compara a primeira página
+de algumas consultas no índice (busca.IndiceBusca) com a varredura de
+todos os nomes. O índice deve responder em poucos milissegundos mesmo
+com 1M de despesas; a varredura cresce com a quantidade.
+
+Uso: python -m benchmarks.bench_busca [--tamanhos 100000 1000000]
+"""
+
+import argparse
+import time
+
+from benchmarks.bench_memoria import gerar_registros
+from benchmarks.bench_resumo import cronometrar
+from busca import IndiceBusca, normalizar, termos
+
+CONSULTAS = ["agu", "super 12", "Farmácia 4", "xyz"]
+
+
+def buscar_varredura(documentos, consulta, quantidade=50):
+    """Mesma seleção percorrendo todos os nomes (ordenada só pelo vencimento)"""
+    palavras = termos(consulta)
+    encontrados = [(-dia, -id_despesa) for id_despesa, nome, dia in documentos
+                   if all(any(termo.startswith(palavra) for termo in termos(nome))
+                          for palavra in palavras)]
+    encontrados.sort()
+    return [-id_negativo for _, id_negativo in encontrados[:quantidade]], len(encontrados)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'despesas':>10} {'consulta':>12} {'total':>8} {'índice':>9} {'varredura':>11}")
+    for quantidade in args.tamanhos:
+        documentos = [(r['id'], f"{r['nome']} {r['id'] % 5000}",
+                       int(r['vencimento'].replace("-", "")))
+                      for r in gerar_registros(quantidade)]
+        normalizar.cache_clear()
+        inicio = time.perf_counter()
+        indice = IndiceBusca()
+        for id_despesa, nome, dia in documentos:
+            indice.adicionar(id_despesa, nome, dia)
+        print(f"{quantidade:>10} {'(montagem)':>12} {'':>8} "
+              f"{(time.perf_counter() - inicio) * 1000:>7.0f}ms")
+
+        for consulta in CONSULTAS:
+            ids, total = indice.buscar(consulta)
+            assert total == buscar_varredura(documentos, consulta)[1]
+            tempo = cronometrar(lambda: indice.buscar(consulta), args.repeticoes)
+            varredura = cronometrar(lambda: buscar_varredura(documentos, consulta), 1)
+            print(f"{quantidade:>10} {consulta:>12} {total:>8} {tempo * 1000:>7.2f}ms "
+                  f"{varredura * 1000:>9.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+TRIMONEY - Benchmark de inicialização (carregar_dados)
+
+Mede o tempo de carga de um trimoney_data.json sintético pelo caminho
+original (json.load + from_dict com strptime por registro) e pelo
+GerenciadorFinanceiro atual, em ms por 10k registros.
+
+Uso: python -m benchmarks.bench_carga [--tamanhos 10000 100000] [--repeticoes 3]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import armazenamento
+import financeiro
+from benchmarks.bench_memoria import DespesaOriginal, gerar_registros
+from financeiro import GerenciadorFinanceiro
+
+
+def carga_original(data_file: Path) -> None:
+    """Reprodução do carregar_dados original"""
+    with open(data_file, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    despesas = [DespesaOriginal.from_dict(d) for d in dados.get('despesas', [])]
+    if despesas:
+        max(d['id'] for d in dados['despesas'])
+
+
+def carga_atual(data_dir: Path) -> None:
+    financeiro._datas_internas.clear()  # inicialização a frio
+    GerenciadorFinanceiro(str(data_dir), armazenamento="json")
+
+
+def cronometrar(funcao, argumento, repeticoes: int) -> float:
+    """Melhor tempo (s) entre as repetições"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(argumento)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    parser_json = "orjson" if armazenamento.orjson is not None else "json"
+    print(f"parser JSON: {parser_json}")
+    print(f"{'registros':>10} {'original':>14} {'atual':>14} {'ganho':>7}")
+    for quantidade in args.tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            data_dir = Path(pasta)
+            data_file = data_dir / "trimoney_data.json"
+            with open(data_file, 'w', encoding='utf-8') as f:
+                json.dump({'saldo': 1000.0, 'data_saldo': "2026-01-01",
+                           'despesas': list(gerar_registros(quantidade))},
+                          f, indent=2, ensure_ascii=False)
+
+            original = cronometrar(carga_original, data_file, args.repeticoes)
+            atual = cronometrar(carga_atual, data_dir, args.repeticoes)
+
+        escala = 10_000 / quantidade * 1000
+        print(f"{quantidade:>10} {original * escala:>10.1f}ms/10k "
+              f"{atual * escala:>10.1f}ms/10k {original / atual:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
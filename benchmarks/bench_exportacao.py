@@ -0,0 +1,84 @@
+"""
+TRIMONEY - Benchmark da exportação e do backup em fluxo
+
+Monta um banco SQLite com N despesas e mede, para CSV, JSON Lines, backup
+e restauração: tempo, tamanho do arquivo e pico de memória do Python
+(tracemalloc, que deixa os tempos bem mais lentos). Com o SQLite nada
+fica residente, então o pico deve ficar praticamente igual para 100k e
+400k despesas. Ao final confere que o backup restaurado tem as mesmas
+despesas e o mesmo resumo.
+
+Uso: python -m benchmarks.bench_exportacao [--tamanhos 100000 400000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.bench_memoria import gerar_registros
+from financeiro import GerenciadorFinanceiro
+
+
+def medir(funcao):
+    """(resultado, segundos, pico de memória em MB)"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, tempo, pico / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[100_000, 400_000])
+    args = parser.parse_args()
+
+    print(f"{'despesas':>10} {'operação':>12} {'tempo':>8} {'arquivo':>10} {'pico':>9}")
+    for quantidade in args.tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            pasta = Path(pasta)
+            gerenciador = GerenciadorFinanceiro(pasta / "origem", armazenamento="sqlite")
+            gerenciador.armazenamento.importar({'despesas': list(gerar_registros(quantidade)),
+                                                'saldo': 1000.0})
+            gerenciador.carregar_dados()
+
+            def exportar_csv():
+                with open(pasta / "despesas.csv", "w", encoding="utf-8", newline="") as f:
+                    return gerenciador.exportar_csv(f)
+
+            def exportar_jsonl():
+                with open(pasta / "despesas.jsonl", "w", encoding="utf-8") as f:
+                    return gerenciador.exportar_jsonl(f)
+
+            def criar_backup():
+                with open(pasta / "backup.gz", "wb") as f:
+                    return gerenciador.criar_backup(f)
+
+            destino = GerenciadorFinanceiro(pasta / "destino", armazenamento="sqlite")
+
+            def restaurar_backup():
+                with open(pasta / "backup.gz", "rb") as f:
+                    return destino.restaurar_backup(f)
+
+            operacoes = [("csv", exportar_csv, "despesas.csv"),
+                         ("jsonl", exportar_jsonl, "despesas.jsonl"),
+                         ("backup", criar_backup, "backup.gz"),
+                         ("restauração", restaurar_backup, "backup.gz")]
+            for nome, funcao, arquivo in operacoes:
+                resultado, tempo, pico = medir(funcao)
+                assert resultado == quantidade, (nome, resultado)
+                tamanho = os.path.getsize(pasta / arquivo) / 1e6
+                print(f"{quantidade:>10} {nome:>12} {tempo:>7.2f}s {tamanho:>8.1f}MB "
+                      f"{pico:>7.1f}MB")
+
+            assert destino.calcular_resumo() == gerenciador.calcular_resumo()
+            assert destino.armazenamento.contar() == quantidade
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+TRIMONEY - Benchmark do histórico particionado por mês
+
+Grava N despesas de 3 anos (benchmarks.bench_memoria) e compara o modo
+completo (tudo no snapshot) com o sob demanda, em que as pagas dos meses
+fechados vão para segmentos mensais compactados: tamanho do snapshot,
+tempo de carga, de uma compactação (salvar_dados) depois de uma mutação,
+do resumo e da leitura da primeira página (um mês) do histórico.
+
+Uso: python -m benchmarks.bench_historico [--tamanhos 100000] [--repeticoes 3]
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_memoria import gerar_registros
+from benchmarks.bench_resumo import cronometrar
+from financeiro import GerenciadorFinanceiro, decodificar_despesas
+
+
+def tamanho_mb(*caminhos: Path) -> float:
+    total = 0
+    for caminho in caminhos:
+        if caminho.is_dir():
+            total += sum(arquivo.stat().st_size for arquivo in caminho.iterdir())
+        elif caminho.exists():
+            total += caminho.stat().st_size
+    return total / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'despesas':>10} {'modo':>11} {'snapshot':>9} {'histórico':>10} {'carga':>8} "
+          f"{'salvar':>8} {'resumo':>8} {'página':>8}")
+    for quantidade in args.tamanhos:
+        despesas, _ = decodificar_despesas(gerar_registros(quantidade))
+        for sob_demanda in (False, True):
+            with tempfile.TemporaryDirectory() as pasta:
+                pasta = Path(pasta)
+                gerenciador = GerenciadorFinanceiro(pasta, sob_demanda=sob_demanda)
+                gerenciador.despesas = despesas
+                gerenciador.definir_saldo(1000)
+                gerenciador.salvar_dados()  # no modo sob demanda, arquiva os meses fechados
+                resumo = gerenciador.calcular_resumo()
+
+                carga = cronometrar(lambda: GerenciadorFinanceiro(pasta, sob_demanda=sob_demanda),
+                                    args.repeticoes)
+                gerenciador = GerenciadorFinanceiro(pasta, sob_demanda=sob_demanda)
+                assert gerenciador.calcular_resumo() == resumo
+
+                def salvar():
+                    gerenciador.adicionar_saldo(1)
+                    gerenciador.salvar_dados()
+
+                salvar_tempo = cronometrar(salvar, args.repeticoes)
+                resumo_tempo = cronometrar(gerenciador.calcular_resumo, args.repeticoes)
+                pagina = cronometrar(lambda: gerenciador.carregar_pagina_historico(0),
+                                     args.repeticoes) if sob_demanda else 0.0
+
+                snapshot = tamanho_mb(gerenciador.data_file)
+                historico = tamanho_mb(pasta / "trimoney_historico")
+                modo = "sob demanda" if sob_demanda else "completo"
+                print(f"{quantidade:>10} {modo:>11} {snapshot:>7.1f}MB {historico:>8.1f}MB "
+                      f"{carga * 1000:>6.0f}ms {salvar_tempo * 1000:>6.0f}ms "
+                      f"{resumo_tempo * 1000:>6.2f}ms {pagina * 1000:>6.1f}ms")
+                gerenciador.armazenamento.fechar()
+
+
+if __name__ == '__main__':
+    main()
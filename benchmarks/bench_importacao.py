@@ -0,0 +1,109 @@
+"""
+TRIMONEY - Benchmark da importação de extratos
+
+Gera um CSV de extrato com 100k linhas (';' e valores no formato
+brasileiro) e mede importar_extrato: linhas/s, número de chamadas do
+progresso e a reimportação do mesmo arquivo (tudo duplicado). Compara
+ainda, numa amostra menor, com o laço ingênuo de adicionar_despesa linha a
+linha sem transação, que regrava o arquivo a cada despesa.
+
+Uso: python -m benchmarks.bench_importacao [--linhas 100000] [--amostra 2000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro
+from importacao import importar_extrato, ler_csv
+
+
+def gerar_extrato(caminho: Path, linhas: int, semente: int = 11) -> None:
+    """Extrato com ~90% de débitos, alguns créditos e linhas repetidas"""
+    aleatorio = random.Random(semente)
+    nomes = ["Mercado", "Padaria", "Farmácia", "Posto", "Restaurante", "Uber", "Luz", "Água"]
+    inicio = datetime(2024, 1, 1)
+    with open(caminho, "w", encoding="utf-8", newline="") as arquivo:
+        arquivo.write("Data;Descrição;Valor\n")
+        anterior = ""
+        for i in range(linhas):
+            if anterior and aleatorio.random() < 0.01:
+                arquivo.write(anterior)  # lançamento duplicado no próprio arquivo
+                continue
+            data = inicio + timedelta(days=i // 150)
+            centavos = aleatorio.randrange(100, 50_000)
+            sinal = "" if aleatorio.random() < 0.1 else "-"
+            reais = f"{centavos // 100:,}".replace(",", ".")
+            anterior = (f"{data:%d/%m/%Y};{aleatorio.choice(nomes)} {i};"
+                        f"{sinal}{reais},{centavos % 100:02d}\n")
+            arquivo.write(anterior)
+
+
+def importar_ingenuo(gerenciador: GerenciadorFinanceiro, caminho: Path) -> int:
+    """Uma chamada de adicionar_despesa (e uma gravação) por linha"""
+    importadas = 0
+    with open(caminho, encoding="utf-8") as arquivo:
+        for lancamento in ler_csv(arquivo):
+            if lancamento is None or lancamento.centavos >= 0:
+                continue
+            gerenciador.adicionar_despesa(lancamento.nome, -lancamento.centavos / 100,
+                                          lancamento.data, CategoriaDespesa.VARIAVEL)
+            importadas += 1
+    return importadas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--amostra", type=int, default=2_000,
+                        help="linhas do comparativo com o laço ingênuo")
+    parser.add_argument("--armazenamento", default="journal",
+                        choices=("json", "journal", "sqlite"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        extrato = pasta / "extrato.csv"
+        gerar_extrato(extrato, args.linhas)
+        print(f"extrato: {args.linhas} linhas, {extrato.stat().st_size / 1e6:.1f} MB")
+
+        gerenciador = GerenciadorFinanceiro(pasta / "lote", armazenamento=args.armazenamento)
+        chamadas = []
+        inicio = time.perf_counter()
+        resultado = importar_extrato(gerenciador, extrato,
+                                     progresso=lambda r: chamadas.append(r.fracao))
+        tempo = time.perf_counter() - inicio
+        print(f"importação ({args.armazenamento}): {tempo:.2f}s, "
+              f"{resultado.lidas / tempo:,.0f} linhas/s, {len(chamadas)} chamadas de progresso")
+        print(f"  {resultado}")
+        assert resultado.importadas == len(gerenciador.despesas)
+        assert chamadas == sorted(chamadas) and chamadas[-1] <= 1.0
+
+        inicio = time.perf_counter()
+        repetida = importar_extrato(gerenciador, extrato)
+        tempo = time.perf_counter() - inicio
+        print(f"reimportação: {tempo:.2f}s, {repetida.importadas} importadas, "
+              f"{repetida.duplicadas} duplicadas")
+        assert repetida.importadas == 0
+
+        amostra = pasta / "amostra.csv"
+        gerar_extrato(amostra, args.amostra)
+        tempos = {}
+        for nome in ("ingênuo", "em lotes"):
+            gerenciador = GerenciadorFinanceiro(pasta / nome, armazenamento="json")
+            inicio = time.perf_counter()
+            if nome == "ingênuo":
+                importar_ingenuo(gerenciador, amostra)
+            else:
+                importar_extrato(gerenciador, amostra)
+            tempos[nome] = time.perf_counter() - inicio
+        print(f"amostra de {args.amostra} linhas (json): ingênuo {tempos['ingênuo']:.2f}s, "
+              f"em lotes {tempos['em lotes']:.3f}s "
+              f"({tempos['ingênuo'] / tempos['em lotes']:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
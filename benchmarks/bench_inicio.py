@@ -0,0 +1,59 @@
+"""
+TRIMONEY - Benchmark da abertura do aplicativo
+
+Abre o main.py várias vezes com TRIMONEY_MEDIR_INICIO=1 (o app imprime o
+tempo do início do processo até o primeiro quadro e fecha) e mostra o
+menor tempo e a mediana, além do tempo total de cada processo. Com
+--limite, termina com erro se a mediana passar do limite (em ms), para
+acusar regressões. Precisa do Kivy e de uma janela (ou um display
+virtual, como xvfb-run).
+
+Uso: python -m benchmarks.bench_inicio [--repeticoes 5] [--limite 1500]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def abrir() -> tuple:
+    """(ms até o primeiro quadro, ms do processo inteiro)"""
+    ambiente = dict(os.environ, TRIMONEY_MEDIR_INICIO="1")
+    inicio = time.perf_counter()
+    saida = subprocess.run([sys.executable, "main.py"], cwd=RAIZ, env=ambiente,
+                           capture_output=True, text=True, timeout=120)
+    total = (time.perf_counter() - inicio) * 1000
+    medida = re.search(r"inicio: ([\d.]+)ms", saida.stdout)
+    if medida is None:
+        raise RuntimeError(f"o app não informou o tempo de abertura:\n{saida.stderr[-2000:]}")
+    return float(medida.group(1)), total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=None,
+                        help="mediana máxima aceita até o primeiro quadro (ms)")
+    args = parser.parse_args()
+
+    abrir()  # a primeira abertura aquece o cache de disco e os .pyc
+    medidas = [abrir() for _ in range(args.repeticoes)]
+    quadros = [quadro for quadro, _ in medidas]
+    mediana = statistics.median(quadros)
+    print(f"primeiro quadro: mínimo {min(quadros):.0f}ms, mediana {mediana:.0f}ms")
+    print(f"processo inteiro: mediana {statistics.median(t for _, t in medidas):.0f}ms")
+
+    if args.limite is not None and mediana > args.limite:
+        print(f"REGRESSÃO: mediana {mediana:.0f}ms acima do limite de {args.limite:.0f}ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+TRIMONEY - Benchmark de atualização da lista de despesas
+
+Mede, numa RecycleView com ItemDespesa, o refresh original (limpar data e
+fazer append linha a linha) contra a atualização atual (uma atribuição,
+ou só as linhas alteradas), para uma recarga completa e para o pagamento
+de uma despesa, com 1k/10k linhas.
+
+Uso: python -m benchmarks.bench_lista [--tamanhos 1000 10000] [--repeticoes 3]
+Sem display, rodar com: xvfb-run python -m benchmarks.bench_lista
+"""
+
+import os
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import tempfile
+import time
+
+from kivy.base import EventLoop
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+
+import main  # registra as classes
+from benchmarks.bench_memoria import gerar_registros
+from financeiro import Despesa, GerenciadorFinanceiro, StatusDespesa
+
+
+class _Linhas:
+    """Só o necessário de TelaDespesas para chamar _montar_linha"""
+
+    def __init__(self, gerenciador):
+        self.gerenciador = gerenciador
+
+    def montar(self, despesas):
+        return [main.TelaDespesas._montar_linha(self, d) for d in despesas]
+
+
+def criar_lista():
+    lista = main.ListaDespesas(viewclass='ItemDespesa', size=(400, 800))
+    lista.add_widget(RecycleBoxLayout(
+        orientation='vertical', default_size=(None, 70), default_size_hint=(1, None),
+        size_hint_y=None))
+    lista.children[0].bind(minimum_height=lista.children[0].setter('height'))
+    return lista
+
+
+def processar_quadro() -> None:
+    """Roda o Clock até o layout da RecycleView assentar"""
+    Clock.tick()
+    EventLoop.idle()
+
+
+def refresh_original(lista, linhas) -> None:
+    lista.data = []
+    for linha in linhas:
+        lista.data.append(linha)
+    processar_quadro()
+
+
+def refresh_atual(lista, linhas) -> None:
+    lista.atualizar_dados(linhas)
+    processar_quadro()
+
+
+def cronometrar(preparar, executar, repeticoes: int) -> float:
+    """Melhor tempo (s) de executar(), com preparar() fora da medição"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        argumentos = preparar()
+        inicio = time.perf_counter()
+        executar(*argumentos)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main_benchmark() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    EventLoop.ensure_window()
+    Builder.load_file('trimoney_despesas.kv')  # regra do ItemDespesa
+    with tempfile.TemporaryDirectory() as pasta:
+        executar(_Linhas(GerenciadorFinanceiro(pasta)), args)
+
+
+def executar(linhas_de, args) -> None:
+    print(f"{'linhas':>8} {'cenário':>10} {'original':>12} {'atual':>12} {'ganho':>7}")
+    for quantidade in args.tamanhos:
+        despesas = [Despesa.from_dict(r) for r in gerar_registros(quantidade)]
+        linhas = linhas_de.montar(despesas)
+
+        # Pagamento de uma despesa: a mesma lista com uma linha diferente
+        pendente = next(d for d in despesas if d.status == StatusDespesa.PENDENTE)
+        pendente.status = StatusDespesa.PAGA
+        linhas_pago = linhas_de.montar(despesas)
+
+        cenarios = {
+            'recarga': lambda lista: (lista, linhas),
+            'pagamento': lambda lista: (lista, linhas_pago),
+        }
+        for nome, argumentos in cenarios.items():
+            tempos = []
+            for refresh in (refresh_original, refresh_atual):
+                def preparar(argumentos=argumentos):
+                    lista = criar_lista()
+                    lista.data = [dict(linha) for linha in linhas]
+                    processar_quadro()
+                    if nome == 'recarga':
+                        lista.data = []
+                        processar_quadro()
+                    return argumentos(lista)
+                tempos.append(cronometrar(preparar, refresh, args.repeticoes))
+            original, atual = tempos
+            print(f"{quantidade:>8} {nome:>10} {original * 1000:>10.1f}ms "
+                  f"{atual * 1000:>10.1f}ms {original / atual:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main_benchmark()
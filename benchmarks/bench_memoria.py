@@ -0,0 +1,93 @@
+"""
+TRIMONEY - Benchmark de memória da representação de Despesa
+
+Compara o layout original (@dataclass com __dict__, um datetime por
+despesa) com o atual (__slots__, datas e nomes compartilhados) para
+10k/100k/1M despesas.
+
+Uso: python -m benchmarks.bench_memoria [--tamanhos 10000 100000 1000000]
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from financeiro import CategoriaDespesa, Despesa, StatusDespesa
+
+NOMES = ["Aluguel", "Luz", "Água", "Internet", "Supermercado", "Farmácia",
+         "Combustível", "Escola", "Academia", "Celular", "Padaria", "Restaurante"]
+
+
+@dataclass
+class DespesaOriginal:
+    """Cópia do layout anterior, para comparação"""
+    id: int
+    nome: str
+    valor: float
+    vencimento: datetime
+    categoria: CategoriaDespesa
+    status: StatusDespesa
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            id=data['id'],
+            nome=data['nome'],
+            valor=data['valor'],
+            vencimento=datetime.strptime(data['vencimento'], "%Y-%m-%d"),
+            categoria=CategoriaDespesa(data['categoria']),
+            status=StatusDespesa(data['status'])
+        )
+
+
+def gerar_registros(quantidade: int, semente: int = 42):
+    """Registros no formato do arquivo JSON (3 anos de vencimentos)"""
+    aleatorio = random.Random(semente)
+    inicio = datetime(2023, 1, 1)
+    for i in range(1, quantidade + 1):
+        vencimento = inicio + timedelta(days=aleatorio.randrange(3 * 365))
+        yield {
+            'id': i,
+            # Fatia cria um str novo por registro, como o json.load
+            'nome': (aleatorio.choice(NOMES) + "#")[:-1],
+            'valor': round(aleatorio.uniform(5, 2000), 2),
+            'vencimento': vencimento.strftime("%Y-%m-%d"),
+            'categoria': aleatorio.choice(("Fixa", "Variável")),
+            'status': aleatorio.choice(("Pendente", "Paga")),
+        }
+
+
+def medir(classe, quantidade: int) -> int:
+    """Bytes que continuam alocados para manter `quantidade` despesas carregadas"""
+    gc.collect()
+    tracemalloc.start()
+    registros = list(gerar_registros(quantidade))
+    despesas = [classe.from_dict(r) for r in registros]
+    del registros  # como o dict do json.load, descartado após a carga
+    gc.collect()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del despesas
+    return atual
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'despesas':>10} {'original':>12} {'atual':>12} {'B/despesa':>16} {'economia':>9}")
+    for quantidade in args.tamanhos:
+        original = medir(DespesaOriginal, quantidade)
+        atual = medir(Despesa, quantidade)
+        por_despesa = f"{original / quantidade:.0f} -> {atual / quantidade:.0f}"
+        print(f"{quantidade:>10} {original / 2**20:>10.1f}MB {atual / 2**20:>10.1f}MB "
+              f"{por_despesa:>16} {1 - atual / original:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+TRIMONEY - Benchmark da formatação de moeda
+
+Compara o tempo por valor: formatação original, formatar_moeda com o
+cache frio e quente, e formatar_moedas numa coluna. Que a saída é a
+mesma, byte a byte, é conferido em tests/test_moeda.py.
+
+Uso: python -m benchmarks.bench_moeda [--valores 10000]
+"""
+
+import argparse
+import random
+import time
+
+import moeda
+from moeda import formatar_moeda, formatar_moedas
+
+
+def formatar_original(valor: float) -> str:
+    """Cópia do GerenciadorFinanceiro.formatar_moeda anterior"""
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def cronometrar(funcao, repeticoes: int = 5) -> float:
+    """Melhor tempo (s) entre as repetições"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--valores", type=int, default=10_000,
+                        help="tamanho da coluna formatada")
+    args = parser.parse_args()
+
+    # Valores de despesas típicos, com repetição (mensalidades, contas fixas)
+    aleatorio = random.Random(42)
+    distintos = [round(aleatorio.uniform(5, 2000), 2) for _ in range(1000)]
+    valores = [aleatorio.choice(distintos) for _ in range(args.valores)]
+
+    def cache_frio():
+        moeda._formatar_diferente_de_zero.cache_clear()
+        [formatar_moeda(valor) for valor in valores]
+
+    resultados = {
+        'original': cronometrar(lambda: [formatar_original(valor) for valor in valores]),
+        'cache frio': cronometrar(cache_frio),
+        'cache quente': cronometrar(lambda: [formatar_moeda(valor) for valor in valores]),
+        'em lote': cronometrar(lambda: formatar_moedas(valores)),
+    }
+    original = resultados['original']
+    print(f"{'formatação':>14} {'ns/valor':>10} {'ganho':>7}")
+    for nome, tempo in resultados.items():
+        print(f"{nome:>14} {tempo / len(valores) * 1e9:>10.0f} {original / tempo:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
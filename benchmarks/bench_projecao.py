@@ -0,0 +1,69 @@
+"""
+TRIMONEY - Benchmark da projeção do saldo
+
+Com N despesas sintéticas (benchmarks.sintetico, com mais meses futuros
+para haver muitas pendentes) mede, no gerenciador: um ponto do saldo
+projetado, a projeção diária de 90 dias do gráfico do resumo, o primeiro
+dia negativo e uma mutação (inclusão e exclusão de uma pendente), que
+atualiza a árvore de somas sem recalcular nada. Compara o ponto com a
+soma das pendentes feita percorrendo todas elas.
+
+Uso: python -m benchmarks.bench_projecao [--tamanhos 10000 100000] [--armazenamento journal]
+"""
+
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.bench_resumo import cronometrar
+from benchmarks.sintetico import ParametrosDataset, gravar_dataset
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro, StatusDespesa
+
+
+def saldo_varredura(gerenciador: GerenciadorFinanceiro, dia: int) -> int:
+    """Mesmo ponto percorrendo todas as pendentes (sem recorrências), em centavos"""
+    return gerenciador.saldo_centavos - sum(
+        d.centavos for d in gerenciador.iterar_despesas(StatusDespesa.PENDENTE)
+        if d.vencimento.toordinal() <= dia)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--armazenamento", default="journal",
+                        choices=["json", "journal", "sqlite"])
+    args = parser.parse_args()
+
+    hoje = datetime.now()
+    daqui_90 = hoje + timedelta(days=90)
+    print(f"{'despesas':>10} {'ponto':>9} {'90 dias':>9} {'negativo':>9} "
+          f"{'mutação':>9} {'varredura':>10}")
+    for quantidade in args.tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            gravar_dataset(Path(pasta), ParametrosDataset(quantidade=quantidade,
+                                                          meses_futuros=12,
+                                                          saldo=100_000.0))
+            gerenciador = GerenciadorFinanceiro(pasta, armazenamento=args.armazenamento)
+            gerenciador.saldo_projetado(hoje)  # monta a árvore (no banco, sob demanda)
+
+            ponto = cronometrar(lambda: gerenciador.saldo_projetado(daqui_90), args.repeticoes)
+            serie = cronometrar(lambda: gerenciador.projecao_saldo(hoje, daqui_90),
+                                args.repeticoes)
+            negativo = cronometrar(gerenciador.primeiro_saldo_negativo, args.repeticoes)
+
+            def mutacao():
+                despesa = gerenciador.adicionar_despesa("Bench", 10.0, daqui_90,
+                                                        CategoriaDespesa.VARIAVEL)
+                gerenciador.excluir_despesa(despesa.id)
+
+            mutar = cronometrar(mutacao, args.repeticoes)
+            varredura = cronometrar(lambda: saldo_varredura(gerenciador, daqui_90.toordinal()), 1)
+            print(f"{quantidade:>10} {ponto * 1e6:>7.1f}µs {serie * 1000:>7.2f}ms "
+                  f"{negativo * 1e6:>7.1f}µs {mutar * 1000:>7.2f}ms {varredura * 1000:>8.1f}ms")
+            gerenciador.armazenamento.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+TRIMONEY - Benchmark dos relatórios mensais
+
+Mede o gráfico de 24 meses (relatorios.gastos_por_mes_e_categoria) com
+histórico de tamanhos crescentes, nos backends residente e SQLite, e
+compara com a varredura de todas as despesas. Com o rollup materializado
+a latência do relatório deve ficar praticamente igual para 10k e 1M de
+despesas; a da varredura cresce com o histórico.
+
+Uso: python -m benchmarks.bench_relatorios [--tamanhos 10000 100000 1000000]
+"""
+
+import argparse
+import tempfile
+from collections import defaultdict
+from datetime import date
+
+from benchmarks.bench_memoria import gerar_registros
+from benchmarks.bench_resumo import cronometrar
+from financeiro import GerenciadorFinanceiro, StatusDespesa, decodificar_despesas
+from relatorios import gastos_por_mes_e_categoria, mes_de
+
+# Os registros sintéticos vencem entre 2023 e 2025
+INICIO, FIM = date(2024, 1, 1), date(2025, 12, 1)
+
+
+def relatorio_varredura(despesas):
+    """Mesmo relatório percorrendo todas as despesas"""
+    de, ate = mes_de(INICIO), mes_de(FIM)
+    totais = defaultdict(lambda: defaultdict(int))
+    for despesa in despesas:
+        mes = despesa.vencimento.strftime("%Y-%m")
+        if despesa.status == StatusDespesa.PAGA and de <= mes <= ate:
+            totais[mes][despesa.categoria] += despesa.centavos
+    return totais
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'despesas':>10} {'residente':>11} {'sqlite':>9} {'varredura':>11}")
+    for quantidade in args.tamanhos:
+        registros = list(gerar_registros(quantidade))
+        despesas, _ = decodificar_despesas(registros)
+        with tempfile.TemporaryDirectory() as pasta:
+            residente = GerenciadorFinanceiro(pasta, armazenamento="json")
+            residente.despesas = despesas
+            sqlite = GerenciadorFinanceiro(pasta, armazenamento="sqlite")
+            sqlite.armazenamento.importar({'despesas': registros})
+
+            esperado = {mes: dict(categorias)
+                        for mes, categorias in relatorio_varredura(despesas).items()}
+            for gerenciador in (residente, sqlite):
+                obtido = {mes: {categoria: centavos for categoria, centavos in totais.items()
+                                if centavos}
+                          for mes, totais in gastos_por_mes_e_categoria(gerenciador, INICIO, FIM)}
+                assert obtido == esperado
+
+            tempos = [cronometrar(lambda: gastos_por_mes_e_categoria(gerenciador, INICIO, FIM),
+                                  args.repeticoes)
+                      for gerenciador in (residente, sqlite)]
+            varredura = cronometrar(lambda: relatorio_varredura(despesas), 1)
+            print(f"{quantidade:>10} {tempos[0] * 1000:>9.3f}ms {tempos[1] * 1000:>7.3f}ms "
+                  f"{varredura * 1000:>9.0f}ms")
+            sqlite.armazenamento.fechar()
+
+
+if __name__ == '__main__':
+    main()
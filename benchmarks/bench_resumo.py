@@ -0,0 +1,93 @@
+"""
+TRIMONEY - Benchmark do resumo com 1M de despesas
+
+Mede o tempo até o primeiro calcular_resumo (reconstrução dos índices e
+agregados em centavos + resumo) com e sem o caminho colunar do NumPy, e o
+resumo de referência por varredura com sum() de floats, como era feito
+antes. Mostra também a deriva da soma em float contra a soma em centavos.
+
+Uso: python -m benchmarks.bench_resumo [--tamanhos 1000000] [--repeticoes 3]
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime
+
+import indices
+from benchmarks.bench_memoria import gerar_registros
+from financeiro import (GerenciadorFinanceiro, StatusDespesa, decodificar_despesas,
+                        janelas_vencimento)
+
+
+def resumo_varredura(despesas, saldo: float):
+    """Resumo como era calculado antes: sum() de floats sobre todas as despesas"""
+    limite_vencidas, limite_proximas = janelas_vencimento(datetime.now())
+    total_gasto = sum(d.valor for d in despesas if d.status == StatusDespesa.PAGA)
+    total_pendente = sum(d.valor for d in despesas if d.status == StatusDespesa.PENDENTE)
+    vencidas = [d for d in despesas if d.status == StatusDespesa.PENDENTE
+                and d.vencimento.date() < limite_vencidas]
+    proximas = [d for d in despesas if d.status == StatusDespesa.PENDENTE
+                and limite_vencidas <= d.vencimento.date() < limite_proximas]
+    return {
+        'saldo_atual': saldo,
+        'total_gasto': total_gasto,
+        'total_pendente': total_pendente,
+        'saldo_final': saldo - total_pendente,
+        'total_vencidas': sum(d.valor for d in vencidas),
+        'total_proximas': sum(d.valor for d in proximas),
+        'num_vencidas': len(vencidas),
+        'num_proximas': len(proximas),
+    }
+
+
+def cronometrar(funcao, repeticoes: int) -> float:
+    """Melhor tempo (s) entre as repetições"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    numpy = indices.np
+    print(f"NumPy: {numpy.__version__ if numpy is not None else 'não instalado'}")
+    print(f"{'despesas':>10} {'caminho':>12} {'1º resumo':>12} {'resumo':>10}")
+    with tempfile.TemporaryDirectory() as pasta:
+        gerenciador = GerenciadorFinanceiro(pasta, armazenamento="json")
+        for quantidade in args.tamanhos:
+            despesas, _ = decodificar_despesas(gerar_registros(quantidade))
+
+            caminhos = {'python': None, 'numpy': numpy}
+            if numpy is None:
+                del caminhos['numpy']
+            for nome, modulo in caminhos.items():
+                indices.np = modulo
+
+                def primeiro_resumo():
+                    gerenciador.despesas = despesas  # reconstrói índices e agregados
+                    gerenciador.calcular_resumo()
+
+                primeiro = cronometrar(primeiro_resumo, args.repeticoes)
+                seguinte = cronometrar(gerenciador.calcular_resumo, args.repeticoes)
+                print(f"{quantidade:>10} {nome:>12} {primeiro * 1000:>10.0f}ms "
+                      f"{seguinte * 1000:>8.2f}ms")
+            indices.np = numpy
+
+            varredura = cronometrar(lambda: resumo_varredura(despesas, 0.0), args.repeticoes)
+            print(f"{quantidade:>10} {'varredura':>12} {'-':>12} {varredura * 1000:>8.0f}ms")
+
+            em_float = resumo_varredura(despesas, 0.0)['total_gasto']
+            exato = gerenciador.calcular_resumo()['total_gasto']
+            print(f"{'':>10} total gasto: float {em_float!r} / centavos {exato!r}")
+
+
+if __name__ == '__main__':
+    main()
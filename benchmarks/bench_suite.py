@@ -0,0 +1,220 @@
+"""
+TRIMONEY - Suíte de benchmarks com resultados em JSON
+
+Para cada tamanho, gera um trimoney_data.json sintético
+(benchmarks.sintetico) e mede, com a configuração do app (journal, sob
+demanda): carregar_dados (abertura a frio), salvar_dados depois de uma
+mutação, calcular_resumo, filtrar_despesas em cada filtro,
+TelaDespesas.atualizar_lista numa janela Kivy sem display (se o Kivy
+estiver instalado) e o pico de memória do Python na abertura.
+
+Os tempos são o melhor entre as repetições, em ms. Com --saida grava o
+JSON; com --base compara com um JSON anterior e termina com erro se
+alguma medida piorar mais que --tolerancia (e mais que um piso absoluto,
+para ruído em medidas muito curtas).
+
+Uso: python -m benchmarks.bench_suite [--tamanhos 10000 100000] [--saida atual.json]
+     [--base anterior.json] [--tolerancia 0.25] [--armazenamento journal] [--sem-kivy]
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks.bench_resumo import cronometrar
+from benchmarks.sintetico import ParametrosDataset, gravar_dataset
+from financeiro import GerenciadorFinanceiro
+
+FILTROS = ["todas", "pendentes", "pagas", "vencidas", "proximas"]
+
+# Diferenças abaixo destes pisos não contam como regressão
+PISO_MS = 0.5
+PISO_MB = 0.5
+
+
+def pico_memoria(funcao: Callable[[], Any]) -> float:
+    """Pico de memória do Python (MB) durante funcao()"""
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / 1e6
+
+
+class _MedidorLista:
+    """
+    TelaDespesas de verdade numa janela sem display, com as respostas da
+    thread de dados entregues na thread principal, como o Clock faria.
+    """
+
+    def __init__(self, gerenciador: GerenciadorFinanceiro):
+        from kivy.app import App
+        from kivy.base import EventLoop
+        from kivy.clock import Clock
+        from kivy.lang import Builder
+
+        import main
+        from assincrono import GerenciadorAssincrono
+
+        EventLoop.ensure_window()
+        self._clock, self._loop = Clock, EventLoop
+        self._respostas = queue.Queue()
+        self.dados = GerenciadorAssincrono(gerenciador, entregar=self._respostas.put)
+
+        app = main.TrimoneyApp()
+        app.gerenciador, app.dados = gerenciador, self.dados
+        App._running_app = app  # TelaBase lê o gerenciador do app em execução
+        Builder.load_file('trimoney.kv')
+        app.root = main.GerenciadorTelas()
+        self.tela = app.root.get_screen('despesas')
+        self._esperar()
+
+    def _esperar(self) -> None:
+        """Entrega as respostas pendentes e processa um quadro"""
+        self.dados.aguardar()
+        while not self._respostas.empty():
+            self._respostas.get()()
+        self._clock.tick()
+        self._loop.idle()
+
+    def atualizar(self) -> None:
+        self.tela.atualizar_lista()
+        self._esperar()
+
+    def encerrar(self) -> None:
+        self.dados.encerrar()
+
+
+def medir_tamanho(quantidade: int, args) -> Dict[str, float]:
+    medidas: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        parametros = ParametrosDataset(quantidade=quantidade, semente=args.semente)
+        arquivo = gravar_dataset(Path(pasta), parametros)
+        medidas['arquivo_mb'] = arquivo.stat().st_size / 1e6
+
+        def abrir() -> GerenciadorFinanceiro:
+            return GerenciadorFinanceiro(pasta, armazenamento=args.armazenamento,
+                                         sob_demanda=not args.sem_sob_demanda)
+
+        # Primeira abertura fora da medição: migração para o SQLite e, no modo
+        # sob demanda, o arquivamento dos meses fechados ficam de fora
+        gerenciador = abrir()
+        gerenciador.salvar_dados()
+        gerenciador.armazenamento.fechar()
+
+        def carregar():
+            abrir().armazenamento.fechar()
+
+        medidas['carregar_dados_ms'] = cronometrar(carregar, args.repeticoes) * 1000
+        medidas['pico_carga_mb'] = pico_memoria(carregar)
+
+        gerenciador = abrir()
+
+        def salvar():
+            gerenciador.adicionar_saldo(1)
+            gerenciador.salvar_dados()
+
+        medidas['salvar_dados_ms'] = cronometrar(salvar, args.repeticoes) * 1000
+        medidas['calcular_resumo_ms'] = cronometrar(gerenciador.calcular_resumo,
+                                                    args.repeticoes) * 1000
+        for filtro in FILTROS:
+            medidas[f'filtrar_despesas.{filtro}_ms'] = cronometrar(
+                lambda: gerenciador.filtrar_despesas(filtro), args.repeticoes) * 1000
+
+        if not args.sem_kivy:
+            try:
+                medidor = _MedidorLista(gerenciador)
+            except ImportError as e:
+                print(f"  (sem Kivy, atualizar_lista não medido: {e})")
+            else:
+                medidas['atualizar_lista_ms'] = cronometrar(medidor.atualizar,
+                                                            args.repeticoes) * 1000
+                medidor.encerrar()
+        gerenciador.armazenamento.fechar()
+    return medidas
+
+
+def comparar(atual: Dict[str, Any], base: Dict[str, Any], tolerancia: float) -> List[str]:
+    """Regressões de `atual` em relação a `base` (medidas presentes nos dois)"""
+    regressoes = []
+    for tamanho, medidas in atual['resultados'].items():
+        anteriores = base.get('resultados', {}).get(tamanho, {})
+        for nome, valor in medidas.items():
+            anterior = anteriores.get(nome)
+            if anterior is None or nome == 'arquivo_mb':
+                continue
+            piso = PISO_MB if nome.endswith('_mb') else PISO_MS
+            if valor > anterior * (1 + tolerancia) and valor - anterior > piso:
+                regressoes.append(f"{tamanho} {nome}: {anterior:.2f} -> {valor:.2f} "
+                                  f"(+{(valor / anterior - 1) * 100:.0f}%)")
+    return regressoes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--armazenamento", default="journal",
+                        choices=["json", "journal", "sqlite"])
+    parser.add_argument("--sem-sob-demanda", action="store_true")
+    parser.add_argument("--sem-kivy", action="store_true")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", type=Path)
+    parser.add_argument("--base", type=Path, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="piora relativa aceita antes de acusar regressão")
+    args = parser.parse_args()
+
+    if not args.sem_kivy:
+        os.environ.setdefault("KIVY_NO_ARGS", "1")
+        os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    resultado: Dict[str, Any] = {
+        'versao': 1,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'parametros': {'armazenamento': args.armazenamento,
+                       'sob_demanda': not args.sem_sob_demanda,
+                       'repeticoes': args.repeticoes, 'semente': args.semente},
+        'resultados': {},
+    }
+    for quantidade in args.tamanhos:
+        inicio = time.perf_counter()
+        medidas = medir_tamanho(quantidade, args)
+        resultado['resultados'][str(quantidade)] = medidas
+        print(f"{quantidade} despesas ({time.perf_counter() - inicio:.0f}s):")
+        for nome, valor in medidas.items():
+            print(f"  {nome:<32} {valor:>10.2f}")
+
+    if args.saida:
+        args.saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False),
+                              encoding='utf-8')
+
+    if args.base:
+        base = json.loads(args.base.read_text(encoding='utf-8'))
+        if base.get('parametros') != resultado['parametros']:
+            print(f"Aviso: parâmetros diferentes da base: {base.get('parametros')}")
+        regressoes = comparar(resultado, base, args.tolerancia)
+        if regressoes:
+            print("REGRESSÕES:")
+            for regressao in regressoes:
+                print(f"  {regressao}")
+            sys.exit(1)
+        print(f"Sem regressões em relação a {args.base}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+TRIMONEY - Gerador de dados sintéticos para os benchmarks
+
+Gera um trimoney_data.json (no formato atual, via ArmazenamentoJSON) com
+despesas parecidas com as reais: contas fixas mensais com valores
+estáveis e gastos variáveis espalhados pelo período, quase todas as
+passadas pagas e as futuras pendentes. Tudo é determinístico pela
+semente.
+
+Uso: python -m benchmarks.sintetico PASTA [--quantidade 100000] [--pagas 0.9]
+     [--meses-passados 36] [--meses-futuros 2] [--fixas 0.3] [--semente 42]
+"""
+
+import argparse
+import random
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from armazenamento import ArmazenamentoJSON
+
+# Nome -> (menor, maior valor) em reais
+FIXAS = {
+    "Aluguel": (900, 2500), "Condomínio": (300, 900), "Luz": (80, 400),
+    "Água": (40, 180), "Internet": (80, 150), "Celular": (40, 120),
+    "Escola": (500, 1800), "Academia": (80, 200), "Plano de saúde": (250, 900),
+}
+VARIAVEIS = {
+    "Supermercado": (50, 800), "Farmácia": (15, 300), "Combustível": (80, 350),
+    "Padaria": (8, 60), "Restaurante": (30, 250), "Delivery": (25, 120),
+    "Uber": (12, 70), "Presente": (40, 400), "Roupas": (60, 600), "Cinema": (30, 120),
+}
+
+
+@dataclass
+class ParametrosDataset:
+    quantidade: int = 100_000
+    fracao_pagas: float = 0.9  # das despesas já vencidas (as futuras ficam pendentes)
+    meses_passados: int = 36  # espalhamento dos vencimentos até hoje...
+    meses_futuros: int = 2  # ... e depois de hoje
+    fracao_fixas: float = 0.3
+    semente: int = 42
+    saldo: float = 5000.0
+
+
+def gerar_despesas(parametros: ParametrosDataset,
+                   hoje: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+    """Registros no formato do arquivo JSON, com ids 1..quantidade por data de cadastro"""
+    aleatorio = random.Random(parametros.semente)
+    hoje = hoje or date.today()
+    inicio = hoje - timedelta(days=round(parametros.meses_passados * 30.44))
+    dias = (hoje - inicio).days + round(parametros.meses_futuros * 30.44)
+
+    # Valor de cada conta fixa, com pequena variação mês a mês
+    base_fixas = {nome: aleatorio.uniform(*faixa) for nome, faixa in FIXAS.items()}
+    nomes_fixas = list(FIXAS)
+    nomes_variaveis = list(VARIAVEIS)
+
+    vencimentos = sorted(inicio + timedelta(days=aleatorio.randrange(dias))
+                         for _ in range(parametros.quantidade))
+    for id_despesa, vencimento in enumerate(vencimentos, start=1):
+        if aleatorio.random() < parametros.fracao_fixas:
+            nome = aleatorio.choice(nomes_fixas)
+            valor = base_fixas[nome] * aleatorio.uniform(0.95, 1.05)
+            categoria = "Fixa"
+        else:
+            nome = aleatorio.choice(nomes_variaveis)
+            valor = aleatorio.uniform(*VARIAVEIS[nome])
+            categoria = "Variável"
+        paga = vencimento <= hoje and aleatorio.random() < parametros.fracao_pagas
+        yield {
+            'id': id_despesa,
+            'nome': nome,
+            'valor': round(valor, 2),
+            'vencimento': vencimento.strftime("%Y-%m-%d"),
+            'categoria': categoria,
+            'status': "Paga" if paga else "Pendente",
+        }
+
+
+def gravar_dataset(pasta: Path, parametros: ParametrosDataset,
+                   hoje: Optional[date] = None) -> Path:
+    """Grava o trimoney_data.json em `pasta` (criada se preciso) e devolve o caminho"""
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    despesas = list(gerar_despesas(parametros, hoje))
+    estado = {
+        'saldo': parametros.saldo,
+        'data_saldo': (hoje or date.today()).strftime("%Y-%m-%d"),
+        'despesas': despesas,
+        'proximo_id': len(despesas) + 1,
+        'recorrencias': [],
+    }
+    armazenamento = ArmazenamentoJSON(pasta / "trimoney_data.json")
+    armazenamento.compactar(lambda: estado)
+    return armazenamento.data_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pasta", type=Path)
+    padrao = ParametrosDataset()
+    parser.add_argument("--quantidade", type=int, default=padrao.quantidade)
+    parser.add_argument("--pagas", type=float, default=padrao.fracao_pagas)
+    parser.add_argument("--meses-passados", type=int, default=padrao.meses_passados)
+    parser.add_argument("--meses-futuros", type=int, default=padrao.meses_futuros)
+    parser.add_argument("--fixas", type=float, default=padrao.fracao_fixas)
+    parser.add_argument("--semente", type=int, default=padrao.semente)
+    args = parser.parse_args()
+
+    parametros = ParametrosDataset(args.quantidade, args.pagas, args.meses_passados,
+                                   args.meses_futuros, args.fixas, args.semente)
+    caminho = gravar_dataset(args.pasta, parametros)
+    print(f"{caminho}: {caminho.stat().st_size / 1e6:.1f}MB, {asdict(parametros)}")
+
+
+if __name__ == '__main__':
+    main()
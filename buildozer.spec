@@ -5,6 +5,7 @@ package.domain = org.tribufum
 
 source.dir = .
 source.include_exts = py,kv,png,jpg,ttf
+source.exclude_dirs = benchmarks, tests
 
 version = 0.1
 
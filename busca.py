@@ -0,0 +1,135 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Índice de busca por nome (termos com prefixo, sem acentos nem maiúsculas)
+"""
+
+import heapq
+import re
+import sys
+import unicodedata
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Set, Tuple
+
+_PALAVRA = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=8192)
+def normalizar(texto: str) -> str:
+    """'Água Luz' -> 'agua luz': sem acentos, minúsculas (nomes se repetem muito: cache)"""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acento = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return sys.intern(sem_acento.casefold().strip())
+
+
+def termos(texto: str) -> List[str]:
+    return _PALAVRA.findall(normalizar(texto))
+
+
+@dataclass
+class ResultadoBusca:
+    """Uma página de resultados, na ordem de relevância"""
+    despesas: List[Any] = field(default_factory=list)
+    total: int = 0  # resultados em todas as páginas
+    pagina: int = 0
+    por_pagina: int = 50
+
+    @property
+    def tem_mais(self) -> bool:
+        return (self.pagina + 1) * self.por_pagina < self.total
+
+
+class IndiceBusca:
+    """
+    Índice invertido termo -> ids, com os termos também numa lista ordenada
+    para que cada palavra da consulta case por prefixo via bisseção
+    ("mer" acha "Mercado"). Atualizado a cada despesa incluída ou excluída.
+    """
+
+    def __init__(self):
+        self._termos: List[str] = []  # ordenados
+        self._ids_por_termo: Dict[str, Set[int]] = {}
+        # id -> (nome normalizado, dia ordinal do vencimento), para o ranking
+        self._documentos: Dict[int, Tuple[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._documentos)
+
+    def dia(self, id_despesa: int) -> int:
+        """Dia ordinal do vencimento de uma despesa indexada"""
+        return self._documentos[id_despesa][1]
+
+    def adicionar(self, id_despesa: int, nome: str, dia: int) -> None:
+        if id_despesa in self._documentos:
+            self.remover(id_despesa)
+        self._documentos[id_despesa] = (normalizar(nome), dia)
+        for termo in set(_PALAVRA.findall(normalizar(nome))):
+            ids = self._ids_por_termo.get(termo)
+            if ids is None:
+                ids = self._ids_por_termo[termo] = set()
+                insort(self._termos, termo)
+            ids.add(id_despesa)
+
+    def remover(self, id_despesa: int) -> None:
+        documento = self._documentos.pop(id_despesa, None)
+        if documento is None:
+            return
+        for termo in set(_PALAVRA.findall(documento[0])):
+            ids = self._ids_por_termo.get(termo)
+            if ids is None:
+                continue
+            ids.discard(id_despesa)
+            if not ids:
+                del self._ids_por_termo[termo]
+                del self._termos[bisect_left(self._termos, termo)]
+
+    def _com_prefixo(self, prefixo: str) -> Set[int]:
+        encontrados: Set[int] = set()
+        posicao = bisect_left(self._termos, prefixo)
+        while posicao < len(self._termos) and self._termos[posicao].startswith(prefixo):
+            encontrados |= self._ids_por_termo[self._termos[posicao]]
+            posicao += 1
+        return encontrados
+
+    def buscar(self, consulta: str, inicio: int = 0,
+               quantidade: int = 50) -> Tuple[List[int], int]:
+        """
+        Ids das despesas cujo nome tem todas as palavras da consulta (cada
+        uma como prefixo de um termo), do mais relevante ao menos: nome
+        igual à consulta, nome começando por ela, palavras completas e
+        então o resto; empates pelo vencimento mais recente. Retorna os ids
+        de [inicio, inicio + quantidade) e o total de resultados.
+        """
+        palavras = termos(consulta)
+        if not palavras:
+            return [], 0
+        # Palavra mais longa primeiro: menos candidatos para as interseções
+        palavras.sort(key=len, reverse=True)
+        candidatos = self._com_prefixo(palavras[0])
+        for palavra in palavras[1:]:
+            if not candidatos:
+                break
+            candidatos &= self._com_prefixo(palavra)
+
+        texto = " ".join(_PALAVRA.findall(normalizar(consulta)))
+        # Nomes em que todas as palavras da consulta aparecem inteiras
+        completas = set(candidatos)
+        for palavra in palavras:
+            completas &= self._ids_por_termo.get(palavra, set())
+        documentos = self._documentos
+
+        def relevancia(id_despesa: int) -> Tuple[int, int, int]:
+            nome, dia = documentos[id_despesa]
+            if nome == texto:
+                classe = 0
+            elif nome.startswith(texto):
+                classe = 1
+            elif id_despesa in completas:
+                classe = 2
+            else:
+                classe = 3
+            return classe, -dia, -id_despesa
+
+        melhores = heapq.nsmallest(inicio + quantidade, candidatos, key=relevancia)
+        return melhores[inicio:], len(candidatos)
@@ -0,0 +1,109 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Exportação (CSV, JSON Lines) e backup compactado, gravados em fluxo
+"""
+
+import csv
+import gzip
+import json
+import zlib
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, TextIO, Tuple
+
+from armazenamento import ler_json
+from indices import para_centavos
+
+CAMPOS = ('id', 'nome', 'valor', 'vencimento', 'categoria', 'status')
+
+FORMATO_BACKUP = "trimoney-backup"
+VERSAO_BACKUP = 1
+
+
+def valor_csv(centavos: int) -> str:
+    """Valor no formato usado por planilhas em português: 1234,56"""
+    reais, resto = divmod(abs(centavos), 100)
+    return f"{'-' if centavos < 0 else ''}{reais},{resto:02d}"
+
+
+def escrever_csv(registros: Iterable[Dict[str, Any]], arquivo: TextIO,
+                 separador: str = ";") -> int:
+    """
+    Grava os registros (formato Despesa.to_dict) em CSV, um por vez, com
+    cabeçalho. O arquivo deve ser aberto com newline="". Retorna quantos
+    registros foram gravados.
+    """
+    escritor = csv.writer(arquivo, delimiter=separador)
+    escritor.writerow(CAMPOS)
+    quantidade = 0
+    for registro in registros:
+        escritor.writerow((registro['id'], registro['nome'],
+                           valor_csv(para_centavos(registro['valor'])), registro['vencimento'],
+                           registro['categoria'], registro['status']))
+        quantidade += 1
+    return quantidade
+
+
+def _linha_json(registro: Dict[str, Any]) -> str:
+    return json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def escrever_jsonl(registros: Iterable[Dict[str, Any]], arquivo: TextIO) -> int:
+    """Grava um registro JSON por linha; retorna quantos foram gravados"""
+    quantidade = 0
+    for registro in registros:
+        arquivo.write(_linha_json(registro))
+        quantidade += 1
+    return quantidade
+
+
+def escrever_backup(cabecalho: Dict[str, Any], registros: Iterable[Dict[str, Any]],
+                    arquivo: BinaryIO) -> int:
+    """
+    Backup: JSON Lines compactado com gzip. A primeira linha é o cabeçalho
+    (saldo, próximo id, recorrências), depois uma linha por despesa e, por
+    último, {"fim": <quantidade>}, que permite detectar arquivos truncados.
+    """
+    with gzip.GzipFile(fileobj=arquivo, mode='wb', compresslevel=6) as compactado:
+        compactado.write(_linha_json(
+            dict(cabecalho, formato=FORMATO_BACKUP, versao=VERSAO_BACKUP)).encode('utf-8'))
+        quantidade = 0
+        for registro in registros:
+            compactado.write(_linha_json(registro).encode('utf-8'))
+            quantidade += 1
+        compactado.write(_linha_json({'fim': quantidade}).encode('utf-8'))
+    return quantidade
+
+
+def ler_backup(arquivo: BinaryIO) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """
+    Retorna o cabeçalho do backup e um gerador dos registros de despesa, lidos
+    um a um. O gerador levanta ValueError se o arquivo terminar antes da
+    linha final ou se a quantidade de registros não conferir.
+    """
+    compactado = gzip.GzipFile(fileobj=arquivo, mode='rb')
+    try:
+        cabecalho = ler_json(compactado.readline())
+    except (OSError, EOFError, zlib.error, ValueError) as e:
+        raise ValueError(f"Backup inválido: {e}") from e
+    if not isinstance(cabecalho, dict) or cabecalho.get('formato') != FORMATO_BACKUP:
+        raise ValueError("Arquivo não é um backup do TRIMONEY")
+    if cabecalho.get('versao', 0) > VERSAO_BACKUP:
+        raise ValueError(f"Versão de backup não suportada: {cabecalho['versao']}")
+
+    def registros() -> Iterator[Dict[str, Any]]:
+        quantidade = 0
+        try:
+            for linha in compactado:
+                registro = ler_json(linha)
+                if 'fim' in registro:
+                    if registro['fim'] != quantidade:
+                        raise ValueError(f"Backup com {quantidade} despesas, "
+                                         f"esperadas {registro['fim']}")
+                    compactado.read()  # chega ao fim do gzip, que confere o CRC
+                    return
+                quantidade += 1
+                yield registro
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f"Backup corrompido: {e}") from e
+        raise ValueError("Backup incompleto (arquivo truncado)")
+
+    return cabecalho, registros()
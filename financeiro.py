@@ -3,14 +3,27 @@ TRIMONEY - Gerenciador Financeiro Pessoal
 Módulo de lógica de negócio (mobile version)
 """
 
-import json
+import heapq
+from bisect import bisect_right
 import os
 import sys
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, date
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, BinaryIO, Iterator, Optional, Set, TextIO, Tuple, Union
+from dataclasses import dataclass
 from enum import Enum
+from itertools import islice, repeat
+
+from armazenamento import Armazenamento, GravacaoAdiada, Operacao, criar_armazenamento
+from busca import IndiceBusca, ResultadoBusca
+from exportacao import escrever_backup, escrever_csv, escrever_jsonl, ler_backup
+from indices import FluxoPorDia, IndiceDespesas, TotaisMensais, para_centavos, para_reais
+from instrumentacao import contar, instrumentado
+from moeda import formatar_moeda, formatar_moedas
+from recorrencia import (Frequencia, RegraRecorrencia, decodificar_id_ocorrencia,
+                         id_ocorrencia)
 
 class StatusDespesa(str, Enum):
     PENDENTE = "Pendente"
@@ -20,21 +33,71 @@ class CategoriaDespesa(str, Enum):
     FIXA = "Fixa"
     VARIAVEL = "Variável"
 
-@dataclass
+# Datas se repetem muito no histórico (contas mensais, mesmo dia de
+# vencimento): como datetime é imutável, todas as despesas com a mesma data
+# compartilham uma única instância.
+_datas_internas: Dict[str, datetime] = {}
+
+def _data_interna(texto: str) -> datetime:
+    """Converte 'YYYY-MM-DD' em datetime, reaproveitando instâncias já criadas"""
+    data = _datas_internas.get(texto)
+    if data is None:
+        # Formato fixo: fatiar é bem mais rápido que strptime
+        if len(texto) == 10 and texto[4] == '-' and texto[7] == '-':
+            data = datetime(int(texto[:4]), int(texto[5:7]), int(texto[8:]))
+        else:
+            data = datetime.strptime(texto, "%Y-%m-%d")
+        _datas_internas[texto] = data
+    return data
+
+@dataclass(init=False)
 class Despesa:
+    # Sem __dict__ por instância: cerca de metade da memória por despesa
+    __slots__ = ('id', 'nome', 'centavos', 'vencimento', 'categoria', 'status')
+    
     id: int
     nome: str
-    valor: float
+    centavos: int  # valor exato em centavos; `valor` é a visão em reais
     vencimento: datetime
     categoria: CategoriaDespesa
     status: StatusDespesa
     
+    def __init__(self, id: int, nome: str, centavos: Optional[int] = None,
+                 vencimento: Optional[datetime] = None,
+                 categoria: Optional[CategoriaDespesa] = None,
+                 status: Optional[StatusDespesa] = None, *, valor: Optional[float] = None):
+        """Recebe o valor em centavos ou, como antes, em reais (valor=...)"""
+        if valor is not None:
+            if centavos is not None:
+                raise TypeError("Despesa recebe centavos ou valor, não os dois")
+            centavos = para_centavos(valor)
+        elif not isinstance(centavos, int):
+            # Antes o terceiro argumento era o valor em reais: um float aqui
+            # seria guardado como centavos, 100x menor
+            raise TypeError(f"centavos deve ser int (use valor= para reais), não {centavos!r}")
+        if vencimento is None or categoria is None or status is None:
+            raise TypeError("Despesa precisa de vencimento, categoria e status")
+        self.id = id
+        self.nome = nome
+        self.centavos = centavos
+        self.vencimento = vencimento
+        self.categoria = categoria
+        self.status = status
+    
+    @property
+    def valor(self) -> float:
+        return para_reais(self.centavos)
+    
+    @valor.setter
+    def valor(self, valor: float) -> None:
+        self.centavos = para_centavos(valor)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Converte para dicionário para serialização"""
         return {
             'id': self.id,
             'nome': self.nome,
-            'valor': self.valor,
+            'valor': para_reais(self.centavos),
             'vencimento': self.vencimento.strftime("%Y-%m-%d"),
             'categoria': self.categoria.value,
             'status': self.status.value
@@ -45,194 +108,1036 @@ class Despesa:
         """Cria Despesa a partir de dicionário"""
         return cls(
             id=data['id'],
-            nome=data['nome'],
-            valor=data['valor'],
-            vencimento=datetime.strptime(data['vencimento'], "%Y-%m-%d"),
-            categoria=CategoriaDespesa(data['categoria']),
-            status=StatusDespesa(data['status'])
+            nome=sys.intern(data['nome']),
+            centavos=para_centavos(data['valor']),
+            vencimento=_data_interna(data['vencimento']),
+            categoria=_CATEGORIAS[data['categoria']],
+            status=_STATUS[data['status']]
         )
 
+# Busca direta por valor, evitando o custo de construir o Enum a cada registro
+_CATEGORIAS = {categoria.value: categoria for categoria in CategoriaDespesa}
+_STATUS = {status.value: status for status in StatusDespesa}
+
+def decodificar_despesas(registros: List[Dict[str, Any]]) -> Tuple[List[Despesa], int]:
+    """
+    Converte em lote os registros do arquivo de dados em Despesas.
+    
+    Retorna as despesas e o maior id encontrado, calculado na mesma passada.
+    """
+    despesas = []
+    adicionar = despesas.append
+    maior_id = 0
+    datas = _datas_internas
+    intern = sys.intern
+    
+    for registro in registros:
+        id_despesa = registro['id']
+        if id_despesa > maior_id:
+            maior_id = id_despesa
+        vencimento = registro['vencimento']
+        data = datas.get(vencimento)
+        if data is None:
+            data = _data_interna(vencimento)
+        adicionar(Despesa(
+            id_despesa,
+            intern(registro['nome']),
+            round(registro['valor'] * 100),
+            data,
+            _CATEGORIAS[registro['categoria']],
+            _STATUS[registro['status']]
+        ))
+    
+    return despesas, maior_id
+
+def janelas_vencimento(hoje: datetime) -> Tuple[date, date]:
+    """
+    Limites (exclusivos) das janelas de vencidas e próximas para datas sem horário:
+    vencida se vencimento < limite_vencidas; próxima se
+    limite_vencidas <= vencimento < limite_proximas (até 3 dias à frente).
+    """
+    limite_vencidas = hoje.date()
+    if hoje > datetime.combine(limite_vencidas, datetime.min.time()):
+        limite_vencidas += timedelta(days=1)
+    limite_proximas = hoje.date() + timedelta(days=4)
+    return limite_vencidas, limite_proximas
+
+def diretorio_dados_padrao() -> Path:
+    """Diretório de dados do app: o armazenamento do Android ou ~/trimoney"""
+    if sys.platform == 'linux' and 'ANDROID_ARGUMENT' in os.environ:
+        from android.storage import app_storage_path
+        return Path(app_storage_path())
+    return Path.home() / "trimoney"
+
 class GerenciadorFinanceiro:
-    def __init__(self, data_dir: Optional[str] = None):
-        """Inicializa o gerenciador financeiro"""
-        if data_dir:
-            self.data_dir = Path(data_dir)
-        else:
-            # Para Android, usar diretório de documentos
-            if sys.platform == 'linux' and 'ANDROID_ARGUMENT' in os.environ:
-                from android.storage import app_storage_path
-                self.data_dir = Path(app_storage_path())
-            else:
-                self.data_dir = Path.home() / "trimoney"
+    def __init__(self, data_dir: Optional[str] = None,
+                 armazenamento: Union[str, Armazenamento] = "journal",
+                 sob_demanda: bool = False, dias_residentes: int = 60,
+                 gravacao_adiada: Optional[float] = None,
+                 horizonte_recorrencia: int = 31):
+        """
+        Inicializa o gerenciador financeiro.
+        
+        Com sob_demanda=True só ficam em memória as despesas pendentes e as
+        pagas dos meses em aberto (o atual e os que terminaram há menos de
+        dias_residentes dias); as pagas dos meses fechados vão para o
+        histórico do armazenamento (na compactação), particionado por mês, e
+        são lidas um mês por página em carregar_pagina_historico.
+        
+        Com gravacao_adiada=<segundos> (só backends residentes) as mutações
+        são gravadas em segundo plano, agrupadas, depois desse intervalo sem
+        novas mutações; descarregar() e salvar_dados() gravam na hora.
+        
+        Ocorrências de despesas recorrentes entram nos filtros e no resumo
+        até horizonte_recorrencia dias à frente, sem serem gravadas.
+        """
+        self.data_dir = Path(data_dir) if data_dir else diretorio_dados_padrao()
         
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.data_file = self.data_dir / "trimoney_data.json"
         
-        self.saldo: float = 0.0
+        # Protege o estado em memória da thread de gravação adiada
+        self._trava = threading.RLock()
+        self._nivel_transacao = 0
+        
+        if isinstance(armazenamento, str):
+            armazenamento = criar_armazenamento(armazenamento, self.data_dir)
+        if gravacao_adiada is not None and armazenamento.residente:
+            armazenamento = GravacaoAdiada(armazenamento, gravacao_adiada, self._trava)
+        self.armazenamento = armazenamento
+        self._residente = armazenamento.residente
+        self.sob_demanda = sob_demanda and self._residente
+        self.dias_residentes = dias_residentes
+        self.horizonte_recorrencia = horizonte_recorrencia
+        
+        self.saldo_centavos: int = 0
         self.data_saldo: Optional[str] = None
-        self.despesas: List[Despesa] = []
         self.proximo_id: int = 1
         
+        # Índices por id/status/vencimento e totais, mantidos a cada mutação
+        self._indice = IndiceDespesas(StatusDespesa.PENDENTE)
+        
+        # Histórico arquivado (modo sob demanda): só os totais de cada mês
+        # ('AAAA-MM') e os ids excluídos ficam em memória, além das páginas lidas
+        self._historico_mensal = TotaisMensais()
+        self._historico_excluidas: Set[int] = set()
+        self._historico_carregado: Dict[int, Despesa] = {}
+        
+        # Regras de recorrência (poucas, sempre em memória). Ids de regra
+        # nunca são reusados: estão nos ids das ocorrências que a interface guarda
+        self._recorrencias: Dict[int, RegraRecorrencia] = {}
+        self.proximo_id_regra: int = 1
+        
+        # Índice de busca por nome, montado na primeira busca (ver buscar_despesas)
+        self._busca: Optional[IndiceBusca] = None
+        
+        # Projeção do saldo (ver saldo_projetado): pendentes por dia nos
+        # backends não residentes (nos residentes fica no índice) e as
+        # ocorrências recorrentes acumuladas, (último dia, dias, acumulado)
+        self._fluxo: Optional[FluxoPorDia] = None
+        self._linha_ocorrencias: Optional[Tuple[int, List[int], List[int]]] = None
+        
+        # Versão de cada despesa alterada, para caches de apresentação
+        # (ver versao_despesa); o contador nunca volta atrás
+        self._contador_versao = 0
+        self._versao_base = 0
+        self._versoes: Dict[int, int] = {}
+        
+        if not self._residente:
+            self._migrar_json_legado()
+        
         self.carregar_dados()
     
+    def _migrar_json_legado(self) -> None:
+        """Importa uma única vez o trimoney_data.json (e seu journal) para o banco"""
+        journal_legado = self.data_file.with_suffix('.journal')
+        if not (self.data_file.exists() or journal_legado.exists()):
+            return
+        if not self.armazenamento.vazio():
+            return
+        
+        # Sem sob_demanda o legado traz também o histórico arquivado
+        legado = GerenciadorFinanceiro(self.data_dir, armazenamento="journal")
+        self.armazenamento.importar(legado._estado())
+        
+        # Mantém os arquivos antigos como backup, fora do caminho de carga
+        legado.armazenamento.fechar()
+        for arquivo in (self.data_file, journal_legado, legado.armazenamento.historico_dir):
+            if arquivo.exists():
+                arquivo.rename(arquivo.with_name(arquivo.name + '.migrado'))
+    
+    @instrumentado("carregar_dados")
     def carregar_dados(self) -> None:
-        """Carrega dados do arquivo JSON"""
+        """Carrega o snapshot e reaplica as operações registradas depois dele"""
         try:
-            if self.data_file.exists():
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    dados = json.load(f)
-                
+            dados, operacoes = self.armazenamento.carregar()
+            
+            despesas = []
+            self.proximo_id = 1
+            self._nova_versao_base()
+            self._historico_mensal.limpar()
+            self._historico_excluidas = set()
+            self._historico_carregado = {}
+            self._recorrencias = {}
+            self.proximo_id_regra = 1
+            self._busca = None
+            self._fluxo = None
+            self._linha_ocorrencias = None
+            if dados is not None:
                 self.saldo = dados.get('saldo', 0.0)
                 self.data_saldo = dados.get('data_saldo')
+                self._recorrencias = {
+                    regra['id']: RegraRecorrencia.from_dict(regra)
+                    for regra in dados.get('recorrencias', [])
+                }
+                self.proximo_id_regra = max(max(self._recorrencias, default=0) + 1,
+                                            dados.get('proximo_id_regra', 1))
                 
-                # Carregar despesas
-                self.despesas = []
-                for despesa_data in dados.get('despesas', []):
-                    self.despesas.append(Despesa.from_dict(despesa_data))
+                # Carregar despesas e encontrar próximo ID na mesma passada
+                despesas, maior_id = decodificar_despesas(dados.get('despesas', []))
+                self.proximo_id = max(maior_id + 1, dados.get('proximo_id', 1))
                 
-                # Encontrar próximo ID
-                if self.despesas:
-                    self.proximo_id = max(d['id'] for d in dados['despesas']) + 1
+                if 'historico' in dados:
+                    self._historico_excluidas = set(dados['historico'].get('excluidas', []))
+                    if self.sob_demanda:
+                        self._historico_mensal.restaurar(dados['historico']['totais'])
+                    else:
+                        # Histórico volta para a memória e, na próxima
+                        # compactação, para o snapshot
+                        arquivadas, _ = decodificar_despesas(self._registros_historico())
+                        despesas = sorted(despesas + arquivadas, key=lambda d: d.id)
+                        self._historico_excluidas = set()
+            
+            self._indice.reconstruir(despesas)
+            for operacao in operacoes:
+                self._aplicar_operacao(operacao)
+            contar("registros_carregados", len(despesas))
+            contar("operacoes_reaplicadas", len(operacoes))
                     
         except Exception as e:
             print(f"Erro ao carregar dados: {e}")
-            self.despesas = []
+            self._indice.reconstruir([])
+            self._historico_mensal.limpar()
+            self._recorrencias = {}
+            self.proximo_id_regra = 1
             self.saldo = 0.0
             self.proximo_id = 1
     
+    @property
+    def saldo(self) -> float:
+        """Saldo em reais (o valor exato fica em saldo_centavos)"""
+        return para_reais(self.saldo_centavos)
+    
+    @saldo.setter
+    def saldo(self, saldo: float) -> None:
+        self.saldo_centavos = para_centavos(saldo)
+    
+    def _nova_versao_base(self) -> None:
+        """Recarga: todas as despesas passam a uma versão nova"""
+        self._contador_versao += 1
+        self._versao_base = self._contador_versao
+        self._versoes = {}
+    
+    def _nova_versao(self, id_despesa: int) -> None:
+        self._contador_versao += 1
+        self._versoes[id_despesa] = self._contador_versao
+    
+    def versao_despesa(self, id_despesa: int) -> int:
+        """
+        Número que muda sempre que a despesa é criada, alterada, excluída ou
+        recarregada; (id, versão) serve de chave para caches da interface.
+        """
+        return self._versoes.get(id_despesa, self._versao_base)
+    
+    def _registros_historico(self) -> Iterator[Dict[str, Any]]:
+        """Registros arquivados, sem os excluídos depois do arquivamento"""
+        for registro in self.armazenamento.iterar_historico():
+            if registro['id'] not in self._historico_excluidas:
+                yield registro
+    
+    def iterar_despesas(self, status: Optional[StatusDespesa] = None,
+                        vencimento_de: Optional[date] = None,
+                        vencimento_ate: Optional[date] = None) -> Iterator[Despesa]:
+        """
+        Todas as despesas, inclusive o histórico não residente, uma a uma;
+        opcionalmente só as de um status e com vencimento em
+        [vencimento_de, vencimento_ate).
+        """
+        if not self._residente:
+            for registro in self.armazenamento.iterar(
+                    status.value if status else None,
+                    vencimento_de.strftime("%Y-%m-%d") if vencimento_de else None,
+                    vencimento_ate.strftime("%Y-%m-%d") if vencimento_ate else None):
+                yield Despesa.from_dict(registro)
+            return
+        
+        de_dia = vencimento_de.toordinal() if vencimento_de else None
+        ate_dia = vencimento_ate.toordinal() if vencimento_ate else None
+        
+        def aceita(despesa: Despesa) -> bool:
+            if status is not None and despesa.status != status:
+                return False
+            dia = despesa.vencimento.toordinal()
+            return ((de_dia is None or dia >= de_dia)
+                    and (ate_dia is None or dia < ate_dia))
+        
+        with self._trava:
+            despesas = self._indice.todas()
+        if status is not None or de_dia is not None or ate_dia is not None:
+            despesas = filter(aceita, despesas)
+        yield from despesas
+        if self.sob_demanda and status != StatusDespesa.PENDENTE:
+            # O histórico só tem pagas
+            for registro in self._registros_historico():
+                despesa = Despesa.from_dict(registro)
+                if aceita(despesa):
+                    yield despesa
+    
+    @property
+    def paginas_historico(self) -> int:
+        """Quantidade de páginas do histórico arquivado (modo sob demanda)"""
+        if not self.sob_demanda:
+            return 0
+        return len(self.armazenamento.meses_historico())
+    
+    def carregar_pagina_historico(self, pagina: int) -> List[Despesa]:
+        """Lê uma página do histórico (0 = mais recente); lista vazia após a última"""
+        if not self.sob_demanda:
+            return []
+        despesas = []
+        for registro in self.armazenamento.ler_pagina_historico(pagina):
+            if registro['id'] in self._historico_excluidas:
+                continue
+            despesa = Despesa.from_dict(registro)
+            self._historico_carregado[despesa.id] = despesa
+            despesas.append(despesa)
+        return despesas
+    
+    @property
+    def despesas(self) -> List[Despesa]:
+        """Lista (cópia) das despesas residentes, em ordem de inclusão"""
+        with self._trava:
+            return self._indice.todas()
+    
+    @despesas.setter
+    def despesas(self, despesas: List[Despesa]) -> None:
+        self._indice.reconstruir(despesas)
+    
+    @instrumentado("salvar_dados")
     def salvar_dados(self) -> None:
-        """Salva dados no arquivo JSON"""
+        """Grava as mutações pendentes e um snapshot completo (compacta o log)"""
         try:
-            dados = {
-                'saldo': self.saldo,
-                'data_saldo': self.data_saldo or datetime.now().strftime("%Y-%m-%d"),
-                'despesas': [despesa.to_dict() for despesa in self.despesas]
-            }
-            
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(dados, f, indent=2, ensure_ascii=False)
-                
+            self.armazenamento.compactar(self._snapshot)
+        except Exception as e:
+            print(f"Erro ao salvar dados: {e}")
+            raise
+    
+    def descarregar(self) -> None:
+        """Grava imediatamente as mutações ainda pendentes (gravação adiada)"""
+        try:
+            self.armazenamento.descarregar()
         except Exception as e:
             print(f"Erro ao salvar dados: {e}")
             raise
     
+    @contextmanager
+    def transacao(self):
+        """
+        Agrupa mutações: nada é gravado até o fim do bloco, e então tudo é
+        gravado de uma vez. Se o bloco falhar, as mutações são descartadas e
+        o estado volta ao último gravado.
+        """
+        with self._trava:
+            self._nivel_transacao += 1
+            if self._nivel_transacao == 1:
+                try:
+                    self.armazenamento.iniciar_lote()
+                except BaseException:
+                    self._nivel_transacao -= 1
+                    raise
+            try:
+                yield self
+            except BaseException:
+                if self._nivel_transacao == 1:
+                    self.armazenamento.cancelar_lote()
+                    self.carregar_dados()
+                raise
+            else:
+                if self._nivel_transacao == 1:
+                    try:
+                        self.armazenamento.concluir_lote(self._snapshot)
+                    except Exception as e:
+                        print(f"Erro ao salvar dados: {e}")
+                        raise
+            finally:
+                self._nivel_transacao -= 1
+    
+    def _estado(self) -> Dict[str, Any]:
+        """Estado completo no formato do arquivo de dados"""
+        return {
+            'saldo': self.saldo,
+            'data_saldo': self.data_saldo or datetime.now().strftime("%Y-%m-%d"),
+            'despesas': [despesa.to_dict() for despesa in self._indice.por_id.values()],
+            'proximo_id': self.proximo_id,
+            'recorrencias': [regra.to_dict() for regra in self._recorrencias.values()],
+            'proximo_id_regra': self.proximo_id_regra
+        }
+    
+    def _snapshot(self) -> Dict[str, Any]:
+        """Estado a gravar na compactação; no modo sob demanda arquiva as pagas antigas"""
+        with self._trava:
+            return self._snapshot_atual()
+    
+    def _snapshot_atual(self) -> Dict[str, Any]:
+        if not self.sob_demanda:
+            return self._estado()
+        
+        # Arquiva meses inteiros: os que terminaram há mais de dias_residentes dias
+        limite = (datetime.now() - timedelta(days=self.dias_residentes)).replace(day=1)
+        limite = limite.date().toordinal()
+        antigas = [
+            d for d in self._indice.com_status(StatusDespesa.PAGA)
+            if d.vencimento.toordinal() < limite
+        ]
+        for despesa in antigas:
+            self._indice.remover(despesa)
+            self._historico_mensal.adicionar(despesa)
+        
+        estado = self._estado()
+        estado['arquivar'] = [despesa.to_dict() for despesa in antigas]
+        estado['historico'] = {
+            'totais': self._historico_mensal.exportar(),
+            'excluidas': sorted(self._historico_excluidas)
+        }
+        return estado
+    
+    def _registrar(self, operacao: Operacao) -> None:
+        """Aplica uma operação em memória e a persiste"""
+        with self._trava:
+            self._aplicar_operacao(operacao)
+            try:
+                self.armazenamento.registrar(operacao, self._snapshot)
+            except Exception as e:
+                print(f"Erro ao salvar dados: {e}")
+                raise
+    
+    def _aplicar_operacao(self, operacao: Operacao) -> None:
+        """Aplica uma operação ao estado em memória (também usado no replay do log)"""
+        tipo = operacao['op']
+        if 'id' in operacao:
+            self._nova_versao(operacao['id'])
+        
+        if tipo == 'adicionar':
+            id_despesa = operacao['despesa']['id']
+            self._nova_versao(id_despesa)
+            if self._residente:
+                self._indice.adicionar(Despesa.from_dict(operacao['despesa']))
+            elif self._fluxo is not None:
+                self._atualizar_fluxo(operacao['despesa'], 1)
+            if self._busca is not None:
+                self._busca.adicionar(id_despesa, operacao['despesa']['nome'],
+                                      _data_interna(operacao['despesa']['vencimento']).toordinal())
+            self.proximo_id = max(self.proximo_id, id_despesa + 1)
+            if 'ocorrencia' in operacao:
+                self._tratar_ocorrencia(operacao['ocorrencia'], id_despesa)
+        elif tipo == 'pagar':
+            if self._residente:
+                despesa = self._indice.obter(operacao['id'])
+                if despesa and despesa.status == StatusDespesa.PENDENTE:
+                    despesa.status = StatusDespesa.PAGA
+                    self._indice.alterar_status(despesa, StatusDespesa.PENDENTE)
+            elif self._fluxo is not None:
+                self._atualizar_fluxo(self.armazenamento.obter_despesa(operacao['id']), -1)
+            self.saldo = operacao['saldo']
+        elif tipo == 'excluir':
+            if self._busca is not None:
+                self._busca.remover(operacao['id'])
+            if self._residente:
+                despesa = self._indice.obter(operacao['id'])
+                if despesa:
+                    self._indice.remover(despesa)
+                elif 'historico' in operacao and operacao['id'] not in self._historico_excluidas:
+                    # Despesa arquivada: só os totais e a lista de excluídas mudam
+                    self._historico_excluidas.add(operacao['id'])
+                    self._historico_mensal.remover(Despesa.from_dict(operacao['historico']))
+                    self._historico_carregado.pop(operacao['id'], None)
+            elif self._fluxo is not None:
+                self._atualizar_fluxo(self.armazenamento.obter_despesa(operacao['id']), -1)
+        elif tipo == 'saldo':
+            self.saldo = operacao['saldo']
+            self.data_saldo = operacao['data']
+        elif tipo == 'recorrencia':
+            regra = RegraRecorrencia.from_dict(operacao['regra'])
+            self._recorrencias[regra.id] = regra
+            self.proximo_id_regra = max(self.proximo_id_regra, regra.id + 1)
+            self._linha_ocorrencias = None
+            # Ids de ocorrência dependem do id da regra: invalida caches da interface
+            self._nova_versao_base()
+        elif tipo == 'excluir_recorrencia':
+            self._recorrencias.pop(operacao['regra'], None)
+            self._linha_ocorrencias = None
+            self._nova_versao_base()
+        elif tipo == 'pular_ocorrencia':
+            self._tratar_ocorrencia(operacao, 0)
+        elif tipo == 'proximos_ids':
+            self.proximo_id = max(self.proximo_id, operacao['proximo_id'])
+            self.proximo_id_regra = max(self.proximo_id_regra, operacao['proximo_id_regra'])
+        else:
+            raise ValueError(f"Operação desconhecida: {tipo}")
+    
+    def _tratar_ocorrencia(self, ocorrencia: Dict[str, Any], id_despesa: int) -> None:
+        """Marca a ocorrência como paga (id da despesa gravada) ou excluída (0)"""
+        regra = self._recorrencias.get(ocorrencia['regra'])
+        if regra is not None:
+            regra.tratadas[date.fromisoformat(ocorrencia['data']).toordinal()] = id_despesa
+            self._linha_ocorrencias = None
+    
+    def _atualizar_fluxo(self, registro: Optional[Dict[str, Any]], sinal: int) -> None:
+        """Soma (1) ou retira (-1) do fluxo um registro do banco, se pendente"""
+        if registro is not None and registro['status'] == StatusDespesa.PENDENTE.value:
+            self._fluxo.somar(_data_interna(registro['vencimento']).toordinal(),
+                              sinal * para_centavos(registro['valor']))
+    
     def definir_saldo(self, novo_saldo: float) -> None:
         """Define novo saldo"""
-        self.saldo = novo_saldo
-        self.data_saldo = datetime.now().strftime("%Y-%m-%d")
-        self.salvar_dados()
+        self._registrar({
+            'op': 'saldo',
+            'saldo': para_reais(para_centavos(novo_saldo)),
+            'data': datetime.now().strftime("%Y-%m-%d")
+        })
     
     def adicionar_saldo(self, valor: float) -> None:
         """Adiciona valor ao saldo atual"""
-        self.saldo += valor
-        self.data_saldo = datetime.now().strftime("%Y-%m-%d")
-        self.salvar_dados()
+        self._registrar({
+            'op': 'saldo',
+            'saldo': para_reais(self.saldo_centavos + para_centavos(valor)),
+            'data': datetime.now().strftime("%Y-%m-%d")
+        })
     
     def adicionar_despesa(self, nome: str, valor: float, 
                          vencimento: datetime, 
-                         categoria: CategoriaDespesa) -> Despesa:
-        """Adiciona uma nova despesa"""
+                         categoria: CategoriaDespesa,
+                         status: StatusDespesa = StatusDespesa.PENDENTE) -> Despesa:
+        """Adiciona uma nova despesa (pagas entram sem alterar o saldo, ex.: importação)"""
         nova_despesa = Despesa(
             id=self.proximo_id,
             nome=nome,
-            valor=valor,
+            centavos=para_centavos(valor),
             vencimento=vencimento,
             categoria=categoria,
-            status=StatusDespesa.PENDENTE
+            status=status
         )
         
-        self.despesas.append(nova_despesa)
-        self.proximo_id += 1
-        self.salvar_dados()
+        self._registrar({'op': 'adicionar', 'despesa': nova_despesa.to_dict()})
         
-        return nova_despesa
+        return self.get_despesa_por_id(nova_despesa.id)
     
     def marcar_despesa_como_paga(self, id_despesa: int) -> bool:
         """Marca uma despesa como paga"""
-        for despesa in self.despesas:
-            if despesa.id == id_despesa and despesa.status == StatusDespesa.PENDENTE:
-                if self.saldo >= despesa.valor:
-                    despesa.status = StatusDespesa.PAGA
-                    self.saldo -= despesa.valor
-                    self.salvar_dados()
-                    return True
+        despesa = self.get_despesa_por_id(id_despesa)
+        if despesa and despesa.status == StatusDespesa.PENDENTE:
+            if self.saldo_centavos >= despesa.centavos:
+                saldo = para_reais(self.saldo_centavos - despesa.centavos)
+                if id_despesa < 0:
+                    # Ocorrência recorrente: só é gravada agora, ao ser paga,
+                    # junto com o pagamento
+                    with self.transacao():
+                        id_despesa = self._gravar_ocorrencia(despesa)
+                        self._registrar({'op': 'pagar', 'id': id_despesa, 'saldo': saldo})
                 else:
-                    raise ValueError(f"Saldo insuficiente. Saldo atual: R$ {self.saldo:.2f}, "
-                                   f"Valor necessário: R$ {despesa.valor:.2f}")
+                    self._registrar({'op': 'pagar', 'id': id_despesa, 'saldo': saldo})
+                return True
+            else:
+                raise ValueError(f"Saldo insuficiente. Saldo atual: R$ {self.saldo:.2f}, "
+                               f"Valor necessário: R$ {despesa.valor:.2f}")
         return False
     
     def excluir_despesa(self, id_despesa: int) -> None:
         """Exclui uma despesa"""
-        self.despesas = [d for d in self.despesas if d.id != id_despesa]
-        self.salvar_dados()
+        if id_despesa < 0:
+            # Ocorrência recorrente: grava só que ela foi pulada
+            id_regra, dia = decodificar_id_ocorrencia(id_despesa)
+            self._registrar({'op': 'pular_ocorrencia', 'regra': id_regra,
+                             'data': date.fromordinal(dia).isoformat()})
+            return
+        operacao = {'op': 'excluir', 'id': id_despesa}
+        if id_despesa in self._historico_carregado and self._indice.obter(id_despesa) is None:
+            operacao['historico'] = self._historico_carregado[id_despesa].to_dict()
+        self._registrar(operacao)
+    
+    # Recorrências
+    
+    @property
+    def recorrencias(self) -> List[RegraRecorrencia]:
+        return list(self._recorrencias.values())
+    
+    def adicionar_recorrencia(self, nome: str, valor: float, inicio: datetime,
+                              frequencia: Frequencia, intervalo: int = 1,
+                              categoria: CategoriaDespesa = CategoriaDespesa.FIXA,
+                              fim: Optional[datetime] = None) -> RegraRecorrencia:
+        """
+        Cadastra uma despesa recorrente a partir de `inicio` (a primeira
+        ocorrência). Mensal repete no mesmo dia do mês (ou no último dia, em
+        meses mais curtos); semanal a cada `intervalo` semanas; DIAS a cada
+        `intervalo` dias.
+        """
+        regra = RegraRecorrencia(
+            id=self.proximo_id_regra,
+            nome=nome,
+            centavos=para_centavos(valor),
+            categoria=categoria.value,
+            inicio=inicio.date(),
+            frequencia=frequencia,
+            intervalo=intervalo,
+            fim=fim.date() if fim else None
+        )
+        self._registrar({'op': 'recorrencia', 'regra': regra.to_dict()})
+        return self._recorrencias[regra.id]
+    
+    def excluir_recorrencia(self, id_regra: int) -> None:
+        """Remove a regra; as ocorrências já pagas continuam gravadas"""
+        self._registrar({'op': 'excluir_recorrencia', 'regra': id_regra})
+    
+    def _ocorrencia(self, regra: RegraRecorrencia, dia: int) -> Despesa:
+        """Despesa (não gravada) de uma ocorrência pendente"""
+        return Despesa(
+            id=id_ocorrencia(regra.id, dia),
+            nome=regra.nome,
+            centavos=regra.centavos,
+            vencimento=_data_interna(date.fromordinal(dia).isoformat()),
+            categoria=_CATEGORIAS[regra.categoria],
+            status=StatusDespesa.PENDENTE
+        )
+    
+    def _dias_ocorrencias(self, de_dia: Optional[int], ate_dia: Optional[int],
+                          limitar_horizonte: bool = True) -> Iterator[Tuple[int, int]]:
+        """
+        (dia, id da regra) das ocorrências pendentes em [de_dia, ate_dia),
+        em ordem de data, geradas sob demanda e limitadas ao horizonte (a
+        projeção do saldo passa limitar_horizonte=False e um ate_dia).
+        """
+        if limitar_horizonte:
+            horizonte = datetime.now().toordinal() + self.horizonte_recorrencia + 1
+            ate_dia = horizonte if ate_dia is None else min(ate_dia, horizonte)
+        return heapq.merge(*(
+            zip(regra.pendentes(de_dia, ate_dia), repeat(regra.id))
+            for regra in self._recorrencias.values()
+        ))
+    
+    def _ocorrencias(self, de_dia: Optional[int] = None,
+                     ate_dia: Optional[int] = None) -> List[Despesa]:
+        return [self._ocorrencia(self._recorrencias[id_regra], dia)
+                for dia, id_regra in self._dias_ocorrencias(de_dia, ate_dia)]
     
+    def _gravar_ocorrencia(self, ocorrencia: Despesa) -> int:
+        """Grava a ocorrência como despesa comum e retorna o id dela"""
+        id_regra, dia = decodificar_id_ocorrencia(ocorrencia.id)
+        despesa = ocorrencia.to_dict()
+        despesa['id'] = self.proximo_id
+        self._registrar({
+            'op': 'adicionar',
+            'despesa': despesa,
+            'ocorrencia': {'regra': id_regra, 'data': date.fromordinal(dia).isoformat()}
+        })
+        return despesa['id']
+    
+    @instrumentado("calcular_resumo")
     def calcular_resumo(self) -> Dict[str, float]:
         """Calcula resumo financeiro"""
         hoje = datetime.now()
         
-        total_gasto = sum(
-            d.valor for d in self.despesas 
-            if d.status == StatusDespesa.PAGA
-        )
-        
-        total_pendente = sum(
-            d.valor for d in self.despesas 
-            if d.status == StatusDespesa.PENDENTE
-        )
-        
-        # Despesas vencidas
-        despesas_vencidas = [
-            d for d in self.despesas 
-            if d.status == StatusDespesa.PENDENTE and d.vencimento < hoje
-        ]
-        
-        total_vencidas = sum(d.valor for d in despesas_vencidas)
-        
-        # Despesas próximas do vencimento (3 dias)
-        tres_dias = hoje.replace(hour=23, minute=59, second=59) + timedelta(days=3)
-        despesas_proximas = [
-            d for d in self.despesas 
-            if d.status == StatusDespesa.PENDENTE and 
-            hoje < d.vencimento <= tres_dias
-        ]
+        if not self._residente:
+            return self._calcular_resumo_sql(hoje)
         
-        total_proximas = sum(d.valor for d in despesas_proximas)
+        # Os índices mudam também na thread da gravação adiada (arquivamento)
+        with self._trava:
+            limite_vencidas, limite_proximas = janelas_vencimento(hoje)
+            limite_vencidas = limite_vencidas.toordinal()
+            limite_proximas = limite_proximas.toordinal()
+            
+            # Totais em centavos (exatos), convertidos para reais só no fim; os
+            # meses arquivados entram pelos totais de cada mês, sem reler registros
+            agregados = self._indice.agregados
+            total_gasto = (agregados.total_por_status[StatusDespesa.PAGA]
+                           + self._historico_mensal.total(StatusDespesa.PAGA))
+            total_pendente = agregados.total_por_status[StatusDespesa.PENDENTE]
+            
+            # Despesas vencidas e próximas do vencimento (3 dias), por bisseção
+            pendentes = self._indice.por_vencimento
+            total_vencidas, num_vencidas = pendentes.somar(ate_dia=limite_vencidas)
+            total_proximas, num_proximas = pendentes.somar(
+                de_dia=limite_vencidas, ate_dia=limite_proximas)
+            
+            return self._resumo(limite_vencidas, limite_proximas,
+                                total_gasto, total_pendente, total_vencidas, num_vencidas,
+                                total_proximas, num_proximas)
+    
+    def _resumo(self, limite_vencidas: int, limite_proximas: int,
+                total_gasto: int, total_pendente: int,
+                total_vencidas: int, num_vencidas: int,
+                total_proximas: int, num_proximas: int) -> Dict[str, float]:
+        """
+        Monta o dicionário do resumo (em reais) a partir dos totais em
+        centavos das despesas gravadas, somando as ocorrências recorrentes
+        ainda não gravadas até o horizonte.
+        """
+        for dia, id_regra in self._dias_ocorrencias(None, None):
+            centavos = self._recorrencias[id_regra].centavos
+            total_pendente += centavos
+            if dia < limite_vencidas:
+                total_vencidas += centavos
+                num_vencidas += 1
+            elif dia < limite_proximas:
+                total_proximas += centavos
+                num_proximas += 1
         
         return {
             'saldo_atual': self.saldo,
-            'total_gasto': total_gasto,
-            'total_pendente': total_pendente,
-            'saldo_final': self.saldo - total_pendente,
-            'total_vencidas': total_vencidas,
-            'total_proximas': total_proximas,
-            'num_vencidas': len(despesas_vencidas),
-            'num_proximas': len(despesas_proximas)
+            'total_gasto': para_reais(total_gasto),
+            'total_pendente': para_reais(total_pendente),
+            'saldo_final': para_reais(self.saldo_centavos - total_pendente),
+            'total_vencidas': para_reais(total_vencidas),
+            'total_proximas': para_reais(total_proximas),
+            'num_vencidas': num_vencidas,
+            'num_proximas': num_proximas
         }
     
+    def _calcular_resumo_sql(self, hoje: datetime) -> Dict[str, float]:
+        """Resumo calculado pelo banco (backends não residentes)"""
+        limite_vencidas, limite_proximas = janelas_vencimento(hoje)
+        pendente = StatusDespesa.PENDENTE.value
+        
+        total_gasto, _ = self.armazenamento.somar(status=StatusDespesa.PAGA.value)
+        total_pendente, _ = self.armazenamento.somar(status=pendente)
+        total_vencidas, num_vencidas = self.armazenamento.somar(
+            status=pendente, vencimento_ate=limite_vencidas.isoformat())
+        total_proximas, num_proximas = self.armazenamento.somar(
+            status=pendente,
+            vencimento_de=limite_vencidas.isoformat(),
+            vencimento_ate=limite_proximas.isoformat())
+        
+        return self._resumo(limite_vencidas.toordinal(), limite_proximas.toordinal(),
+                            total_gasto, total_pendente, total_vencidas, num_vencidas,
+                            total_proximas, num_proximas)
+    
+    # Projeção do saldo
+    
+    def _fluxo_pendente(self) -> FluxoPorDia:
+        """Centavos pendentes por dia de vencimento; no banco, montado na primeira projeção"""
+        if self._residente:
+            return self._indice.por_vencimento.fluxo
+        if self._fluxo is None:
+            fluxo = FluxoPorDia()
+            fluxo.reconstruir(
+                (_data_interna(vencimento).toordinal(), centavos) for vencimento, centavos
+                in self.armazenamento.somar_por_dia(StatusDespesa.PENDENTE.value))
+            self._fluxo = fluxo
+        return self._fluxo
+    
+    def _ocorrencias_acumuladas(self, ate_dia: int) -> Tuple[List[int], List[int]]:
+        """
+        Dias das ocorrências recorrentes pendentes até `ate_dia` (sem o limite
+        do horizonte) e a soma acumulada delas, refeitos só quando as regras
+        mudam ou a projeção vai além do último dia calculado.
+        """
+        linha = self._linha_ocorrencias
+        if linha is None or linha[0] < ate_dia:
+            dias, acumulado, soma = [], [], 0
+            for dia, id_regra in self._dias_ocorrencias(None, ate_dia + 1,
+                                                        limitar_horizonte=False):
+                soma += self._recorrencias[id_regra].centavos
+                dias.append(dia)
+                acumulado.append(soma)
+            linha = self._linha_ocorrencias = (ate_dia, dias, acumulado)
+        return linha[1], linha[2]
+    
+    def _saldo_no_dia(self, fluxo: FluxoPorDia, ocorrencias: Tuple[List[int], List[int]],
+                      dia: int) -> int:
+        """Saldo em centavos depois de pagar tudo o que vence até `dia`, inclusive"""
+        dias, acumulado = ocorrencias
+        posicao = bisect_right(dias, dia)
+        recorrentes = acumulado[posicao - 1] if posicao else 0
+        return self.saldo_centavos - fluxo.acumulado(dia) - recorrentes
+    
+    def saldo_projetado(self, data: Union[date, datetime]) -> float:
+        """
+        Saldo esperado em `data`: o atual menos as despesas pendentes
+        (vencidas inclusive) e as ocorrências recorrentes que vencem até
+        essa data. Cada consulta custa O(log n): os pendentes por dia ficam
+        numa árvore de somas acumuladas atualizada a cada mutação.
+        """
+        dia = data.toordinal()
+        with self._trava:
+            return para_reais(self._saldo_no_dia(
+                self._fluxo_pendente(), self._ocorrencias_acumuladas(dia), dia))
+    
+    def projecao_saldo(self, inicio: Union[date, datetime], fim: Union[date, datetime],
+                       passo: int = 1) -> List[Tuple[date, float]]:
+        """(data, saldo projetado) de `inicio` a `fim`, inclusive, a cada `passo` dias"""
+        de_dia, ate_dia = inicio.toordinal(), fim.toordinal()
+        with self._trava:
+            fluxo = self._fluxo_pendente()
+            ocorrencias = self._ocorrencias_acumuladas(ate_dia)
+            return [(date.fromordinal(dia),
+                     para_reais(self._saldo_no_dia(fluxo, ocorrencias, dia)))
+                    for dia in range(de_dia, ate_dia + 1, passo)]
+    
+    def primeiro_saldo_negativo(self, ate: Optional[Union[date, datetime]] = None
+                                ) -> Optional[date]:
+        """
+        Primeira data, de hoje até `ate` (por padrão um ano à frente), em que
+        o saldo projetado fica negativo; None se não fica. O saldo projetado
+        só diminui com o tempo, então a data sai por bisseção entre hoje e o
+        primeiro dia em que só as despesas gravadas já passam do saldo.
+        """
+        hoje = datetime.now().toordinal()
+        ate_dia = hoje + 365 if ate is None else ate.toordinal()
+        with self._trava:
+            fluxo = self._fluxo_pendente()
+            ocorrencias = self._ocorrencias_acumuladas(ate_dia)
+            if self._saldo_no_dia(fluxo, ocorrencias, ate_dia) >= 0:
+                return None
+            if self._saldo_no_dia(fluxo, ocorrencias, hoje) < 0:
+                return date.fromordinal(hoje)
+            
+            # Invariante: saldo >= 0 em `inicio` e < 0 em `fim`
+            inicio, fim = hoje, ate_dia
+            limite = fluxo.primeiro_dia_acima(self.saldo_centavos)
+            if limite is not None and inicio < limite < fim:
+                fim = limite
+            while fim - inicio > 1:
+                meio = (inicio + fim) // 2
+                if self._saldo_no_dia(fluxo, ocorrencias, meio) < 0:
+                    fim = meio
+                else:
+                    inicio = meio
+            return date.fromordinal(fim)
+    
+    @instrumentado("filtrar_despesas")
     def filtrar_despesas(self, filtro: str = "todas") -> List[Despesa]:
         """Filtra despesas com base no status"""
         hoje = datetime.now()
         
-        if filtro == "todas":
-            return self.despesas.copy()
-        elif filtro == "pendentes":
-            return [d for d in self.despesas if d.status == StatusDespesa.PENDENTE]
+        if not self._residente:
+            return self._filtrar_despesas_sql(filtro, hoje)
+        
+        with self._trava:
+            limite_vencidas, limite_proximas = janelas_vencimento(hoje)
+            limite_vencidas = limite_vencidas.toordinal()
+            limite_proximas = limite_proximas.toordinal()
+            
+            # Gravadas em ordem de id, seguidas das ocorrências recorrentes da janela
+            if filtro == "pendentes":
+                return self._indice.com_status(StatusDespesa.PENDENTE) + self._ocorrencias()
+            elif filtro == "pagas":
+                return self._indice.com_status(StatusDespesa.PAGA)
+            elif filtro == "vencidas":
+                return (self._indice.por_vencimento_entre(ate_dia=limite_vencidas)
+                        + self._ocorrencias(ate_dia=limite_vencidas))
+            elif filtro == "proximas":
+                return (self._indice.por_vencimento_entre(de_dia=limite_vencidas,
+                                                          ate_dia=limite_proximas)
+                        + self._ocorrencias(limite_vencidas, limite_proximas))
+            
+            return self._indice.todas() + self._ocorrencias()
+    
+    def _filtrar_despesas_sql(self, filtro: str, hoje: datetime) -> List[Despesa]:
+        """Filtro resolvido pelo banco (backends não residentes)"""
+        limite_vencidas, limite_proximas = janelas_vencimento(hoje)
+        pendente = StatusDespesa.PENDENTE.value
+        
+        ocorrencias = []
+        if filtro == "pendentes":
+            linhas = self.armazenamento.consultar(status=pendente)
+            ocorrencias = self._ocorrencias()
         elif filtro == "pagas":
-            return [d for d in self.despesas if d.status == StatusDespesa.PAGA]
+            linhas = self.armazenamento.consultar(status=StatusDespesa.PAGA.value)
         elif filtro == "vencidas":
-            return [d for d in self.despesas 
-                   if d.status == StatusDespesa.PENDENTE and d.vencimento < hoje]
+            linhas = self.armazenamento.consultar(
+                status=pendente, vencimento_ate=limite_vencidas.isoformat())
+            ocorrencias = self._ocorrencias(ate_dia=limite_vencidas.toordinal())
         elif filtro == "proximas":
-            tres_dias = hoje.replace(hour=23, minute=59, second=59) + timedelta(days=3)
-            return [d for d in self.despesas 
-                   if d.status == StatusDespesa.PENDENTE and 
-                   hoje < d.vencimento <= tres_dias]
+            linhas = self.armazenamento.consultar(
+                status=pendente,
+                vencimento_de=limite_vencidas.isoformat(),
+                vencimento_ate=limite_proximas.isoformat())
+            ocorrencias = self._ocorrencias(limite_vencidas.toordinal(),
+                                            limite_proximas.toordinal())
+        else:
+            linhas = self.armazenamento.consultar()
+            ocorrencias = self._ocorrencias()
+        
+        return [Despesa.from_dict(linha) for linha in linhas] + ocorrencias
+    
+    @instrumentado("buscar_despesas")
+    def buscar_despesas(self, texto: str, pagina: int = 0,
+                        por_pagina: int = 50) -> ResultadoBusca:
+        """
+        Busca pelo nome, sem diferenciar acentos e maiúsculas; cada palavra
+        do texto casa com o começo de uma palavra do nome ("agu lu" acha
+        "Água e Luz"). Inclui o histórico arquivado e volta uma página dos
+        resultados, dos mais relevantes aos menos.
+        
+        O índice é montado na primeira busca (percorrendo todas as despesas)
+        e depois atualizado a cada inclusão e exclusão. Pode ser chamado
+        fora da thread da interface.
+        """
+        with self._trava:
+            if self._busca is None:
+                busca = IndiceBusca()
+                for despesa in self.iterar_despesas():
+                    busca.adicionar(despesa.id, despesa.nome, despesa.vencimento.toordinal())
+                self._busca = busca
+            ids, total = self._busca.buscar(texto, pagina * por_pagina, por_pagina)
+            despesas = self._despesas_por_ids(ids)
+        return ResultadoBusca(despesas, total, pagina, por_pagina)
+    
+    def _despesas_por_ids(self, ids: List[int]) -> List[Despesa]:
+        """Despesas na ordem dos ids; as arquivadas ainda não lidas vêm dos meses delas"""
+        encontradas = {}
+        faltando = []
+        for id_despesa in ids:
+            despesa = self.get_despesa_por_id(id_despesa)
+            if despesa is None:
+                faltando.append(id_despesa)
+            else:
+                encontradas[id_despesa] = despesa
         
-        return self.despesas.copy()
+        meses = {date.fromordinal(self._busca.dia(id_despesa)).strftime("%Y-%m")
+                 for id_despesa in faltando}
+        for mes in sorted(meses):
+            for registro in self.armazenamento.ler_mes_historico(mes):
+                if registro['id'] in self._historico_excluidas:
+                    continue
+                despesa = Despesa.from_dict(registro)
+                self._historico_carregado[despesa.id] = despesa
+                encontradas.setdefault(despesa.id, despesa)
+        return [encontradas[id_despesa] for id_despesa in ids if id_despesa in encontradas]
+    
+    def totais_mensais(self, de_mes: Optional[str] = None,
+                       ate_mes: Optional[str] = None
+                       ) -> List[Tuple[str, StatusDespesa, CategoriaDespesa, int, int]]:
+        """
+        Linhas (mês, status, categoria, centavos, quantidade) do rollup
+        mensal para os meses 'AAAA-MM' em [de_mes, ate_mes), em ordem de mês,
+        incluindo o histórico arquivado. Vêm dos totais mantidos a cada
+        mutação, sem percorrer as despesas (ver relatorios).
+        """
+        if not self._residente:
+            linhas = self.armazenamento.totais_mensais(de_mes, ate_mes)
+        else:
+            with self._trava:
+                linhas = list(heapq.merge(self._indice.mensal.intervalo(de_mes, ate_mes),
+                                          self._historico_mensal.intervalo(de_mes, ate_mes),
+                                          key=lambda linha: linha[0]))
+        
+        totais: Dict[Tuple[str, StatusDespesa, CategoriaDespesa], List[int]] = {}
+        for mes, status, categoria, centavos, quantidade in linhas:
+            chave = (mes, _STATUS[status], _CATEGORIAS[categoria])
+            celula = totais.setdefault(chave, [0, 0])
+            celula[0] += centavos
+            celula[1] += quantidade
+        return [chave + (centavos, quantidade)
+                for chave, (centavos, quantidade) in totais.items()]
+    
+    # Exportação e backup
+    
+    def _registros_exportacao(self, status: Optional[StatusDespesa],
+                              vencimento_de: Optional[date],
+                              vencimento_ate: Optional[date]) -> Iterator[Dict[str, Any]]:
+        for despesa in self.iterar_despesas(status, vencimento_de, vencimento_ate):
+            yield despesa.to_dict()
+    
+    def exportar_csv(self, arquivo: TextIO, status: Optional[StatusDespesa] = None,
+                     vencimento_de: Optional[date] = None,
+                     vencimento_ate: Optional[date] = None) -> int:
+        """
+        Grava as despesas (filtradas por status e vencimento, como em
+        iterar_despesas) em CSV no arquivo aberto, uma a uma, sem montar a
+        lista em memória. Retorna quantas foram gravadas.
+        """
+        return escrever_csv(self._registros_exportacao(status, vencimento_de, vencimento_ate),
+                            arquivo)
+    
+    def exportar_jsonl(self, arquivo: TextIO, status: Optional[StatusDespesa] = None,
+                       vencimento_de: Optional[date] = None,
+                       vencimento_ate: Optional[date] = None) -> int:
+        """Como exportar_csv, mas uma despesa por linha em JSON (formato do arquivo de dados)"""
+        return escrever_jsonl(self._registros_exportacao(status, vencimento_de, vencimento_ate),
+                              arquivo)
+    
+    def criar_backup(self, arquivo: BinaryIO) -> int:
+        """
+        Grava um backup completo (saldo, recorrências e todas as despesas,
+        inclusive o histórico) compactado no arquivo binário aberto.
+        Retorna a quantidade de despesas.
+        """
+        with self._trava:
+            cabecalho = {
+                'saldo': self.saldo,
+                'data_saldo': self.data_saldo,
+                'proximo_id': self.proximo_id,
+                'recorrencias': [regra.to_dict() for regra in self._recorrencias.values()],
+                'proximo_id_regra': self.proximo_id_regra
+            }
+        return escrever_backup(cabecalho, self._registros_exportacao(None, None, None), arquivo)
+    
+    def restaurar_backup(self, arquivo: BinaryIO, tamanho_lote: int = 1000) -> int:
+        """
+        Restaura um backup de criar_backup num gerenciador sem dados.
+        
+        O arquivo (aberto em modo binário, com seek) é lido duas vezes em
+        fluxo: a primeira só confere se está íntegro, a segunda grava as
+        despesas em transações de `tamanho_lote`. Assim um backup corrompido
+        é recusado antes de qualquer gravação, e a memória usada não depende
+        do tamanho do histórico. Retorna a quantidade de despesas restauradas.
+        """
+        if self.proximo_id > 1 or self._recorrencias or next(self.iterar_despesas(), None):
+            raise ValueError("Restauração só é feita num gerenciador sem dados")
+        
+        inicio = arquivo.tell()
+        _, registros = ler_backup(arquivo)
+        for registro in registros:
+            try:
+                Despesa.from_dict(registro)
+            except (KeyError, TypeError) as e:
+                raise ValueError(f"Backup com despesa inválida: {registro!r}") from e
+        arquivo.seek(inicio)
+        
+        cabecalho, registros = ler_backup(arquivo)
+        with self.transacao():
+            self._registrar({'op': 'saldo', 'saldo': cabecalho.get('saldo', 0.0),
+                             'data': cabecalho.get('data_saldo')
+                             or datetime.now().strftime("%Y-%m-%d")})
+            for regra in cabecalho.get('recorrencias', []):
+                self._registrar({'op': 'recorrencia', 'regra': regra})
+        
+        quantidade = 0
+        while True:
+            lote = list(islice(registros, tamanho_lote))
+            if not lote:
+                break
+            with self.transacao():
+                for registro in lote:
+                    self._registrar({'op': 'adicionar', 'despesa': registro})
+            # Todas as despesas são novas: uma versão base em vez de uma por id
+            self._nova_versao_base()
+            quantidade += len(lote)
+        # Ids de despesas e regras excluídas antes do backup também não voltam
+        proximo_id = cabecalho.get('proximo_id', 1)
+        proximo_id_regra = cabecalho.get('proximo_id_regra', 1)
+        if proximo_id > self.proximo_id or proximo_id_regra > self.proximo_id_regra:
+            self._registrar({'op': 'proximos_ids', 'proximo_id': proximo_id,
+                             'proximo_id_regra': proximo_id_regra})
+        return quantidade
     
     def formatar_moeda(self, valor: float) -> str:
         """Formata valor como moeda brasileira"""
-        return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return formatar_moeda(valor)
+    
+    def formatar_moedas(self, valores: List[float]) -> List[str]:
+        """Formata vários valores de uma vez (colunas da lista, labels do resumo)"""
+        return formatar_moedas(valores)
     
     def dias_para_vencimento(self, despesa: Despesa) -> int:
         """Calcula dias para vencimento"""
@@ -242,7 +1147,19 @@ class GerenciadorFinanceiro:
     
     def get_despesa_por_id(self, id_despesa: int) -> Optional[Despesa]:
         """Obtém despesa por ID"""
-        for despesa in self.despesas:
-            if despesa.id == id_despesa:
-                return despesa
-        return None
\ No newline at end of file
+        if id_despesa < 0:
+            # Ocorrência recorrente ainda não gravada
+            id_regra, dia = decodificar_id_ocorrencia(id_despesa)
+            regra = self._recorrencias.get(id_regra)
+            if regra is None or dia in regra.tratadas or not regra.ocorre_em(dia):
+                return None
+            return self._ocorrencia(regra, dia)
+        
+        if not self._residente:
+            dados = self.armazenamento.obter_despesa(id_despesa)
+            return Despesa.from_dict(dados) if dados else None
+        
+        despesa = self._indice.obter(id_despesa)
+        if despesa is None:
+            despesa = self._historico_carregado.get(id_despesa)
+        return despesa
\ No newline at end of file
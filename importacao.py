@@ -0,0 +1,206 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Importação de extratos bancários (CSV e OFX) em fluxo contínuo
+"""
+
+import csv
+import io
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Set, Tuple, Union
+
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro, StatusDespesa
+
+# Nomes de coluna aceitos no CSV (comparados sem acento/maiúsculas)
+COLUNAS_DATA = ("data", "date", "vencimento", "data lancamento", "data movimento")
+COLUNAS_NOME = ("descricao", "historico", "nome", "lancamento", "description", "memo")
+COLUNAS_VALOR = ("valor", "value", "amount", "valor (r$)", "quantia")
+
+_SEM_ACENTO = str.maketrans("áàâãéêíóôõúüç", "aaaaeeiooouuc")
+
+
+@dataclass
+class LinhaExtrato:
+    """Lançamento lido do extrato, já validado"""
+    data: datetime
+    nome: str
+    centavos: int  # negativo = débito
+
+
+@dataclass
+class ResultadoImportacao:
+    """Contadores da importação, passados também ao callback de progresso"""
+    lidas: int = 0
+    importadas: int = 0
+    duplicadas: int = 0
+    ignoradas: int = 0  # créditos (valor >= 0)
+    invalidas: int = 0
+    bytes_lidos: int = 0
+    bytes_total: int = 0
+
+    @property
+    def fracao(self) -> float:
+        """Fração do arquivo já processada (0 a 1)"""
+        return self.bytes_lidos / self.bytes_total if self.bytes_total else 1.0
+
+
+Progresso = Callable[[ResultadoImportacao], None]
+
+
+def texto_para_centavos(texto: str) -> int:
+    """
+    Converte '1.234,56', '-12,30', '1234.56' ou 'R$ 10' em centavos, sem
+    passar por float. O separador decimal é o último '.' ou ',' seguido de
+    até dois dígitos.
+    """
+    texto = texto.strip().replace("R$", "").replace(" ", "")
+    negativo = texto.startswith("-") or texto.endswith("-") or texto.startswith("(")
+    digitos = texto.strip("-+()")
+    if not digitos:
+        raise ValueError(f"Valor vazio: {texto!r}")
+    inteiro, centavos = digitos, "0"
+    separador = max(digitos.rfind(","), digitos.rfind("."))
+    if separador >= 0 and len(digitos) - separador - 1 <= 2:
+        inteiro, centavos = digitos[:separador], digitos[separador + 1:]
+    inteiro = inteiro.replace(".", "").replace(",", "")
+    if not (inteiro or centavos).isdigit() or not centavos.isdigit():
+        raise ValueError(f"Valor inválido: {texto!r}")
+    total = int(inteiro or "0") * 100 + int(centavos.ljust(2, "0"))
+    return -total if negativo else total
+
+
+def texto_para_data(texto: str) -> datetime:
+    """Aceita DD/MM/AAAA, AAAA-MM-DD e AAAAMMDD (OFX, com ou sem horário)"""
+    texto = texto.strip()
+    if len(texto) >= 8 and texto[:8].isdigit():
+        return datetime(int(texto[:4]), int(texto[4:6]), int(texto[6:8]))
+    if len(texto) >= 10 and texto[4] == "-":
+        return datetime(int(texto[:4]), int(texto[5:7]), int(texto[8:10]))
+    return datetime.strptime(texto[:10], "%d/%m/%Y")
+
+
+def _normalizar(texto: str) -> str:
+    return texto.strip().lower().translate(_SEM_ACENTO)
+
+
+def ler_csv(linhas: Iterable[str]) -> Iterator[Optional[LinhaExtrato]]:
+    """
+    Lê um CSV linha a linha. Detecta o separador (';' ou ',') e as colunas de
+    data, descrição e valor pelo cabeçalho. Linhas que não puderem ser
+    convertidas geram None.
+    """
+    linhas = iter(linhas)
+    cabecalho = next(linhas, "")
+    separador = ";" if cabecalho.count(";") >= cabecalho.count(",") else ","
+    colunas = [_normalizar(coluna) for coluna in next(csv.reader([cabecalho], delimiter=separador))]
+
+    def posicao(nomes: Tuple[str, ...]) -> int:
+        for nome in nomes:
+            if nome in colunas:
+                return colunas.index(nome)
+        raise ValueError(f"CSV sem coluna {nomes[0]!r}: {colunas}")
+
+    i_data, i_nome, i_valor = posicao(COLUNAS_DATA), posicao(COLUNAS_NOME), posicao(COLUNAS_VALOR)
+    for campos in csv.reader(linhas, delimiter=separador):
+        if not campos:
+            continue
+        try:
+            yield LinhaExtrato(texto_para_data(campos[i_data]), campos[i_nome].strip(),
+                               texto_para_centavos(campos[i_valor]))
+        except (ValueError, IndexError):
+            yield None
+
+
+_TAG_OFX = re.compile(r"<(/?)([A-Z.]+)>([^<\r\n]*)")
+
+
+def ler_ofx(linhas: Iterable[str]) -> Iterator[Optional[LinhaExtrato]]:
+    """
+    Lê os lançamentos (<STMTTRN>) de um OFX, em SGML (tags sem fechamento)
+    ou XML, sem carregar o arquivo inteiro. Lançamentos incompletos geram None.
+    """
+    campos = None
+    for linha in linhas:
+        for fecha, tag, valor in _TAG_OFX.findall(linha):
+            if tag == "STMTTRN":
+                if not fecha:
+                    campos = {}
+                    continue
+                if campos is not None:
+                    try:
+                        nome = campos.get("NAME") or campos.get("MEMO") or ""
+                        yield LinhaExtrato(texto_para_data(campos["DTPOSTED"]), nome.strip(),
+                                           texto_para_centavos(campos["TRNAMT"]))
+                    except (KeyError, ValueError):
+                        yield None
+                campos = None
+            elif campos is not None and not fecha:
+                campos[tag] = valor.strip()
+
+
+def _chave(nome: str, centavos: int, data: datetime) -> Tuple[str, int, int]:
+    """Chave de deduplicação: (nome, valor, vencimento)"""
+    return nome.casefold(), centavos, data.toordinal()
+
+
+def importar_extrato(gerenciador: GerenciadorFinanceiro,
+                     arquivo: Union[str, Path],
+                     formato: Optional[str] = None,
+                     categoria: CategoriaDespesa = CategoriaDespesa.VARIAVEL,
+                     tamanho_lote: int = 1000,
+                     progresso: Optional[Progresso] = None,
+                     codificacao: str = "utf-8-sig") -> ResultadoImportacao:
+    """
+    Importa os débitos de um extrato CSV ou OFX como despesas pagas.
+
+    O arquivo é lido em fluxo; cada lote de `tamanho_lote` despesas é gravado
+    numa única transação (uma gravação por lote, não por despesa). Lançamentos
+    já existentes, ou repetidos no próprio arquivo, com mesmo nome, valor e
+    data, são ignorados. `progresso` é chamado após cada lote, na thread que
+    está importando (na interface, repassar com Clock.schedule_once).
+    """
+    arquivo = Path(arquivo)
+    formato = (formato or arquivo.suffix.lstrip(".")).lower()
+    if formato not in ("csv", "ofx"):
+        raise ValueError(f"Formato não suportado: {formato}")
+    leitor = ler_csv if formato == "csv" else ler_ofx
+
+    resultado = ResultadoImportacao(bytes_total=arquivo.stat().st_size)
+    existentes: Set[Tuple[str, int, int]] = {
+        _chave(d.nome, d.centavos, d.vencimento) for d in gerenciador.iterar_despesas()
+    }
+
+    with open(arquivo, "rb") as bruto:
+        texto = io.TextIOWrapper(bruto, encoding=codificacao, errors="replace", newline="")
+        lancamentos = leitor(texto)
+        while True:
+            lote = list(islice(lancamentos, tamanho_lote))
+            if not lote:
+                break
+            with gerenciador.transacao():
+                for lancamento in lote:
+                    resultado.lidas += 1
+                    if lancamento is None:
+                        resultado.invalidas += 1
+                        continue
+                    if lancamento.centavos >= 0:
+                        resultado.ignoradas += 1
+                        continue
+                    chave = _chave(lancamento.nome, -lancamento.centavos, lancamento.data)
+                    if chave in existentes:
+                        resultado.duplicadas += 1
+                        continue
+                    existentes.add(chave)
+                    gerenciador.adicionar_despesa(lancamento.nome, -lancamento.centavos / 100,
+                                                  lancamento.data, categoria,
+                                                  status=StatusDespesa.PAGA)
+                    resultado.importadas += 1
+            resultado.bytes_lidos = bruto.tell()
+            if progresso:
+                progresso(resultado)
+
+    resultado.bytes_lidos = resultado.bytes_total
+    return resultado
@@ -0,0 +1,523 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Índices e agregados mantidos incrementalmente pelo gerenciador
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import compress
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    # Caminho colunar, usado nas reconstruções em massa quando estiver instalado
+    import numpy as np
+except ImportError:
+    np = None
+
+# Abaixo disso o caminho puro em Python é mais rápido que montar as colunas
+MINIMO_COLUNAR = 5_000
+
+_MASCARA_ID = (1 << 32) - 1
+
+
+def para_centavos(valor: float) -> int:
+    """Converte um valor em reais para centavos inteiros"""
+    return round(valor * 100)
+
+
+def para_reais(centavos: int) -> float:
+    """Converte centavos inteiros para reais (API em float)"""
+    return centavos / 100
+
+
+class AgregadosDespesas:
+    """Totais (em centavos) por status e por categoria, atualizados em O(1)"""
+
+    def __init__(self):
+        self.limpar()
+
+    def limpar(self) -> None:
+        self.total_por_status: Dict[str, int] = defaultdict(int)
+        self.quantidade_por_status: Dict[str, int] = defaultdict(int)
+        self.total_por_categoria: Dict[str, int] = defaultdict(int)
+
+    def adicionar(self, despesa: Any) -> None:
+        centavos = despesa.centavos
+        self.total_por_status[despesa.status] += centavos
+        self.quantidade_por_status[despesa.status] += 1
+        self.total_por_categoria[despesa.categoria] += centavos
+
+    def remover(self, despesa: Any) -> None:
+        centavos = despesa.centavos
+        self.total_por_status[despesa.status] -= centavos
+        self.quantidade_por_status[despesa.status] -= 1
+        self.total_por_categoria[despesa.categoria] -= centavos
+
+    def exportar(self) -> Dict[str, Dict[str, int]]:
+        """Totais em formato serializável (chaves pelo valor do status/categoria)"""
+        def simples(totais: Dict[Any, int]) -> Dict[str, int]:
+            return {getattr(chave, 'value', chave): total for chave, total in totais.items() if total}
+        return {
+            'status': simples(self.total_por_status),
+            'quantidades': simples(self.quantidade_por_status),
+            'categorias': simples(self.total_por_categoria),
+        }
+
+    def restaurar(self, dados: Dict[str, Dict[str, int]]) -> None:
+        """Recarrega totais gravados por exportar()"""
+        self.limpar()
+        self.total_por_status.update(dados.get('status', {}))
+        self.quantidade_por_status.update(dados.get('quantidades', {}))
+        self.total_por_categoria.update(dados.get('categorias', {}))
+
+    def reconstruir_colunar(self, centavos: Any, status: Any, categorias: Any,
+                            rotulos_status: List[Any], rotulos_categoria: List[Any]) -> None:
+        """
+        Recalcula os totais a partir de colunas NumPy: centavos (int64) e os
+        códigos de status/categoria, índices em rotulos_status/rotulos_categoria.
+        """
+        self.limpar()
+        for codigo, rotulo in enumerate(rotulos_status):
+            mascara = status == codigo
+            self.total_por_status[rotulo] = int(centavos[mascara].sum())
+            self.quantidade_por_status[rotulo] = int(mascara.sum())
+        for codigo, rotulo in enumerate(rotulos_categoria):
+            self.total_por_categoria[rotulo] = int(centavos[categorias == codigo].sum())
+    
+    def alterar_status(self, despesa: Any, status_anterior: str) -> None:
+        """Move a despesa (já com o novo status) do total do status anterior"""
+        centavos = despesa.centavos
+        self.total_por_status[status_anterior] -= centavos
+        self.quantidade_por_status[status_anterior] -= 1
+        self.total_por_status[despesa.status] += centavos
+        self.quantidade_por_status[despesa.status] += 1
+
+
+def mes_vencimento(despesa: Any) -> str:
+    """Mês ('AAAA-MM') do vencimento, mesma chave do histórico particionado"""
+    vencimento = despesa.vencimento
+    return f"{vencimento.year:04d}-{vencimento.month:02d}"
+
+
+class TotaisMensais:
+    """
+    Rollup materializado: centavos e quantidade por (status, categoria) em
+    cada mês de vencimento ('AAAA-MM'), atualizado a cada mutação. Consultas
+    por intervalo de meses custam O(meses), não O(despesas).
+    """
+
+    def __init__(self):
+        self.limpar()
+
+    def limpar(self) -> None:
+        # mês -> (status, categoria) -> [centavos, quantidade]
+        self.meses: Dict[str, Dict[Tuple[Any, Any], List[int]]] = {}
+
+    def _acumular(self, mes: str, status: Any, categoria: Any,
+                  centavos: int, quantidade: int) -> None:
+        celulas = self.meses.get(mes)
+        if celulas is None:
+            celulas = self.meses[mes] = {}
+        celula = celulas.get((status, categoria))
+        if celula is None:
+            celula = celulas[(status, categoria)] = [0, 0]
+        celula[0] += centavos
+        celula[1] += quantidade
+
+    def adicionar(self, despesa: Any) -> None:
+        self._acumular(mes_vencimento(despesa), despesa.status, despesa.categoria,
+                       despesa.centavos, 1)
+
+    def remover(self, despesa: Any) -> None:
+        self._acumular(mes_vencimento(despesa), despesa.status, despesa.categoria,
+                       -despesa.centavos, -1)
+
+    def alterar_status(self, despesa: Any, status_anterior: str) -> None:
+        mes = mes_vencimento(despesa)
+        self._acumular(mes, status_anterior, despesa.categoria, -despesa.centavos, -1)
+        self._acumular(mes, despesa.status, despesa.categoria, despesa.centavos, 1)
+
+    def reconstruir(self, despesas: Iterable[Any]) -> None:
+        """Recria o rollup de uma vez, agrupando primeiro pela data (instâncias compartilhadas)"""
+        self.limpar()
+        por_data: Dict[Tuple[Any, Any, Any], List[int]] = defaultdict(lambda: [0, 0])
+        for despesa in despesas:
+            celula = por_data[(despesa.vencimento, despesa.status, despesa.categoria)]
+            celula[0] += despesa.centavos
+            celula[1] += 1
+        for (vencimento, status, categoria), (centavos, quantidade) in por_data.items():
+            self._acumular(f"{vencimento.year:04d}-{vencimento.month:02d}", status, categoria,
+                           centavos, quantidade)
+
+    def reconstruir_colunar(self, meses: Any, rotulos_mes: List[str],
+                            centavos: Any, status: Any, categorias: Any,
+                            rotulos_status: List[Any], rotulos_categoria: List[Any]) -> None:
+        """
+        Recria o rollup a partir de colunas NumPy (códigos de mês, status e
+        categoria, índices nos respectivos rótulos) com um único bincount.
+        """
+        self.limpar()
+        n_status, n_categorias = len(rotulos_status), len(rotulos_categoria)
+        codigos = (meses.astype(np.int64) * n_status + status) * n_categorias + categorias
+        tamanho = len(rotulos_mes) * n_status * n_categorias
+        quantidades = np.bincount(codigos, minlength=tamanho)
+        # Pesos em float64: somas exatas enquanto ficarem abaixo de 2**53 centavos
+        totais = np.bincount(codigos, weights=centavos, minlength=tamanho)
+        for codigo in np.flatnonzero(quantidades).tolist():
+            resto, categoria = divmod(codigo, n_categorias)
+            mes, situacao = divmod(resto, n_status)
+            self._acumular(rotulos_mes[mes], rotulos_status[situacao],
+                           rotulos_categoria[categoria], int(round(totais[codigo])),
+                           int(quantidades[codigo]))
+
+    def total(self, status: Any) -> int:
+        """Centavos de todos os meses com o status"""
+        return sum(celula[0] for celulas in self.meses.values()
+                   for (situacao, _), celula in celulas.items() if situacao == status)
+
+    def intervalo(self, de_mes: Optional[str] = None,
+                  ate_mes: Optional[str] = None) -> Iterator[Tuple[str, Any, Any, int, int]]:
+        """(mês, status, categoria, centavos, quantidade) dos meses em [de_mes, ate_mes), em ordem"""
+        for mes in sorted(self.meses):
+            if (de_mes is not None and mes < de_mes) or (ate_mes is not None and mes >= ate_mes):
+                continue
+            for (status, categoria), (centavos, quantidade) in self.meses[mes].items():
+                if quantidade:
+                    yield mes, status, categoria, centavos, quantidade
+
+    def exportar(self) -> Dict[str, List[List[Any]]]:
+        """Formato serializável: mês -> [[status, categoria, centavos, quantidade], ...]"""
+        return {
+            mes: [[getattr(status, 'value', status), getattr(categoria, 'value', categoria),
+                   centavos, quantidade]
+                  for (status, categoria), (centavos, quantidade) in celulas.items() if quantidade]
+            for mes, celulas in sorted(self.meses.items())
+        }
+
+    def restaurar(self, dados: Dict[str, List[List[Any]]]) -> None:
+        """Recarrega um rollup gravado por exportar()"""
+        self.limpar()
+        for mes, celulas in dados.items():
+            for status, categoria, centavos, quantidade in celulas:
+                self._acumular(mes, status, categoria, centavos, quantidade)
+
+
+class FluxoPorDia:
+    """
+    Centavos a pagar por dia de vencimento (ordinal) numa árvore de Fenwick:
+    soma acumulada até um dia e primeiro dia em que o acumulado passa de um
+    limite em O(log n), e inclusão/remoção também em O(log n). Os valores
+    por dia devem ser não negativos.
+    
+    A árvore cobre 2**k dias consecutivos a partir de `_base`; um dia fora
+    dela remonta a árvore com pelo menos o dobro do tamanho (custo
+    amortizado).
+    """
+
+    def __init__(self):
+        self.limpar()
+
+    def limpar(self) -> None:
+        self._base = 0  # dia da posição 1
+        self._arvore: List[int] = [0]  # 1-indexada
+        self._por_dia: Dict[int, int] = {}
+        self.total = 0
+
+    def reconstruir(self, itens: Iterable[Tuple[int, int]]) -> None:
+        """Recria a partir de pares (dia, centavos) de uma vez (carga inicial)"""
+        por_dia: Dict[int, int] = defaultdict(int)
+        for dia, centavos in itens:
+            por_dia[dia] += centavos
+        self._por_dia = {dia: centavos for dia, centavos in por_dia.items() if centavos}
+        self.total = sum(self._por_dia.values())
+        if self._por_dia:
+            self._montar(min(self._por_dia), max(self._por_dia))
+        else:
+            self._base, self._arvore = 0, [0]
+
+    def _montar(self, primeiro: int, ultimo: int) -> None:
+        """Árvore cobrindo ao menos [primeiro, ultimo], montada em O(tamanho)"""
+        tamanho = 1
+        while tamanho < ultimo - primeiro + 1:
+            tamanho *= 2
+        arvore = [0] * (tamanho + 1)
+        for dia, centavos in self._por_dia.items():
+            arvore[dia - primeiro + 1] += centavos
+        for posicao in range(1, tamanho + 1):
+            pai = posicao + (posicao & -posicao)
+            if pai <= tamanho:
+                arvore[pai] += arvore[posicao]
+        self._base, self._arvore = primeiro, arvore
+
+    def somar(self, dia: int, centavos: int) -> None:
+        """Soma `centavos` (negativo para retirar) ao dia"""
+        if not centavos:
+            return
+        restante = self._por_dia.get(dia, 0) + centavos
+        if restante:
+            self._por_dia[dia] = restante
+        else:
+            self._por_dia.pop(dia, None)
+        self.total += centavos
+
+        arvore = self._arvore
+        tamanho = len(arvore) - 1
+        posicao = dia - self._base + 1
+        if not 1 <= posicao <= tamanho:
+            if not tamanho:
+                self._montar(dia, dia)
+            elif dia < self._base:
+                ultimo = self._base + tamanho - 1
+                self._montar(min(dia, ultimo - 2 * tamanho + 1), ultimo)
+            else:
+                self._montar(self._base, max(dia, self._base + 2 * tamanho - 1))
+            return
+        while posicao <= tamanho:
+            arvore[posicao] += centavos
+            posicao += posicao & -posicao
+
+    def acumulado(self, dia: int) -> int:
+        """Centavos com vencimento até `dia`, inclusive"""
+        arvore = self._arvore
+        posicao = dia - self._base + 1
+        if posicao < 1:
+            return 0
+        if posicao >= len(arvore) - 1:
+            return self.total
+        soma = 0
+        while posicao:
+            soma += arvore[posicao]
+            posicao -= posicao & -posicao
+        return soma
+
+    def primeiro_dia_acima(self, limite: int) -> Optional[int]:
+        """Menor dia em que o acumulado passa de `limite` (None se nunca passa)"""
+        if self.total <= limite:
+            return None
+        # Descida binária: maior posição com acumulado <= limite, mais um
+        arvore = self._arvore
+        tamanho = len(arvore) - 1
+        posicao, restante, passo = 0, limite, tamanho
+        while passo:
+            proxima = posicao + passo
+            if proxima <= tamanho and arvore[proxima] <= restante:
+                posicao = proxima
+                restante -= arvore[proxima]
+            passo >>= 1
+        return self._base + posicao
+
+
+class IndiceVencimento:
+    """
+    Despesas ordenadas por dia de vencimento (ordinal), para responder a
+    janelas de datas por bisseção em vez de percorrer a lista inteira.
+    
+    Cada chave é um único int, dia << 32 | id (ids cabem em 32 bits): ordena
+    como a tupla (dia, id), mas ocupa e compara bem menos. O total geral é
+    mantido à parte, para que somar percorra só o lado menor da janela, e
+    os centavos por dia numa FluxoPorDia, para o saldo projetado.
+    """
+
+    def __init__(self):
+        self._chaves: List[int] = []  # dia ordinal << 32 | id, ordenadas
+        self._despesas: Dict[int, Any] = {}
+        self._total = 0  # centavos de todas as despesas indexadas
+        self.fluxo = FluxoPorDia()
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+    @staticmethod
+    def chave(despesa: Any) -> int:
+        return despesa.vencimento.toordinal() << 32 | despesa.id
+
+    def limpar(self) -> None:
+        self._chaves = []
+        self._despesas = {}
+        self._total = 0
+        self.fluxo.limpar()
+
+    def reconstruir(self, despesas: List[Any]) -> None:
+        """Recria o índice de uma vez (carga inicial)"""
+        self._despesas = {d.id: d for d in despesas}
+        self._chaves = sorted(map(self.chave, despesas))
+        self._total = sum(d.centavos for d in despesas)
+        self._reconstruir_fluxo(despesas)
+
+    def reconstruir_ordenado(self, chaves: List[int], despesas: List[Any], total: int) -> None:
+        """Recria o índice a partir de chaves já ordenadas e do total já somado"""
+        self._despesas = {d.id: d for d in despesas}
+        self._chaves = chaves
+        self._total = total
+        self._reconstruir_fluxo(despesas)
+
+    def _reconstruir_fluxo(self, despesas: List[Any]) -> None:
+        self.fluxo.reconstruir((d.vencimento.toordinal(), d.centavos) for d in despesas)
+
+    def adicionar(self, despesa: Any) -> None:
+        chave = self.chave(despesa)
+        posicao = bisect_left(self._chaves, chave)
+        self._chaves.insert(posicao, chave)
+        self._despesas[despesa.id] = despesa
+        self._total += despesa.centavos
+        self.fluxo.somar(despesa.vencimento.toordinal(), despesa.centavos)
+
+    def remover(self, despesa: Any) -> None:
+        if self._despesas.pop(despesa.id, None) is None:
+            return
+        self._total -= despesa.centavos
+        self.fluxo.somar(despesa.vencimento.toordinal(), -despesa.centavos)
+        chave = self.chave(despesa)
+        posicao = bisect_left(self._chaves, chave)
+        if posicao < len(self._chaves) and self._chaves[posicao] == chave:
+            del self._chaves[posicao]
+
+    def _fatia(self, de_dia: Optional[int], ate_dia: Optional[int]) -> Tuple[int, int]:
+        """Posições [inicio, fim) das chaves com de_dia <= dia < ate_dia"""
+        inicio = 0 if de_dia is None else bisect_left(self._chaves, de_dia << 32)
+        fim = len(self._chaves) if ate_dia is None else bisect_left(self._chaves, ate_dia << 32)
+        return inicio, max(inicio, fim)
+
+    def intervalo(self, de_dia: Optional[int] = None,
+                  ate_dia: Optional[int] = None) -> List[Any]:
+        """Despesas com vencimento em [de_dia, ate_dia), em ordem de vencimento"""
+        inicio, fim = self._fatia(de_dia, ate_dia)
+        despesas = self._despesas
+        return [despesas[chave & _MASCARA_ID] for chave in self._chaves[inicio:fim]]
+
+    def somar(self, de_dia: Optional[int] = None,
+              ate_dia: Optional[int] = None) -> Tuple[int, int]:
+        """Retorna (total em centavos, quantidade) das despesas em [de_dia, ate_dia)"""
+        inicio, fim = self._fatia(de_dia, ate_dia)
+        if fim - inicio <= len(self._chaves) // 2:
+            return self._somar_chaves(self._chaves[inicio:fim]), fim - inicio
+        # Janela maior que metade: total geral menos o que fica de fora
+        fora = self._somar_chaves(self._chaves[:inicio]) + self._somar_chaves(self._chaves[fim:])
+        return self._total - fora, fim - inicio
+
+    def _somar_chaves(self, chaves: List[int]) -> int:
+        despesas = self._despesas
+        return sum(despesas[chave & _MASCARA_ID].centavos for chave in chaves)
+
+
+class IndiceDespesas:
+    """
+    Índices secundários sobre as despesas residentes: mapa id -> despesa,
+    conjuntos por status (dicts, para manter a ordem de inserção), ordem por
+    vencimento de um status (as pendentes), os agregados do resumo e os
+    totais por mês dos relatórios.
+    """
+
+    def __init__(self, status_por_vencimento: str):
+        self.status_por_vencimento = status_por_vencimento
+        self.por_id: Dict[int, Any] = {}
+        self.por_status: Dict[str, Dict[int, Any]] = defaultdict(dict)
+        self.por_vencimento = IndiceVencimento()
+        self.agregados = AgregadosDespesas()
+        self.mensal = TotaisMensais()
+
+    def __len__(self) -> int:
+        return len(self.por_id)
+
+    def reconstruir(self, despesas: Iterable[Any]) -> None:
+        """Recria todos os índices de uma vez (carga inicial)"""
+        despesas = list(despesas)
+        if np is not None and len(despesas) >= MINIMO_COLUNAR:
+            self._reconstruir_colunar(despesas)
+            return
+        self.por_id = {}
+        self.por_status = defaultdict(dict)
+        self.agregados.limpar()
+        for despesa in despesas:
+            self.por_id[despesa.id] = despesa
+            self.por_status[despesa.status][despesa.id] = despesa
+            self.agregados.adicionar(despesa)
+        self.mensal.reconstruir(despesas)
+        self.por_vencimento.reconstruir(
+            list(self.por_status[self.status_por_vencimento].values()))
+
+    def _reconstruir_colunar(self, despesas: List[Any]) -> None:
+        """
+        Mesma reconstrução com NumPy: as despesas viram colunas (centavos,
+        códigos de status/categoria, chaves de vencimento), e os totais, a
+        separação por status e a ordenação por vencimento passam a ser
+        máscaras, somas e um sort sobre os arrays.
+        """
+        quantidade = len(despesas)
+        self.por_id = {d.id: d for d in despesas}
+        
+        codigos_status: Dict[Any, int] = {}
+        codigos_categoria: Dict[Any, int] = {}
+        status = np.array([codigos_status.setdefault(valor, len(codigos_status))
+                           for valor in map(attrgetter('status'), despesas)], np.int8)
+        categorias = np.array([codigos_categoria.setdefault(valor, len(codigos_categoria))
+                               for valor in map(attrgetter('categoria'), despesas)], np.int8)
+        centavos = np.fromiter(map(attrgetter('centavos'), despesas), np.int64, quantidade)
+        self.agregados.reconstruir_colunar(centavos, status, categorias,
+                                           list(codigos_status), list(codigos_categoria))
+        
+        # Mês de cada despesa pelas datas distintas (poucas: instâncias compartilhadas)
+        vencimentos = list(map(attrgetter('vencimento'), despesas))
+        codigos_mes: Dict[str, int] = {}
+        mes_da_data = {
+            data: codigos_mes.setdefault(f"{data.year:04d}-{data.month:02d}", len(codigos_mes))
+            for data in set(vencimentos)
+        }
+        meses = np.fromiter(map(mes_da_data.__getitem__, vencimentos), np.int32, quantidade)
+        self.mensal.reconstruir_colunar(meses, list(codigos_mes), centavos, status, categorias,
+                                        list(codigos_status), list(codigos_categoria))
+        
+        self.por_status = defaultdict(dict)
+        for codigo, rotulo in enumerate(codigos_status):
+            selecionadas = compress(despesas, (status == codigo).tolist())
+            self.por_status[rotulo] = {d.id: d for d in selecionadas}
+        
+        indexadas = list(self.por_status[self.status_por_vencimento].values())
+        chaves = np.fromiter(map(IndiceVencimento.chave, indexadas), np.int64, len(indexadas))
+        chaves.sort()
+        total = self.agregados.total_por_status[self.status_por_vencimento]
+        self.por_vencimento.reconstruir_ordenado(chaves.tolist(), indexadas, total)
+    
+    def obter(self, id_despesa: int) -> Optional[Any]:
+        return self.por_id.get(id_despesa)
+
+    def adicionar(self, despesa: Any) -> None:
+        self.por_id[despesa.id] = despesa
+        self.por_status[despesa.status][despesa.id] = despesa
+        self.agregados.adicionar(despesa)
+        self.mensal.adicionar(despesa)
+        if despesa.status == self.status_por_vencimento:
+            self.por_vencimento.adicionar(despesa)
+
+    def remover(self, despesa: Any) -> None:
+        if self.por_id.pop(despesa.id, None) is None:
+            return
+        self.por_status[despesa.status].pop(despesa.id, None)
+        self.agregados.remover(despesa)
+        self.mensal.remover(despesa)
+        if despesa.status == self.status_por_vencimento:
+            self.por_vencimento.remover(despesa)
+
+    def alterar_status(self, despesa: Any, status_anterior: str) -> None:
+        """Reindexa uma despesa cujo status acabou de mudar"""
+        self.por_status[status_anterior].pop(despesa.id, None)
+        self.por_status[despesa.status][despesa.id] = despesa
+        self.agregados.alterar_status(despesa, status_anterior)
+        self.mensal.alterar_status(despesa, status_anterior)
+        if status_anterior == self.status_por_vencimento:
+            self.por_vencimento.remover(despesa)
+        if despesa.status == self.status_por_vencimento:
+            self.por_vencimento.adicionar(despesa)
+
+    def todas(self) -> List[Any]:
+        return list(self.por_id.values())
+
+    def com_status(self, status: str) -> List[Any]:
+        """Despesas de um status, em ordem de id (a ordem da lista completa)"""
+        return sorted(self.por_status[status].values(), key=attrgetter('id'))
+
+    def por_vencimento_entre(self, de_dia: Optional[int] = None,
+                             ate_dia: Optional[int] = None) -> List[Any]:
+        """Despesas do status indexado com vencimento em [de_dia, ate_dia), em ordem de id"""
+        return sorted(self.por_vencimento.intervalo(de_dia, ate_dia), key=attrgetter('id'))
@@ -0,0 +1,217 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Instrumentação opcional: latências, contadores e captura de perfil
+
+Desligada por padrão; as variáveis de ambiente são lidas uma única vez,
+na importação:
+    TRIMONEY_INSTRUMENTAR=1      histogramas de latência e contadores
+    TRIMONEY_PERFIL=cprofile     também captura com cProfile, por thread (liga a instrumentação)
+    TRIMONEY_PERFIL=tracemalloc  também rastreia alocações (liga a instrumentação)
+
+Desligada, `instrumentado` devolve a própria função (custo zero) e
+`contar` só testa uma variável global.
+"""
+
+import os
+import sys
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+CAPTURA = os.environ.get("TRIMONEY_PERFIL", "").strip().lower()
+ATIVA = bool(os.environ.get("TRIMONEY_INSTRUMENTAR")) or CAPTURA in ("cprofile", "tracemalloc")
+
+
+class Histograma:
+    """Latências em baldes logarítmicos: o balde k guarda durações abaixo de 2**k µs"""
+
+    BALDES = 32  # o último vai até ~36 minutos
+
+    def __init__(self):
+        self.contagens = [0] * self.BALDES
+        self.quantidade = 0
+        self.total = 0.0
+        self.minimo = float('inf')
+        self.maximo = 0.0
+
+    def registrar(self, segundos: float) -> None:
+        balde = min(int(segundos * 1e6).bit_length(), self.BALDES - 1)
+        self.contagens[balde] += 1
+        self.quantidade += 1
+        self.total += segundos
+        self.minimo = min(self.minimo, segundos)
+        self.maximo = max(self.maximo, segundos)
+
+    def percentil(self, fracao: float) -> float:
+        """Limite superior (s) do balde onde cai o percentil; no máximo o maior valor visto"""
+        if not self.quantidade:
+            return 0.0
+        alvo = fracao * self.quantidade
+        acumulado = 0
+        for balde, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return min((1 << balde) / 1e6, self.maximo)
+        return self.maximo
+
+    def resumo(self) -> Dict[str, float]:
+        """Quantidade e tempos em milissegundos"""
+        if not self.quantidade:
+            return {'quantidade': 0}
+        return {
+            'quantidade': self.quantidade,
+            'media_ms': self.total / self.quantidade * 1000,
+            'min_ms': self.minimo * 1000,
+            'p50_ms': self.percentil(0.5) * 1000,
+            'p90_ms': self.percentil(0.9) * 1000,
+            'p99_ms': self.percentil(0.99) * 1000,
+            'max_ms': self.maximo * 1000,
+        }
+
+
+# Estado global: registrado de várias threads (interface, dados, gravação adiada)
+_trava = threading.Lock()
+_latencias: Dict[str, Histograma] = {}
+_contadores: Dict[str, int] = {}
+_perfis: Dict[str, Any] = {}  # cProfile.Profile da captura, por nome de thread
+
+
+def registrar_latencia(nome: str, segundos: float) -> None:
+    with _trava:
+        histograma = _latencias.get(nome)
+        if histograma is None:
+            histograma = _latencias[nome] = Histograma()
+        histograma.registrar(segundos)
+
+
+def contar(nome: str, quantidade: int = 1) -> None:
+    """Soma `quantidade` ao contador (bytes gravados, registros lidos...)"""
+    if not ATIVA:
+        return
+    with _trava:
+        _contadores[nome] = _contadores.get(nome, 0) + quantidade
+
+
+def instrumentado(nome: str) -> Callable[[Callable], Callable]:
+    """Decorador que mede cada chamada da função (desligada: a função sem mudança)"""
+    def decorar(funcao: Callable) -> Callable:
+        if not ATIVA:
+            return funcao
+
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                registrar_latencia(nome, time.perf_counter() - inicio)
+        return medida
+    return decorar
+
+
+def relatorio() -> Dict[str, Any]:
+    """Latências e contadores até agora (e a memória, se rastreada)"""
+    with _trava:
+        dados: Dict[str, Any] = {
+            'ativa': ATIVA,
+            'captura': CAPTURA or None,
+            'latencias': {nome: histograma.resumo()
+                          for nome, histograma in sorted(_latencias.items())},
+            'contadores': dict(sorted(_contadores.items())),
+        }
+    if CAPTURA == "tracemalloc":
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            atual, pico = tracemalloc.get_traced_memory()
+            maiores = tracemalloc.take_snapshot().statistics('lineno')[:10]
+            dados['memoria'] = {
+                'atual_mb': atual / 1e6,
+                'pico_mb': pico / 1e6,
+                'maiores': [(str(estatistica.traceback), estatistica.size / 1e6)
+                            for estatistica in maiores],
+            }
+    return dados
+
+
+def formatar_relatorio() -> str:
+    """Relatório em texto, para a tela de depuração"""
+    if not ATIVA:
+        return "Instrumentação desligada (TRIMONEY_INSTRUMENTAR=1 para ligar)"
+    dados = relatorio()
+    linhas: List[str] = []
+    for nome, resumo in dados['latencias'].items():
+        if resumo['quantidade']:
+            linhas.append(f"{nome}: {resumo['quantidade']}x  média {resumo['media_ms']:.2f}ms  "
+                          f"p50 {resumo['p50_ms']:.2f}  p90 {resumo['p90_ms']:.2f}  "
+                          f"máx {resumo['max_ms']:.2f}")
+    if dados['contadores']:
+        linhas.append("")
+        linhas.extend(f"{nome}: {valor}" for nome, valor in dados['contadores'].items())
+    if 'memoria' in dados:
+        memoria = dados['memoria']
+        linhas.append("")
+        linhas.append(f"memória: {memoria['atual_mb']:.1f}MB (pico {memoria['pico_mb']:.1f}MB)")
+        linhas.extend(f"  {tamanho:.2f}MB {local}" for local, tamanho in memoria['maiores'])
+    return "\n".join(linhas) or "Nada medido ainda"
+
+
+def limpar() -> None:
+    with _trava:
+        _latencias.clear()
+        _contadores.clear()
+
+
+def iniciar_captura() -> None:
+    """
+    Começa a captura pedida em TRIMONEY_PERFIL na thread que chama: no
+    início do app e também na thread de dados, onde rodam carga, gravação
+    e consultas.
+    """
+    if CAPTURA == "cprofile":
+        import cProfile
+        nome = threading.current_thread().name
+        with _trava:
+            # Até o Python 3.11 o cProfile vê só a thread que o ligou, então
+            # cada thread liga o seu; a partir do 3.12 o primeiro já vê todas
+            # (e um segundo não pode ser ligado)
+            if nome in _perfis or (_perfis and sys.version_info >= (3, 12)):
+                return
+            perfil = _perfis[nome] = cProfile.Profile()
+        perfil.enable()
+    elif CAPTURA == "tracemalloc":
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+
+
+def parar_captura() -> None:
+    """Para o cProfile da thread que chama (no 3.11 só ela pode desligá-lo)"""
+    with _trava:
+        perfil = _perfis.get(threading.current_thread().name)
+    if perfil is not None:
+        perfil.disable()
+
+
+def encerrar_captura(diretorio: Path) -> List[Path]:
+    """
+    Termina a captura. Com cProfile grava em `diretorio` um arquivo por
+    thread: trimoney_perfil.prof (a que ligou primeiro, a da interface) e
+    trimoney_perfil.<thread>.prof; as outras threads devem ter chamado
+    parar_captura antes.
+    """
+    parar_captura()
+    caminhos = []
+    with _trava:
+        perfis = list(_perfis.items())
+        _perfis.clear()
+    for posicao, (nome, perfil) in enumerate(perfis):
+        arquivo = "trimoney_perfil.prof" if posicao == 0 else f"trimoney_perfil.{nome}.prof"
+        caminho = Path(diretorio) / arquivo
+        perfil.dump_stats(str(caminho))
+        caminhos.append(caminho)
+    if CAPTURA == "tracemalloc":
+        import tracemalloc
+        tracemalloc.stop()
+    return caminhos
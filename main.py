@@ -4,36 +4,34 @@ main.py - Configuração principal do Kivy
 """
 
 import os
+import time
+_INICIO = time.perf_counter()  # para medir o tempo até o primeiro quadro
 os.environ['KIVY_NO_CONSOLELOG'] = '1'
 
+# Só o necessário para a tela de resumo e as classes deste arquivo; os
+# widgets usados apenas nos arquivos .kv (TextInput, Spinner, ...) são
+# importados pela Factory quando a tela que os usa é criada
 from kivy.lang import Builder
 from kivy.uix.screenmanager import ScreenManager, Screen, SlideTransition
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.label import Label
-from kivy.uix.button import Button
-from kivy.uix.textinput import TextInput
-from kivy.uix.spinner import Spinner
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.gridlayout import GridLayout
+from kivy.uix.widget import Widget
 from kivy.uix.recycleview import RecycleView
 from kivy.uix.recycleview.views import RecycleDataViewBehavior
-from kivy.uix.recyclegridlayout import RecycleGridLayout
-from kivy.uix.recycleboxlayout import RecycleBoxLayout
-from kivy.uix.behaviors import FocusBehavior
-from kivy.uix.recycleview.layout import LayoutSelectionBehavior
-from kivy.uix.recycleview.views import RecycleDataViewBehavior
-from kivy.properties import StringProperty, NumericProperty, BooleanProperty, ObjectProperty
+from kivy.properties import (StringProperty, NumericProperty, BooleanProperty, ObjectProperty,
+                             ListProperty)
+from kivy.graphics import Color, Line
 from kivy.clock import Clock
-from kivy.core.window import Window
-from kivy.metrics import dp, sp
+from kivy.metrics import dp
 from kivy.utils import get_color_from_hex
 from kivy.app import App
 
-from datetime import datetime
-from financeiro import GerenciadorFinanceiro, CategoriaDespesa, StatusDespesa
-
-# Carregar arquivo KV
-Builder.load_file('trimoney.kv')
+from datetime import datetime, timedelta
+from financeiro import CategoriaDespesa, StatusDespesa
+from assincrono import GerenciadorAssincrono
+from perfis import RegistroPerfis
+import instrumentacao
+from instrumentacao import instrumentado, registrar_latencia
+from recorrencia import Frequencia
 
 class TelaBase(Screen):
     """Classe base para todas as telas"""
@@ -41,12 +39,64 @@ class TelaBase(Screen):
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.gerenciador = App.get_running_app().gerenciador
+        app = App.get_running_app()
+        self.gerenciador = app.gerenciador
+        # Consultas e mutações passam pela thread de dados (ver assincrono.py);
+        # na thread da interface só leituras pontuais em memória
+        self.dados = app.dados
         
     def mostrar_mensagem(self, titulo: str, mensagem: str, tipo: str = "info"):
         """Mostra mensagem na tela"""
         app = App.get_running_app()
         app.mostrar_dialogo(titulo, mensagem, tipo)
+    
+    def mostrar_erro(self, erro: BaseException):
+        """Falha de uma chamada em segundo plano"""
+        self.mostrar_mensagem("Erro", str(erro))
+    
+    def perfil_trocado(self, gerenciador):
+        """Outro perfil aberto: a tela passa a usar o gerenciador dele"""
+        self.gerenciador = gerenciador
+
+# Dias à frente no gráfico de saldo projetado do resumo
+DIAS_PROJECAO = 90
+
+def projecao_resumo(gerenciador, dias):
+    """Pontos diários do saldo projetado e o primeiro dia negativo (thread de dados)"""
+    hoje = datetime.now()
+    fim = hoje + timedelta(days=dias)
+    return gerenciador.projecao_saldo(hoje, fim), gerenciador.primeiro_saldo_negativo(fim)
+
+class GraficoSaldo(Widget):
+    """Linha do saldo projetado, com a linha do zero quando ela cabe no gráfico"""
+    pontos = ListProperty([])  # saldos em reais, um por dia
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bind(pontos=self._desenhar, pos=self._desenhar, size=self._desenhar)
+    
+    def _desenhar(self, *args):
+        self.canvas.clear()
+        if len(self.pontos) < 2:
+            return
+        
+        minimo = min(min(self.pontos), 0.0)
+        maximo = max(max(self.pontos), 0.0)
+        escala = self.height / ((maximo - minimo) or 1.0)
+        passo = self.width / (len(self.pontos) - 1)
+        
+        def altura(valor):
+            return self.y + (valor - minimo) * escala
+        
+        linha = []
+        for posicao, valor in enumerate(self.pontos):
+            linha += [self.x + posicao * passo, altura(valor)]
+        
+        with self.canvas:
+            Color(*get_color_from_hex("#FFFFFF40"))
+            Line(points=[self.x, altura(0.0), self.right, altura(0.0)], width=1)
+            Color(*get_color_from_hex("#4CAF50" if min(self.pontos) >= 0 else "#FF5252"))
+            Line(points=linha, width=dp(1.5))
 
 class TelaResumo(TelaBase):
     """Tela de resumo financeiro"""
@@ -59,14 +109,50 @@ class TelaResumo(TelaBase):
         """Atualiza os dados do resumo"""
         if not self.gerenciador:
             return
-            
-        resumo = self.gerenciador.calcular_resumo()
         
+        self.dados.chamar('calcular_resumo', ao_concluir=self._exibir_resumo)
+        self.dados.aplicar(projecao_resumo, DIAS_PROJECAO, ao_concluir=self._exibir_projecao)
+        
+        perfis = App.get_running_app().perfis
+        if perfis is not None:
+            # Os outros perfis entram pelo resumo guardado no registro
+            self.dados.executar(lambda: (perfis.perfil_ativo.nome, perfis.resumo_consolidado()),
+                                ao_concluir=self._exibir_consolidado)
+    
+    def _exibir_consolidado(self, resposta):
+        nome, consolidado = resposta
+        if consolidado['perfis'] > 1:
+            self.ids.lbl_titulo.text = f"Resumo - {nome}"
+            saldo, final = self.gerenciador.formatar_moedas([consolidado['saldo_atual'],
+                                                            consolidado['saldo_final']])
+            self.ids.lbl_consolidado.text = (f"{consolidado['perfis']} perfis: "
+                                             f"saldo {saldo} | final {final}")
+            self.ids.lbl_consolidado.opacity = 1
+        else:
+            self.ids.lbl_titulo.text = "Resumo Financeiro"
+            self.ids.lbl_consolidado.opacity = 0
+    
+    @instrumentado("tela.projecao")
+    def _exibir_projecao(self, resposta):
+        pontos, negativo = resposta
+        self.ids.grafico_saldo.pontos = [saldo for _, saldo in pontos]
+        if negativo is None:
+            self.ids.lbl_projecao.text = f"Saldo positivo nos próximos {DIAS_PROJECAO} dias"
+            self.ids.lbl_projecao.color = get_color_from_hex("#4CAF50")
+        else:
+            self.ids.lbl_projecao.text = f"Saldo fica negativo em {negativo.strftime('%d/%m/%Y')}"
+            self.ids.lbl_projecao.color = get_color_from_hex("#FF5252")
+    
+    @instrumentado("tela.resumo")
+    def _exibir_resumo(self, resumo):
         # Atualizar labels
-        self.ids.saldo_atual.text = self.gerenciador.formatar_moeda(resumo['saldo_atual'])
-        self.ids.total_gasto.text = self.gerenciador.formatar_moeda(resumo['total_gasto'])
-        self.ids.total_pendente.text = self.gerenciador.formatar_moeda(resumo['total_pendente'])
-        self.ids.saldo_final.text = self.gerenciador.formatar_moeda(resumo['saldo_final'])
+        saldo_atual, total_gasto, total_pendente, saldo_final = self.gerenciador.formatar_moedas([
+            resumo['saldo_atual'], resumo['total_gasto'],
+            resumo['total_pendente'], resumo['saldo_final']])
+        self.ids.saldo_atual.text = saldo_atual
+        self.ids.total_gasto.text = total_gasto
+        self.ids.total_pendente.text = total_pendente
+        self.ids.saldo_final.text = saldo_final
         
         # Atualizar cor do saldo final
         if resumo['saldo_final'] >= 0:
@@ -87,63 +173,289 @@ class TelaResumo(TelaBase):
         else:
             self.ids.lbl_alertas.opacity = 0
 
+class CacheLinhas:
+    """
+    Linhas da lista de despesas já montadas, por id e versão da despesa.
+    
+    Uma linha só é refeita quando a despesa muda (a versão vem do
+    gerenciador); como o texto "Vence em N dias" depende do dia, o cache
+    inteiro é descartado por um único evento do Clock à meia-noite.
+    """
+    
+    def __init__(self, gerenciador, montar, ao_virar_dia=None):
+        self.gerenciador = gerenciador
+        self.montar = montar
+        self.ao_virar_dia = ao_virar_dia
+        self._linhas = {}  # id -> (versão, linha)
+        self._agendar_virada()
+    
+    def obter_varias(self, despesas):
+        """
+        Linhas das despesas; só as que faltam ou cuja versão mudou são
+        montadas, com os valores formatados em lote.
+        """
+        versao_despesa = self.gerenciador.versao_despesa
+        linhas = self._linhas
+        versoes = [versao_despesa(d.id) for d in despesas]
+        faltando = [
+            (posicao, d) for posicao, d in enumerate(despesas)
+            if linhas.get(d.id, (None,))[0] != versoes[posicao]
+        ]
+        if faltando:
+            valores = self.gerenciador.formatar_moedas([d.valor for _, d in faltando])
+            for (posicao, despesa), valor in zip(faltando, valores):
+                linhas[despesa.id] = (versoes[posicao], self.montar(despesa, valor))
+        return [linhas[d.id][1] for d in despesas]
+    
+    def limpar(self):
+        self._linhas.clear()
+    
+    def _agendar_virada(self):
+        agora = datetime.now()
+        meia_noite = datetime.combine(agora.date() + timedelta(days=1), datetime.min.time())
+        # Um segundo de folga para o datetime.now() do outro lado já ser o novo dia
+        Clock.schedule_once(self._virar_dia, (meia_noite - agora).total_seconds() + 1)
+    
+    def _virar_dia(self, dt):
+        self.limpar()
+        self._agendar_virada()
+        if self.ao_virar_dia:
+            self.ao_virar_dia()
+
+def consultar_lista(gerenciador, filtro, historico):
+    """Despesas do filtro e, das páginas do histórico já exibidas, as excluídas (thread de dados)"""
+    despesas = gerenciador.filtrar_despesas(filtro)
+    excluidas = {d.id for d in historico if gerenciador.get_despesa_por_id(d.id) is None}
+    return gerenciador, filtro, despesas, excluidas
+
 class TelaDespesas(TelaBase):
     """Tela de lista de despesas"""
     
+    # Texto do spinner -> filtro do gerenciador
+    FILTROS = {
+        "Todas": "todas",
+        "Pendentes": "pendentes",
+        "Pagas": "pagas",
+        "Vencidas": "vencidas",
+        "Próximas": "proximas",
+    }
+    
+    # Espera depois da última tecla antes de buscar (segundos)
+    ATRASO_BUSCA = 0.3
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.despesa_selecionada = None
+        self._filtro_exibido = None
+        self._pagina_historico = 0
+        self._despesas_historico = []
+        self._cache_linhas = CacheLinhas(self.gerenciador, self._montar_linha,
+                                         self._ao_virar_dia)
+        # Busca: texto ativo, última página recebida e um contador para
+        # descartar respostas de buscas já substituídas
+        self._texto_busca = ""
+        self._resultado_busca = None
+        self._sequencia_busca = 0
+        self._evento_busca = None
+        self._buscando = False
+        self._carregando_historico = False
     
     def on_pre_enter(self):
         """Atualiza lista ao entrar na tela"""
         self.atualizar_lista()
     
+    def perfil_trocado(self, gerenciador):
+        """Seleção, histórico, busca e linhas montadas eram do perfil anterior"""
+        super().perfil_trocado(gerenciador)
+        self._cache_linhas.gerenciador = gerenciador
+        self._cache_linhas.limpar()
+        self.despesa_selecionada = None
+        self.ids.btn_pagar.disabled = True
+        self.ids.btn_excluir.disabled = True
+        self._filtro_exibido = None
+        self._pagina_historico = 0
+        self._despesas_historico = []
+        # Respostas ainda a caminho (busca, histórico) são descartadas
+        if self._evento_busca:
+            self._evento_busca.cancel()
+            self._evento_busca = None
+        self._sequencia_busca += 1
+        self._texto_busca = ""
+        self._resultado_busca = None
+        self._buscando = False
+        self.ids.busca_input.text = ""
+    
+    def _ao_virar_dia(self):
+        """Refaz os textos de vencimento se a lista estiver na tela"""
+        if self.manager and self.manager.current == self.name:
+            self.atualizar_lista()
+    
+    def _filtro_atual(self):
+        return self.FILTROS.get(self.ids.spinner_filtro.text, "todas")
+    
     def atualizar_lista(self):
         """Atualiza a lista de despesas"""
-        filtro = self.ids.spinner_filtro.text.lower()
-        despesas = self.gerenciador.filtrar_despesas(filtro)
+        if self._texto_busca:
+            # Com busca ativa a lista mostra os resultados, refeitos do início
+            self._buscar(self._texto_busca, 0)
+            return
         
-        # Limpar lista atual
-        self.ids.lista_despesas.data = []
+        filtro = self._filtro_atual()
+        if filtro != self._filtro_exibido:
+            # Outro filtro: o histórico volta a ser carregado do início
+            self._filtro_exibido = filtro
+            self._pagina_historico = 0
+            self._despesas_historico = []
+        pedido = time.perf_counter()
+        # Com o gerenciador da thread de dados na hora da consulta: o perfil
+        # pode ser trocado entre o pedido e a execução
+        self.dados.aplicar(consultar_lista, filtro, list(self._despesas_historico),
+                           ao_concluir=lambda resposta: self._exibir_lista(resposta, pedido))
+    
+    @instrumentado("tela.lista")
+    def _exibir_lista(self, resposta, pedido):
+        gerenciador, filtro, despesas, excluidas = resposta
+        if gerenciador is not self.gerenciador:
+            return  # consulta feita no perfil anterior (ou já no novo, antes de a tela saber)
+        if filtro != self._filtro_exibido or self._texto_busca:
+            return  # filtro trocado ou busca iniciada enquanto consultava
+        self._despesas_historico = [d for d in self._despesas_historico
+                                    if d.id not in excluidas]
         
-        # Adicionar despesas
-        for despesa in despesas:
-            dias = self.gerenciador.dias_para_vencimento(despesa)
-            
-            # Cor baseada no status e vencimento
-            if despesa.status == StatusDespesa.PAGA:
-                cor_status = get_color_from_hex("#4CAF50")
-                texto_status = "✓ Paga"
-            elif dias < 0:
-                cor_status = get_color_from_hex("#FF5252")
-                texto_status = f"Vencida ({abs(dias)} dias)"
-            elif dias <= 3:
-                cor_status = get_color_from_hex("#FF9800")
-                texto_status = f"Vence em {dias} dias"
-            else:
-                cor_status = get_color_from_hex("#2196F3")
-                texto_status = f"Vence em {dias} dias"
-            
-            self.ids.lista_despesas.data.append({
-                'id': despesa.id,
-                'nome': despesa.nome,
-                'valor': self.gerenciador.formatar_moeda(despesa.valor),
-                'vencimento': despesa.vencimento.strftime("%d/%m/%Y"),
-                'categoria': despesa.categoria.value,
-                'status': texto_status,
-                'cor_status': cor_status,
-                'selecionada': False
-            })
+        # Linhas vêm do cache; só a selecionada ganha uma cópia marcada
+        self.ids.lista_despesas.atualizar_dados(
+            self._linhas(despesas + self._despesas_historico))
+        if instrumentacao.ATIVA:
+            # Do pedido à lista na tela, com a espera na fila da thread de dados
+            registrar_latencia("tela.lista.total", time.perf_counter() - pedido)
+    
+    def _linhas(self, despesas):
+        linhas = self._cache_linhas.obter_varias(despesas)
+        if self.despesa_selecionada is not None:
+            for posicao, linha in enumerate(linhas):
+                if linha['id_despesa'] == self.despesa_selecionada:
+                    linhas[posicao] = dict(linha, selecionada=True)
+        return linhas
+    
+    def _montar_linha(self, despesa, valor=None):
+        """
+        Dados de uma linha da lista para a despesa (sem seleção); valor é o
+        valor já formatado, quando vem de uma formatação em lote.
+        """
+        dias = self.gerenciador.dias_para_vencimento(despesa)
+        
+        # Cor baseada no status e vencimento
+        if despesa.status == StatusDespesa.PAGA:
+            cor_status = get_color_from_hex("#4CAF50")
+            texto_status = "✓ Paga"
+        elif dias < 0:
+            cor_status = get_color_from_hex("#FF5252")
+            texto_status = f"Vencida ({abs(dias)} dias)"
+        elif dias <= 3:
+            cor_status = get_color_from_hex("#FF9800")
+            texto_status = f"Vence em {dias} dias"
+        else:
+            cor_status = get_color_from_hex("#2196F3")
+            texto_status = f"Vence em {dias} dias"
+        
+        return {
+            'id_despesa': despesa.id,
+            'nome': despesa.nome,
+            'valor': valor if valor is not None else self.gerenciador.formatar_moeda(despesa.valor),
+            'vencimento': despesa.vencimento.strftime("%d/%m/%Y"),
+            'categoria': despesa.categoria.value,
+            'status': texto_status,
+            'cor_status': cor_status,
+            'selecionada': False
+        }
+    
+    def ao_digitar_busca(self, texto):
+        """Agenda a busca para quando o usuário parar de digitar"""
+        if self._evento_busca is not None:
+            self._evento_busca.cancel()
+        self._evento_busca = Clock.schedule_once(
+            lambda dt: self._iniciar_busca(texto.strip()), self.ATRASO_BUSCA)
+    
+    def _iniciar_busca(self, texto):
+        self._evento_busca = None
+        if texto == self._texto_busca:
+            return
+        self._texto_busca = texto
+        if not texto:
+            # Busca apagada: volta à lista do filtro
+            self._sequencia_busca += 1
+            self._buscando = False
+            self._filtro_exibido = None
+            self.atualizar_lista()
+            return
+        self._buscar(texto, 0)
+    
+    def _buscar(self, texto, pagina):
+        """Busca na thread de dados (a primeira monta o índice)"""
+        self._sequencia_busca += 1
+        sequencia = self._sequencia_busca
+        self._buscando = True
+        self.dados.chamar('buscar_despesas', texto, pagina,
+                          ao_concluir=lambda resultado: self._exibir_busca(sequencia, resultado))
+    
+    @instrumentado("tela.busca")
+    def _exibir_busca(self, sequencia, resultado):
+        if sequencia != self._sequencia_busca:
+            return  # o texto mudou enquanto buscava
+        self._buscando = False
+        self._resultado_busca = resultado
+        if resultado.pagina == 0:
+            self.ids.lista_despesas.atualizar_dados(self._linhas(resultado.despesas))
+        else:
+            self.ids.lista_despesas.data.extend(self._linhas(resultado.despesas))
+    
+    def ao_rolar_lista(self, scroll_y):
+        """Carrega a próxima página do histórico ao chegar ao fim da lista"""
+        if scroll_y > 0.05:
+            return
+        if self._texto_busca:
+            # Com busca ativa, a próxima página vem da busca
+            if not self._buscando and self._resultado_busca and self._resultado_busca.tem_mais:
+                self._buscar(self._texto_busca, self._resultado_busca.pagina + 1)
+            return
+        if self._filtro_atual() not in ("todas", "pagas"):
+            return
+        if self._carregando_historico:
+            return
+        if self._pagina_historico >= self.gerenciador.paginas_historico:
+            return
+        
+        self._carregando_historico = True
+        filtro = self._filtro_exibido
+        self.dados.chamar('carregar_pagina_historico', self._pagina_historico,
+                          ao_concluir=lambda despesas: self._exibir_pagina_historico(filtro, despesas),
+                          ao_falhar=self._falha_pagina_historico)
+    
+    def _exibir_pagina_historico(self, filtro, despesas):
+        self._carregando_historico = False
+        if filtro != self._filtro_exibido or self._texto_busca:
+            return
+        self._pagina_historico += 1
+        self._despesas_historico.extend(despesas)
+        self.ids.lista_despesas.data.extend(self._linhas(despesas))
+    
+    def _falha_pagina_historico(self, erro):
+        self._carregando_historico = False
+        self.mostrar_erro(erro)
     
     def on_despesa_selecionada(self, id_despesa):
         """Quando uma despesa é selecionada"""
+        self.ids.lista_despesas.marcar_selecao(self.despesa_selecionada, id_despesa)
         self.despesa_selecionada = id_despesa
         self.ids.btn_pagar.disabled = False
         self.ids.btn_excluir.disabled = False
         
         # Verificar se pode pagar
-        despesa = self.gerenciador.get_despesa_por_id(id_despesa)
-        if despesa and despesa.status == StatusDespesa.PAGA:
+        self.dados.chamar('get_despesa_por_id', id_despesa,
+                          ao_concluir=self._conferir_selecionada)
+    
+    def _conferir_selecionada(self, despesa):
+        if despesa and despesa.id == self.despesa_selecionada and despesa.status == StatusDespesa.PAGA:
             self.ids.btn_pagar.disabled = True
     
     def pagar_despesa(self):
@@ -152,16 +464,16 @@ class TelaDespesas(TelaBase):
             self.mostrar_mensagem("Aviso", "Selecione uma despesa primeiro!")
             return
         
-        try:
-            sucesso = self.gerenciador.marcar_despesa_como_paga(self.despesa_selecionada)
-            if sucesso:
-                self.mostrar_mensagem("Sucesso", "Despesa marcada como paga!")
-                self.atualizar_lista()
-                self.limpar_selecao()
-            else:
-                self.mostrar_mensagem("Erro", "Não foi possível pagar a despesa!")
-        except ValueError as e:
-            self.mostrar_mensagem("Erro", str(e))
+        self.dados.chamar('marcar_despesa_como_paga', self.despesa_selecionada,
+                          ao_concluir=self._ao_pagar, ao_falhar=self.mostrar_erro)
+    
+    def _ao_pagar(self, sucesso):
+        if sucesso:
+            self.mostrar_mensagem("Sucesso", "Despesa marcada como paga!")
+            self.atualizar_lista()
+            self.limpar_selecao()
+        else:
+            self.mostrar_mensagem("Erro", "Não foi possível pagar a despesa!")
     
     def excluir_despesa(self):
         """Exclui despesa selecionada"""
@@ -170,13 +482,17 @@ class TelaDespesas(TelaBase):
             return
         
         # TODO: Adicionar confirmação
-        self.gerenciador.excluir_despesa(self.despesa_selecionada)
+        self.dados.chamar('excluir_despesa', self.despesa_selecionada,
+                          ao_concluir=self._ao_excluir, ao_falhar=self.mostrar_erro)
+    
+    def _ao_excluir(self, _):
         self.mostrar_mensagem("Sucesso", "Despesa excluída!")
         self.atualizar_lista()
         self.limpar_selecao()
     
     def limpar_selecao(self):
         """Limpa a seleção atual"""
+        self.ids.lista_despesas.marcar_selecao(self.despesa_selecionada, None)
         self.despesa_selecionada = None
         self.ids.btn_pagar.disabled = True
         self.ids.btn_excluir.disabled = True
@@ -184,6 +500,12 @@ class TelaDespesas(TelaBase):
 class TelaNovaDespesa(TelaBase):
     """Tela para adicionar nova despesa"""
     
+    # Texto do spinner de repetição -> frequência da recorrência
+    REPETICOES = {
+        "Mensal": Frequencia.MENSAL,
+        "Semanal": Frequencia.SEMANAL,
+    }
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         Clock.schedule_once(self._configurar_data, 0.5)
@@ -200,6 +522,7 @@ class TelaNovaDespesa(TelaBase):
         valor_texto = self.ids.valor_input.text.strip()
         data_texto = self.ids.data_input.text.strip()
         categoria = self.ids.categoria_spinner.text
+        repeticao = self.REPETICOES.get(self.ids.repeticao_spinner.text)
         
         # Validar
         if not nome:
@@ -231,25 +554,75 @@ class TelaNovaDespesa(TelaBase):
             else:
                 categoria_enum = CategoriaDespesa.VARIAVEL
             
-            # Adicionar despesa
-            self.gerenciador.adicionar_despesa(nome, valor, data, categoria_enum)
-            
-            # Limpar campos
-            self.ids.nome_input.text = ""
-            self.ids.valor_input.text = ""
-            hoje = datetime.now()
-            self.ids.data_input.text = hoje.strftime("%d/%m/%Y")
-            
-            self.mostrar_mensagem("Sucesso", "Despesa adicionada com sucesso!")
-            
-            # Voltar para tela de despesas
-            self.manager.current = 'despesas'
+            # Adicionar despesa (ou a regra, se ela se repete)
+            if repeticao:
+                self.dados.chamar('adicionar_recorrencia', nome, valor, data, repeticao,
+                                  categoria=categoria_enum,
+                                  ao_concluir=self._ao_adicionar, ao_falhar=self._valor_invalido)
+            else:
+                self.dados.chamar('adicionar_despesa', nome, valor, data, categoria_enum,
+                                  ao_concluir=self._ao_adicionar, ao_falhar=self._valor_invalido)
             
         except ValueError as e:
-            self.mostrar_mensagem("Erro", f"Valor inválido!\n{str(e)}")
+            self._valor_invalido(e)
+    
+    def _ao_adicionar(self, _):
+        # Limpar campos
+        self.ids.nome_input.text = ""
+        self.ids.valor_input.text = ""
+        self.ids.repeticao_spinner.text = "Não repete"
+        hoje = datetime.now()
+        self.ids.data_input.text = hoje.strftime("%d/%m/%Y")
+        
+        self.mostrar_mensagem("Sucesso", "Despesa adicionada com sucesso!")
+        
+        # Voltar para tela de despesas
+        self.manager.current = 'despesas'
+    
+    def _valor_invalido(self, erro):
+        self.mostrar_mensagem("Erro", f"Valor inválido!\n{str(erro)}")
 
 class TelaSaldo(TelaBase):
-    """Tela para gerenciar saldo"""
+    """Tela para gerenciar saldo e o perfil (carteira) em uso"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._perfis_por_nome = {}
+    
+    def on_pre_enter(self):
+        self.atualizar_perfis()
+    
+    def atualizar_perfis(self):
+        """Preenche o seletor de perfis, com o ativo selecionado"""
+        perfis = App.get_running_app().perfis
+        if perfis is None:
+            return
+        self.dados.executar(lambda: (perfis.perfis, perfis.id_ativo),
+                            ao_concluir=self._exibir_perfis)
+    
+    def _exibir_perfis(self, resposta):
+        perfis, id_ativo = resposta
+        self._perfis_por_nome = {perfil.nome: perfil.id for perfil in perfis}
+        self.ids.spinner_perfil.values = list(self._perfis_por_nome)
+        self.ids.spinner_perfil.text = next(perfil.nome for perfil in perfis
+                                            if perfil.id == id_ativo)
+    
+    def selecionar_perfil(self, nome):
+        """Perfil escolhido no seletor (trocar o texto pelo código também passa aqui)"""
+        id_perfil = self._perfis_por_nome.get(nome)
+        app = App.get_running_app()
+        if id_perfil is not None and id_perfil != app.perfis.id_ativo:
+            app.trocar_perfil(id_perfil)
+    
+    def criar_perfil(self):
+        """Cria um perfil com o nome digitado e passa a usá-lo"""
+        app = App.get_running_app()
+        self.dados.executar(app.perfis.criar_perfil, self.ids.perfil_input.text,
+                            ao_concluir=self._perfil_criado, ao_falhar=self.mostrar_erro)
+    
+    def _perfil_criado(self, perfil):
+        self.ids.perfil_input.text = ""
+        App.get_running_app().trocar_perfil(perfil.id)
     
     def atualizar_saldo(self):
         """Atualiza o saldo com valor digitado"""
@@ -261,16 +634,12 @@ class TelaSaldo(TelaBase):
         
         try:
             valor = float(valor_texto.replace(",", "."))
-            self.gerenciador.definir_saldo(valor)
-            self.mostrar_mensagem("Sucesso", "Saldo atualizado com sucesso!")
-            self.ids.saldo_input.text = ""
-            
-            # Atualizar tela de resumo
-            tela_resumo = self.manager.get_screen('resumo')
-            tela_resumo.atualizar_resumo()
-            
         except ValueError:
             self.mostrar_mensagem("Erro", "Digite um valor válido!")
+            return
+        
+        self.dados.chamar('definir_saldo', valor, ao_falhar=self.mostrar_erro,
+                          ao_concluir=lambda _: self._saldo_alterado("Saldo atualizado com sucesso!"))
     
     def adicionar_saldo(self):
         """Adiciona valor ao saldo atual"""
@@ -282,22 +651,58 @@ class TelaSaldo(TelaBase):
         
         try:
             valor = float(valor_texto.replace(",", "."))
-            self.gerenciador.adicionar_saldo(valor)
-            self.mostrar_mensagem("Sucesso", f"R$ {valor:.2f} adicionados ao saldo!")
-            self.ids.saldo_input.text = ""
-            
-            # Atualizar tela de resumo
-            tela_resumo = self.manager.get_screen('resumo')
-            tela_resumo.atualizar_resumo()
-            
         except ValueError:
             self.mostrar_mensagem("Erro", "Digite um valor válido!")
+            return
+        
+        self.dados.chamar('adicionar_saldo', valor, ao_falhar=self.mostrar_erro,
+                          ao_concluir=lambda _: self._saldo_alterado(
+                              f"R$ {valor:.2f} adicionados ao saldo!"))
+    
+    def _saldo_alterado(self, mensagem):
+        self.mostrar_mensagem("Sucesso", mensagem)
+        self.ids.saldo_input.text = ""
+        
+        # Atualizar tela de resumo
+        tela_resumo = self.manager.get_screen('resumo')
+        tela_resumo.atualizar_resumo()
+
+class TelaDepuracao(TelaBase):
+    """Tela escondida com as medições da instrumentação (toque duplo no título)"""
+    
+    def on_pre_enter(self):
+        self.atualizar()
+    
+    def atualizar(self):
+        self.ids.lbl_relatorio.text = instrumentacao.formatar_relatorio()
+    
+    def limpar(self):
+        instrumentacao.limpar()
+        self.atualizar()
 
 class GerenciadorTelas(ScreenManager):
-    """Gerenciador de telas do aplicativo"""
-    pass
+    """
+    Gerenciador de telas do aplicativo. Só o resumo existe na abertura; as
+    outras telas (e seus arquivos .kv) são criadas na primeira navegação.
+    """
+    
+    # Nome da tela -> (classe, arquivo kv)
+    TELAS_ADIADAS = {
+        'despesas': (TelaDespesas, 'trimoney_despesas.kv'),
+        'nova_despesa': (TelaNovaDespesa, 'trimoney_nova_despesa.kv'),
+        'saldo': (TelaSaldo, 'trimoney_saldo.kv'),
+        'depuracao': (TelaDepuracao, 'trimoney_depuracao.kv'),
+    }
+    
+    def get_screen(self, name):
+        """Tela pelo nome, criando-a se ainda não existir (usado também por `current`)"""
+        if name in self.TELAS_ADIADAS and not self.has_screen(name):
+            classe, arquivo = self.TELAS_ADIADAS[name]
+            Builder.load_file(arquivo)
+            self.add_widget(classe(name=name))
+        return super().get_screen(name)
 
-class ItemDespesa(BoxLayout):
+class ItemDespesa(RecycleDataViewBehavior, BoxLayout):
     """Item individual da lista de despesas"""
     id_despesa = NumericProperty(0)
     nome = StringProperty("")
@@ -307,13 +712,66 @@ class ItemDespesa(BoxLayout):
     status = StringProperty("")
     cor_status = ObjectProperty(get_color_from_hex("#2196F3"))
     selecionada = BooleanProperty(False)
+    
+    def on_touch_down(self, touch):
+        """Seleciona a despesa ao tocar no item"""
+        if self.collide_point(*touch.pos):
+            tela = App.get_running_app().root.get_screen('despesas')
+            tela.on_despesa_selecionada(self.id_despesa)
+            return True
+        return super().on_touch_down(touch)
 
 class ListaDespesas(RecycleView):
     """Lista de despesas com seleção"""
     
+    # Acima desta fração de linhas alteradas, trocar a lista inteira é mais barato
+    LIMITE_ATUALIZACAO_PARCIAL = 0.25
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.data = []
+    
+    def atualizar_dados(self, novas):
+        """
+        Substitui os dados da lista atualizando só as linhas que mudaram.
+        
+        Cada alteração em self.data dispara um refresh; por isso linhas
+        alteradas são trocadas uma a uma só quando são poucas, uma única
+        exclusão vira um único del, e qualquer outra mudança é aplicada
+        numa única atribuição.
+        """
+        antigas = self.data
+        
+        if len(novas) == len(antigas) - 1:
+            # Uma linha removida (despesa excluída ou fora do filtro)
+            removida = next(
+                (i for i, (antiga, nova) in enumerate(zip(antigas, novas))
+                 if antiga['id_despesa'] != nova['id_despesa']),
+                len(novas)
+            )
+            if all(antiga['id_despesa'] == nova['id_despesa']
+                   for antiga, nova in zip(antigas[removida + 1:], novas[removida:])):
+                del antigas[removida]
+        
+        if len(novas) != len(antigas) or any(
+                antiga['id_despesa'] != nova['id_despesa']
+                for antiga, nova in zip(antigas, novas)):
+            self.data = novas
+            return
+        
+        alteradas = [i for i, (antiga, nova) in enumerate(zip(antigas, novas)) if antiga != nova]
+        if len(alteradas) > len(novas) * self.LIMITE_ATUALIZACAO_PARCIAL:
+            self.data = novas
+            return
+        for i in alteradas:
+            antigas[i] = novas[i]
+    
+    def marcar_selecao(self, id_anterior, id_novo):
+        """Atualiza o destaque de seleção só nas duas linhas envolvidas"""
+        for i, linha in enumerate(self.data):
+            selecionada = linha['id_despesa'] == id_novo
+            if linha['selecionada'] != selecionada:
+                self.data[i] = dict(linha, selecionada=selecionada)
 
 class TrimoneyApp(App):
     """Aplicativo principal"""
@@ -321,14 +779,26 @@ class TrimoneyApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.gerenciador = None
+        self.dados = None
         self.dialogo = None
+        self.tempo_inicio = None  # segundos do início do processo ao primeiro quadro
+        self.perfis = None
     
     def build(self):
         """Constrói a interface do aplicativo"""
+        from kivy.core.window import Window
+        
         self.title = "TRIMONEY"
+        instrumentacao.iniciar_captura()
+        Builder.load_file('trimoney.kv')
         
-        # Inicializar gerenciador financeiro
-        self.gerenciador = GerenciadorFinanceiro()
+        # Inicializar gerenciador financeiro do perfil ativo, o único carregado
+        # (pagas antigas ficam no histórico, gravação em segundo plano fora da
+        # thread da interface)
+        self.perfis = RegistroPerfis(sob_demanda=True, gravacao_adiada=0.5)
+        self.gerenciador = self.perfis.gerenciador
+        self.dados = GerenciadorAssincrono(self.gerenciador)
+        self.dados.executar(instrumentacao.iniciar_captura)  # e na thread de dados
         
         # Configurar cores da janela
         Window.clearcolor = get_color_from_hex("#1A1A2E")
@@ -337,19 +807,47 @@ class TrimoneyApp(App):
         sm = GerenciadorTelas()
         sm.transition = SlideTransition()
         
-        # Adicionar telas
+        # Só o resumo agora; as outras telas na primeira navegação. O
+        # resumo é calculado na thread de dados, depois do primeiro quadro
         sm.add_widget(TelaResumo(name='resumo'))
-        sm.add_widget(TelaDespesas(name='despesas'))
-        sm.add_widget(TelaNovaDespesa(name='nova_despesa'))
-        sm.add_widget(TelaSaldo(name='saldo'))
         
+        Window.bind(on_flip=self._primeiro_quadro)
         return sm
     
+    def _primeiro_quadro(self, window):
+        """Registra o tempo de abertura (TRIMONEY_MEDIR_INICIO=1: imprime e fecha)"""
+        window.unbind(on_flip=self._primeiro_quadro)
+        self.tempo_inicio = time.perf_counter() - _INICIO
+        if os.environ.get('TRIMONEY_MEDIR_INICIO'):
+            print(f"inicio: {self.tempo_inicio * 1000:.1f}ms", flush=True)
+            Clock.schedule_once(lambda dt: self.stop())
+        if instrumentacao.ATIVA:
+            registrar_latencia("inicio", self.tempo_inicio)
+    
+    def trocar_perfil(self, id_perfil):
+        """Fecha o perfil atual e abre outro, na thread de dados"""
+        self.dados.trocar_gerenciador(self.perfis.trocar_perfil, id_perfil,
+                                      ao_concluir=self._perfil_trocado,
+                                      ao_falhar=lambda erro: self.mostrar_dialogo(
+                                          "Erro", str(erro), "erro"))
+    
+    def _perfil_trocado(self, gerenciador):
+        self.gerenciador = gerenciador
+        for tela in self.root.screens:
+            tela.perfil_trocado(gerenciador)
+        self.root.current = 'resumo'
+        self.root.get_screen('resumo').atualizar_resumo()
+    
+    def ao_tocar_titulo(self, titulo, toque):
+        """Toque duplo no título abre a tela de depuração"""
+        if toque.is_double_tap and titulo.collide_point(*toque.pos):
+            self.root.current = 'depuracao'
+    
     def mostrar_dialogo(self, titulo: str, mensagem: str, tipo: str = "info"):
         """Mostra diálogo de mensagem"""
         from kivy.uix.popup import Popup
         from kivy.uix.label import Label
-        from kivy.uix.boxlayout import BoxLayout
+        from kivy.uix.button import Button
         
         # Criar conteúdo
         content = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
@@ -385,19 +883,26 @@ class TrimoneyApp(App):
     def on_pause(self):
         """Chamado quando o app vai para segundo plano"""
         if self.gerenciador:
-            self.gerenciador.salvar_dados()
+            # Grava a fila da gravação adiada e compacta, depois das
+            # mutações ainda na fila, antes de o sistema poder encerrar o app
+            # (e guarda o resumo do perfil para o consolidado)
+            self.dados.executar(self.perfis.salvar)
+            self.dados.aguardar()
         return True
     
     def on_resume(self):
         """Chamado quando o app volta ao primeiro plano"""
         if self.gerenciador:
-            self.gerenciador.carregar_dados()
+            self.dados.chamar('carregar_dados')
         return True
     
     def on_stop(self):
         """Chamado quando o app é fechado"""
         if self.gerenciador:
-            self.gerenciador.salvar_dados()
+            self.dados.executar(self.perfis.fechar)
+            self.dados.executar(instrumentacao.parar_captura)
+            self.dados.encerrar()
+            instrumentacao.encerrar_captura(self.perfis.data_dir)
 
 if __name__ == '__main__':
     TrimoneyApp().run()
\ No newline at end of file
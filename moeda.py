@@ -0,0 +1,68 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Formatação de valores em reais (R$ 1.234,56) a partir de centavos inteiros
+"""
+
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+# ",00" ... ",99"
+_SUFIXOS_CENTAVOS = tuple(f",{centavos:02d}" for centavos in range(100))
+
+# Acima disso (em centavos) o valor*100 em float já pode errar mais que 0,01
+_LIMITE_CENTAVOS = 2.0 ** 43
+# Distância até o meio centavo abaixo da qual o arredondamento fica ambíguo
+_MARGEM_MEIO = 0.01
+
+
+def _formatar_original(valor: float) -> str:
+    """Formatação de referência (e fallback para os casos ambíguos)"""
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def formatar_centavos(centavos: int) -> str:
+    """Formata um valor em centavos inteiros como moeda brasileira"""
+    if 0 <= centavos < 100_000:
+        return "R$ " + str(centavos // 100) + _SUFIXOS_CENTAVOS[centavos % 100]
+    reais, resto = divmod(abs(centavos), 100)
+    sinal = "R$ -" if centavos < 0 else "R$ "
+    return sinal + f"{reais:,}".replace(",", ".") + _SUFIXOS_CENTAVOS[resto]
+
+
+def _centavos_exatos(valor: float) -> Optional[int]:
+    """
+    Centavos que o f-string ".2f" produziria para o valor, ou None quando
+    só a formatação original decide (perto de meio centavo, grandes, nan/inf).
+    """
+    escalado = valor * 100
+    if not -_LIMITE_CENTAVOS < escalado < _LIMITE_CENTAVOS:
+        return None
+    centavos = round(escalado)
+    if abs(abs(escalado - centavos) - 0.5) < _MARGEM_MEIO:
+        return None
+    if centavos == 0 and valor < 0:
+        return None  # "-0,00"
+    return centavos
+
+
+@lru_cache(maxsize=4096)
+def _formatar_diferente_de_zero(valor: float) -> str:
+    centavos = _centavos_exatos(valor)
+    if centavos is None:
+        return _formatar_original(valor)
+    return formatar_centavos(centavos)
+
+
+def formatar_moeda(valor: float) -> str:
+    """Formata valor como moeda brasileira (mesma saída do f-string original)"""
+    if not valor:
+        # 0.0 e -0.0 são a mesma chave no cache, mas formatam diferente
+        return _formatar_original(valor)
+    return _formatar_diferente_de_zero(valor)
+
+
+def formatar_moedas(valores: Iterable[float]) -> List[str]:
+    """Formata uma coluna inteira de valores de uma vez (ex.: a lista de despesas)"""
+    formatar = _formatar_diferente_de_zero
+    original = _formatar_original
+    return [formatar(valor) if valor else original(valor) for valor in valores]
@@ -0,0 +1,283 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Perfis (carteiras): um armazenamento por perfil e um registro com o resumo de cada um
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from financeiro import GerenciadorFinanceiro, diretorio_dados_padrao
+from indices import para_centavos, para_reais
+
+ARQUIVO_REGISTRO = "trimoney_perfis.json"
+PASTA_PERFIS = "perfis"
+
+# Resumo de um perfil sem despesas nem saldo (mesmas chaves de calcular_resumo)
+RESUMO_VAZIO: Dict[str, float] = {
+    'saldo_atual': 0.0, 'total_gasto': 0.0, 'total_pendente': 0.0, 'saldo_final': 0.0,
+    'total_vencidas': 0.0, 'total_proximas': 0.0, 'num_vencidas': 0, 'num_proximas': 0,
+}
+
+
+@dataclass
+class Perfil:
+    id: int
+    nome: str
+    pasta: str  # relativa ao diretório do registro; "" é o próprio diretório
+    resumo: Optional[Dict[str, float]] = None  # último calcular_resumo guardado
+    data_resumo: Optional[str] = None  # dia (AAAA-MM-DD) em que foi calculado
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'pasta': self.pasta,
+            'resumo': self.resumo,
+            'data_resumo': self.data_resumo,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Perfil':
+        return cls(
+            id=data['id'],
+            nome=data['nome'],
+            pasta=data['pasta'],
+            resumo=data.get('resumo'),
+            data_resumo=data.get('data_resumo'),
+        )
+
+
+def somar_resumos(resumos: List[Dict[str, float]]) -> Dict[str, float]:
+    """Soma campo a campo; os valores em reais são somados em centavos (exatos)"""
+    consolidado: Dict[str, float] = {}
+    for campo, vazio in RESUMO_VAZIO.items():
+        if isinstance(vazio, int):
+            consolidado[campo] = sum(resumo.get(campo, 0) for resumo in resumos)
+        else:
+            consolidado[campo] = para_reais(sum(para_centavos(resumo.get(campo, 0.0))
+                                                for resumo in resumos))
+    return consolidado
+
+
+class RegistroPerfis:
+    """
+    Perfis (carteiras, membros da casa) de um mesmo diretório de dados.
+
+    Cada perfil tem a própria pasta, com o armazenamento inteiro de um
+    GerenciadorFinanceiro, e o registro (trimoney_perfis.json) guarda só
+    a lista de perfis, o ativo e o último resumo de cada um. Só o perfil
+    ativo fica aberto: trocar de perfil salva e fecha o atual e carrega
+    apenas a pasta do outro, então carga e gravação não crescem com a
+    quantidade de perfis.
+
+    O resumo de um perfil é guardado no registro ao sair dele (e em
+    salvar). Um perfil só muda enquanto está aberto, então os totais
+    guardados continuam exatos; só vencidas e próximas refletem o dia em
+    que foram calculados (data_resumo). O resumo consolidado soma os
+    guardados com o do perfil ativo, sem abrir as outras pastas.
+
+    Os dados que já estavam no diretório viram o perfil 1, sem mover
+    arquivos. As opções extras são repassadas a cada GerenciadorFinanceiro
+    (sob_demanda, gravacao_adiada, ...). Os métodos devem ser chamados da
+    thread de dados (ver assincrono.py).
+    """
+
+    def __init__(self, data_dir: Optional[str] = None, **opcoes):
+        self.data_dir = Path(data_dir) if data_dir else diretorio_dados_padrao()
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.arquivo = self.data_dir / ARQUIVO_REGISTRO
+        self._opcoes = opcoes
+        self._trava = threading.RLock()
+        self._perfis: Dict[int, Perfil] = {}
+        self.id_ativo = 1
+        self.proximo_id = 2
+        self._gerenciador: Optional[GerenciadorFinanceiro] = None
+        self._carregar()
+
+    def _carregar(self) -> None:
+        try:
+            if self.arquivo.exists():
+                dados = json.loads(self.arquivo.read_text(encoding='utf-8'))
+                self._perfis = {perfil['id']: Perfil.from_dict(perfil)
+                                for perfil in dados.get('perfis', [])}
+                self.id_ativo = dados.get('ativo', 1)
+                self.proximo_id = dados.get('proximo_id', 2)
+        except Exception as e:
+            print(f"Erro ao carregar perfis: {e}")
+            self._perfis = self._perfis_das_pastas()
+        if not self._perfis:
+            self._perfis = {1: Perfil(1, "Principal", "")}
+        if self.id_ativo not in self._perfis:
+            self.id_ativo = min(self._perfis)
+        # Ids não se repetem: nem os do registro nem os de pastas excluídas
+        self.proximo_id = max(self.proximo_id, max(self._perfis) + 1,
+                              self._maior_id_em_pasta() + 1)
+
+    def _maior_id_em_pasta(self) -> int:
+        """Maior id entre as pastas de perfis, inclusive as excluídas (<id>.excluido...)"""
+        pasta_perfis = self.data_dir / PASTA_PERFIS
+        if not pasta_perfis.is_dir():
+            return 0
+        ids = [int(pasta.name.split('.')[0]) for pasta in pasta_perfis.iterdir()
+               if pasta.is_dir() and pasta.name.split('.')[0].isdigit()]
+        return max(ids, default=0)
+
+    def _perfis_das_pastas(self) -> Dict[int, Perfil]:
+        """Registro ilegível: refaz a lista pelas pastas (nomes e resumos se perdem)"""
+        perfis = {1: Perfil(1, "Principal", "")}
+        pasta_perfis = self.data_dir / PASTA_PERFIS
+        if pasta_perfis.is_dir():
+            for pasta in pasta_perfis.iterdir():
+                if pasta.is_dir() and pasta.name.isdigit():
+                    id_perfil = int(pasta.name)
+                    perfis[id_perfil] = Perfil(id_perfil, f"Perfil {id_perfil}",
+                                               f"{PASTA_PERFIS}/{pasta.name}")
+        return perfis
+
+    def _gravar(self) -> None:
+        """Grava o registro via arquivo temporário + rename"""
+        dados = {
+            'ativo': self.id_ativo,
+            'proximo_id': self.proximo_id,
+            'perfis': [perfil.to_dict() for perfil in self.perfis],
+        }
+        temporario = self.arquivo.with_name(self.arquivo.name + '.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.arquivo)
+
+    @property
+    def perfis(self) -> List[Perfil]:
+        return sorted(self._perfis.values(), key=lambda perfil: perfil.id)
+
+    @property
+    def perfil_ativo(self) -> Perfil:
+        return self._perfis[self.id_ativo]
+
+    def pasta(self, perfil: Perfil) -> Path:
+        return self.data_dir / perfil.pasta if perfil.pasta else self.data_dir
+
+    @property
+    def gerenciador(self) -> GerenciadorFinanceiro:
+        """Gerenciador do perfil ativo, aberto na primeira vez que é pedido"""
+        with self._trava:
+            if self._gerenciador is None:
+                self._gerenciador = GerenciadorFinanceiro(self.pasta(self.perfil_ativo),
+                                                          **self._opcoes)
+            return self._gerenciador
+
+    def _nome_livre(self, nome: str, exceto: Optional[int] = None) -> str:
+        nome = nome.strip()
+        if not nome:
+            raise ValueError("Digite um nome para o perfil!")
+        if any(perfil.nome.casefold() == nome.casefold() and perfil.id != exceto
+               for perfil in self._perfis.values()):
+            raise ValueError(f"Já existe um perfil chamado {nome}")
+        return nome
+
+    def criar_perfil(self, nome: str) -> Perfil:
+        """Cria um perfil vazio, com pasta própria (não muda o ativo)"""
+        with self._trava:
+            nome = self._nome_livre(nome)
+            id_perfil = self.proximo_id
+            self.proximo_id += 1
+            perfil = Perfil(id_perfil, nome, f"{PASTA_PERFIS}/{id_perfil}",
+                            dict(RESUMO_VAZIO), date.today().isoformat())
+            self.pasta(perfil).mkdir(parents=True, exist_ok=True)
+            self._perfis[id_perfil] = perfil
+            self._gravar()
+            return perfil
+
+    def renomear_perfil(self, id_perfil: int, nome: str) -> None:
+        with self._trava:
+            self._perfis[id_perfil].nome = self._nome_livre(nome, exceto=id_perfil)
+            self._gravar()
+
+    def excluir_perfil(self, id_perfil: int) -> None:
+        """
+        Remove o perfil do registro; a pasta dele é mantida como backup
+        (<pasta>.excluido). O perfil ativo e o original não são excluídos.
+        """
+        with self._trava:
+            perfil = self._perfis[id_perfil]
+            if id_perfil == self.id_ativo:
+                raise ValueError("Troque de perfil antes de excluir este")
+            if not perfil.pasta:
+                raise ValueError("O perfil original não pode ser excluído")
+            pasta = self.pasta(perfil)
+            if pasta.exists():
+                backup = pasta.with_name(pasta.name + '.excluido')
+                numero = 1
+                while backup.exists():
+                    numero += 1
+                    backup = pasta.with_name(f"{pasta.name}.excluido{numero}")
+                pasta.rename(backup)
+            del self._perfis[id_perfil]
+            self._gravar()
+
+    def trocar_perfil(self, id_perfil: int) -> GerenciadorFinanceiro:
+        """Salva e fecha o perfil ativo e abre só a pasta de `id_perfil`"""
+        with self._trava:
+            if id_perfil not in self._perfis:
+                raise ValueError(f"Perfil {id_perfil} não existe")
+            if id_perfil != self.id_ativo:
+                self.fechar()
+                self.id_ativo = id_perfil
+                self._gravar()
+            return self.gerenciador
+
+    def guardar_resumo(self) -> Dict[str, float]:
+        """Guarda no registro o resumo atual do perfil ativo e o retorna"""
+        with self._trava:
+            resumo = self.gerenciador.calcular_resumo()
+            perfil = self.perfil_ativo
+            if resumo != perfil.resumo:
+                perfil.resumo = resumo
+                perfil.data_resumo = date.today().isoformat()
+                self._gravar()
+            return resumo
+
+    def salvar(self) -> None:
+        """Compacta o perfil ativo e guarda o resumo dele (app indo para segundo plano)"""
+        with self._trava:
+            if self._gerenciador is not None:
+                self._gerenciador.salvar_dados()
+                self.guardar_resumo()
+
+    def fechar(self) -> None:
+        """Salva e fecha o perfil ativo (é reaberto no próximo acesso a gerenciador)"""
+        with self._trava:
+            if self._gerenciador is not None:
+                self.salvar()
+                self._gerenciador.armazenamento.fechar()
+                self._gerenciador = None
+
+    def _resumo_guardado(self, perfil: Perfil) -> Dict[str, float]:
+        """Resumo guardado; sem ele (registro refeito), abre a pasta uma única vez"""
+        if perfil.resumo is None:
+            gerenciador = GerenciadorFinanceiro(self.pasta(perfil), **self._opcoes)
+            perfil.resumo = gerenciador.calcular_resumo()
+            perfil.data_resumo = date.today().isoformat()
+            gerenciador.armazenamento.fechar()
+            self._gravar()
+        return perfil.resumo
+
+    def resumos(self) -> List[Tuple[Perfil, Dict[str, float]]]:
+        """(perfil, resumo) de cada perfil: o ativo calculado agora, os outros guardados"""
+        with self._trava:
+            return [(perfil, self.gerenciador.calcular_resumo() if perfil.id == self.id_ativo
+                     else self._resumo_guardado(perfil))
+                    for perfil in self.perfis]
+
+    def resumo_consolidado(self) -> Dict[str, float]:
+        """Soma dos resumos de todos os perfis, com a quantidade de perfis em 'perfis'"""
+        consolidado = somar_resumos([resumo for _, resumo in self.resumos()])
+        consolidado['perfis'] = len(self._perfis)
+        return consolidado
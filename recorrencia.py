@@ -0,0 +1,122 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Despesas recorrentes: regras e ocorrências geradas sob demanda
+"""
+
+from calendar import monthrange
+from dataclasses import dataclass, field
+from datetime import date
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class Frequencia(str, Enum):
+    MENSAL = "Mensal"
+    SEMANAL = "Semanal"
+    DIAS = "Dias"  # a cada `intervalo` dias
+
+
+@dataclass
+class RegraRecorrencia:
+    """
+    Regra de uma despesa que se repete (ex.: aluguel todo dia 10).
+
+    As ocorrências não são gravadas: são calculadas a partir da regra para a
+    janela consultada. Só as ocorrências já tratadas ficam registradas, em
+    `tratadas` (dia ordinal -> id da despesa gravada ao pagá-la, ou 0 se a
+    ocorrência foi excluída).
+    """
+    id: int
+    nome: str
+    centavos: int
+    categoria: str
+    inicio: date
+    frequencia: Frequencia
+    intervalo: int = 1
+    fim: Optional[date] = None
+    tratadas: Dict[int, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário para serialização"""
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'valor': self.centavos / 100,
+            'categoria': self.categoria,
+            'inicio': self.inicio.isoformat(),
+            'frequencia': self.frequencia.value,
+            'intervalo': self.intervalo,
+            'fim': self.fim.isoformat() if self.fim else None,
+            'tratadas': {date.fromordinal(dia).isoformat(): id_despesa
+                         for dia, id_despesa in sorted(self.tratadas.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RegraRecorrencia':
+        """Cria RegraRecorrencia a partir de dicionário"""
+        return cls(
+            id=data['id'],
+            nome=data['nome'],
+            centavos=round(data['valor'] * 100),
+            categoria=data['categoria'],
+            inicio=date.fromisoformat(data['inicio']),
+            frequencia=Frequencia(data['frequencia']),
+            intervalo=data.get('intervalo', 1),
+            fim=date.fromisoformat(data['fim']) if data.get('fim') else None,
+            tratadas={date.fromisoformat(dia).toordinal(): id_despesa
+                      for dia, id_despesa in data.get('tratadas', {}).items()},
+        )
+
+    def datas(self, de_dia: Optional[int], ate_dia: int) -> Iterator[int]:
+        """Dias (ordinais) de todas as ocorrências em [de_dia, ate_dia), em ordem"""
+        inicio = self.inicio.toordinal()
+        de_dia = inicio if de_dia is None else max(de_dia, inicio)
+        if self.fim is not None:
+            ate_dia = min(ate_dia, self.fim.toordinal() + 1)
+        if de_dia >= ate_dia:
+            return
+
+        if self.frequencia == Frequencia.MENSAL:
+            # Mesmo dia do mês do início; em meses mais curtos, o último dia
+            de = date.fromordinal(de_dia)
+            meses = (de.year - self.inicio.year) * 12 + de.month - self.inicio.month
+            ocorrencia = max(0, meses // self.intervalo - 1)
+            while True:
+                mes = self.inicio.month - 1 + ocorrencia * self.intervalo
+                ano, mes = self.inicio.year + mes // 12, mes % 12 + 1
+                dia = date(ano, mes, min(self.inicio.day, monthrange(ano, mes)[1])).toordinal()
+                if dia >= ate_dia:
+                    return
+                if dia >= de_dia:
+                    yield dia
+                ocorrencia += 1
+        else:
+            passo = 7 * self.intervalo if self.frequencia == Frequencia.SEMANAL else self.intervalo
+            dia = inicio + -(-(de_dia - inicio) // passo) * passo
+            while dia < ate_dia:
+                yield dia
+                dia += passo
+
+    def pendentes(self, de_dia: Optional[int], ate_dia: int) -> Iterator[int]:
+        """Dias das ocorrências ainda não tratadas (nem pagas nem excluídas)"""
+        tratadas = self.tratadas
+        for dia in self.datas(de_dia, ate_dia):
+            if dia not in tratadas:
+                yield dia
+
+    def ocorre_em(self, dia: int) -> bool:
+        return any(True for _ in self.datas(dia, dia + 1))
+
+
+# Ocorrências ainda não gravadas aparecem como despesas de id negativo,
+# -(dia << 20 | id da regra), para a interface poder selecioná-las
+_BITS_REGRA = 20
+
+
+def id_ocorrencia(id_regra: int, dia: int) -> int:
+    return -(dia << _BITS_REGRA | id_regra)
+
+
+def decodificar_id_ocorrencia(id_despesa: int) -> Tuple[int, int]:
+    """Retorna (id da regra, dia ordinal) de um id de ocorrência"""
+    return -id_despesa & ((1 << _BITS_REGRA) - 1), -id_despesa >> _BITS_REGRA
@@ -0,0 +1,117 @@
+"""
+TRIMONEY - Gerenciador Financeiro Pessoal
+Relatórios por mês e categoria, a partir dos totais mensais materializados
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro, StatusDespesa
+
+# Os períodos são de meses inteiros: `inicio` e `fim` valem pelo mês (inclusive).
+# "Gasto" segue o resumo: por padrão só as despesas pagas; status=None soma todas.
+# Valores em centavos (formatar com moeda.formatar_centavos).
+
+
+@dataclass
+class Tendencia:
+    """Tendência dos gastos mensais no período (valores em centavos)"""
+    media: float  # média por mês
+    inclinacao: float  # variação por mês da reta de regressão
+    variacao: float  # último mês em relação à média dos anteriores (0.1 = +10%)
+
+
+def mes_de(data: date) -> str:
+    """Chave 'AAAA-MM' do mês da data"""
+    return f"{data.year:04d}-{data.month:02d}"
+
+
+def proximo_mes(mes: str) -> str:
+    ano, numero = int(mes[:4]), int(mes[5:7])
+    return f"{ano + numero // 12:04d}-{numero % 12 + 1:02d}"
+
+
+def meses_entre(inicio: date, fim: date) -> List[str]:
+    """Meses de `inicio` a `fim`, inclusive"""
+    meses, mes, ultimo = [], mes_de(inicio), mes_de(fim)
+    while mes <= ultimo:
+        meses.append(mes)
+        mes = proximo_mes(mes)
+    return meses
+
+
+def ultimos_meses(quantidade: int, hoje: Optional[date] = None) -> Tuple[date, date]:
+    """(inicio, fim) dos `quantidade` meses até o atual, para os relatórios"""
+    hoje = hoje or date.today()
+    indice = hoje.year * 12 + hoje.month - 1 - (quantidade - 1)
+    return date(indice // 12, indice % 12 + 1, 1), hoje
+
+
+def _linhas(gerenciador: GerenciadorFinanceiro, inicio: date, fim: date,
+            status: Optional[StatusDespesa]):
+    for linha in gerenciador.totais_mensais(mes_de(inicio), proximo_mes(mes_de(fim))):
+        if status is None or linha[1] == status:
+            yield linha
+
+
+def gastos_por_mes(gerenciador: GerenciadorFinanceiro, inicio: date, fim: date,
+                   status: Optional[StatusDespesa] = StatusDespesa.PAGA,
+                   categoria: Optional[CategoriaDespesa] = None) -> List[Tuple[str, int]]:
+    """(mês, centavos) de cada mês do período, com zero nos meses sem despesas"""
+    totais = dict.fromkeys(meses_entre(inicio, fim), 0)
+    for mes, _, categoria_linha, centavos, _ in _linhas(gerenciador, inicio, fim, status):
+        if categoria is None or categoria_linha == categoria:
+            totais[mes] += centavos
+    return list(totais.items())
+
+
+def gastos_por_categoria(gerenciador: GerenciadorFinanceiro, inicio: date, fim: date,
+                         status: Optional[StatusDespesa] = StatusDespesa.PAGA
+                         ) -> Dict[CategoriaDespesa, int]:
+    """Centavos por categoria no período (todas as categorias, mesmo com zero)"""
+    totais = dict.fromkeys(CategoriaDespesa, 0)
+    for _, _, categoria, centavos, _ in _linhas(gerenciador, inicio, fim, status):
+        totais[categoria] += centavos
+    return totais
+
+
+def gastos_por_mes_e_categoria(gerenciador: GerenciadorFinanceiro, inicio: date, fim: date,
+                               status: Optional[StatusDespesa] = StatusDespesa.PAGA
+                               ) -> List[Tuple[str, Dict[CategoriaDespesa, int]]]:
+    """Para cada mês do período, os centavos por categoria (barras empilhadas)"""
+    totais = {mes: dict.fromkeys(CategoriaDespesa, 0) for mes in meses_entre(inicio, fim)}
+    for mes, _, categoria, centavos, _ in _linhas(gerenciador, inicio, fim, status):
+        totais[mes][categoria] += centavos
+    return list(totais.items())
+
+
+def media_movel(serie: List[Tuple[str, int]], janela: int = 3) -> List[Tuple[str, float]]:
+    """Média móvel dos últimos `janela` meses (menos no começo da série)"""
+    medias, soma = [], 0
+    for posicao, (mes, centavos) in enumerate(serie):
+        soma += centavos
+        if posicao >= janela:
+            soma -= serie[posicao - janela][1]
+        medias.append((mes, soma / min(posicao + 1, janela)))
+    return medias
+
+
+def tendencia(gerenciador: GerenciadorFinanceiro, inicio: date, fim: date,
+              status: Optional[StatusDespesa] = StatusDespesa.PAGA,
+              categoria: Optional[CategoriaDespesa] = None) -> Tendencia:
+    """Média, inclinação (mínimos quadrados) e variação do último mês no período"""
+    valores = [centavos for _, centavos in
+               gastos_por_mes(gerenciador, inicio, fim, status, categoria)]
+    quantidade = len(valores)
+    if not quantidade:
+        return Tendencia(0.0, 0.0, 0.0)
+    media = sum(valores) / quantidade
+    meio = (quantidade - 1) / 2
+    dispersao = sum((posicao - meio) ** 2 for posicao in range(quantidade))
+    inclinacao = (sum((posicao - meio) * (valor - media) for posicao, valor in enumerate(valores))
+                  / dispersao if dispersao else 0.0)
+    anteriores = valores[:-1]
+    media_anteriores = sum(anteriores) / len(anteriores) if anteriores else 0
+    variacao = valores[-1] / media_anteriores - 1 if media_anteriores else 0.0
+    return Tendencia(media, inclinacao, variacao)
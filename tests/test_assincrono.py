@@ -0,0 +1,99 @@
+"""
+TRIMONEY - Testes do acesso assíncrono aos dados
+
+Com a entrega injetada (entregar=), sem Kivy: mutações e consultas
+enfileiradas de várias threads são aplicadas na ordem em que foram
+pedidas, cada consulta vê as mutações pedidas antes dela e as respostas
+são entregues nessa mesma ordem.
+"""
+
+import threading
+
+import pytest
+
+from assincrono import GerenciadorAssincrono
+from financeiro import GerenciadorFinanceiro
+
+THREADS = 8
+PEDIDOS_POR_THREAD = 200
+
+
+@pytest.fixture
+def entregues():
+    return []
+
+
+@pytest.fixture
+def dados(tmp_path, entregues):
+    # list.append é atômico: a entrega só registra o callback, como o Clock
+    assincrono = GerenciadorAssincrono(GerenciadorFinanceiro(tmp_path), entregar=entregues.append)
+    yield assincrono
+    assincrono.encerrar()
+    assincrono.gerenciador.armazenamento.fechar()
+
+
+def depositar(gerenciador, ordem, aplicados):
+    aplicados.append(ordem)
+    gerenciador.adicionar_saldo(0.01)
+
+
+def consultar(gerenciador, ordem, aplicados):
+    aplicados.append(ordem)
+    return ordem, gerenciador.saldo_centavos
+
+
+def falhar(gerenciador):
+    raise ValueError("sem dados")
+
+
+def test_pedidos_de_varias_threads_em_ordem(dados, entregues):
+    aplicados = []  # (thread, número do pedido), na ordem em que rodaram
+    respostas = []
+    largada = threading.Barrier(THREADS)
+
+    def pedir(indice):
+        largada.wait()
+        for numero in range(PEDIDOS_POR_THREAD):
+            if (indice + numero) % 3 == 0:
+                dados.aplicar(consultar, (indice, numero), aplicados,
+                              ao_concluir=respostas.append)
+            else:
+                dados.aplicar(depositar, (indice, numero), aplicados)
+
+    threads = [threading.Thread(target=pedir, args=(indice,)) for indice in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    dados.aguardar()
+    for callback in entregues:
+        callback()
+
+    # Os pedidos de cada thread rodam na ordem em que ela os fez
+    for indice in range(THREADS):
+        assert [numero for thread, numero in aplicados if thread == indice] == list(
+            range(PEDIDOS_POR_THREAD))
+    # Cada consulta vê os depósitos anteriores e as respostas chegam na ordem da fila
+    esperadas = []
+    depositos = 0
+    for indice, numero in aplicados:
+        if (indice + numero) % 3 == 0:
+            esperadas.append(((indice, numero), depositos))
+        else:
+            depositos += 1
+    assert respostas == esperadas
+    assert dados.gerenciador.saldo_centavos == depositos
+
+
+def test_falha_entregue_sem_interromper_a_fila(dados, entregues):
+    respostas = []
+    dados.aplicar(falhar, ao_falhar=lambda erro: respostas.append(str(erro)))
+    dados.chamar('adicionar_saldo', 10.0)
+    futuro = dados.aplicar(lambda gerenciador: gerenciador.saldo_centavos,
+                           ao_concluir=respostas.append)
+
+    assert futuro.result() == 1000
+    dados.aguardar()
+    for callback in entregues:
+        callback()
+    assert respostas == ['sem dados', 1000]
@@ -0,0 +1,45 @@
+"""
+TRIMONEY - Testes do backup
+
+Um backup restaurado e reaberto mantém os próximos ids do original: o id
+de uma despesa ou regra excluída antes do backup não volta a ser usado.
+"""
+
+import io
+from datetime import datetime
+
+import pytest
+
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro
+from recorrencia import Frequencia
+
+
+def adicionar(gerenciador, nome):
+    return gerenciador.adicionar_despesa(nome, 10.0, datetime(2030, 1, 15),
+                                         CategoriaDespesa.FIXA)
+
+
+@pytest.mark.parametrize("armazenamento", ["json", "journal", "sqlite"])
+def test_restaurar_reabrir_e_adicionar_nao_reusa_id(tmp_path, armazenamento):
+    original = GerenciadorFinanceiro(tmp_path / "original", armazenamento=armazenamento)
+    for nome in ("A", "B", "C"):
+        adicionar(original, nome)
+    original.excluir_despesa(3)
+    for nome in ("Aluguel", "Academia"):
+        original.adicionar_recorrencia(nome, 50.0, datetime(2030, 1, 10), Frequencia.MENSAL)
+    original.excluir_recorrencia(2)
+    backup = io.BytesIO()
+    original.criar_backup(backup)
+    original.armazenamento.fechar()
+
+    backup.seek(0)
+    restaurado = GerenciadorFinanceiro(tmp_path / "restaurado", armazenamento=armazenamento)
+    assert restaurado.restaurar_backup(backup) == 2
+    restaurado.armazenamento.fechar()
+
+    reaberto = GerenciadorFinanceiro(tmp_path / "restaurado", armazenamento=armazenamento)
+    assert reaberto.proximo_id == 4
+    assert adicionar(reaberto, "D").id == 4
+    assert reaberto.adicionar_recorrencia("Internet", 90.0, datetime(2030, 1, 10),
+                                          Frequencia.MENSAL).id == 3
+    reaberto.armazenamento.fechar()
@@ -0,0 +1,61 @@
+"""
+TRIMONEY - Testes da busca por nome
+
+Cada palavra da busca casa com o começo de uma palavra do nome, sem
+diferenciar acentos e maiúsculas. O índice, montado na primeira busca,
+acompanha as inclusões e exclusões seguintes: uma despesa excluída some
+dos resultados, também quando já estava arquivada no histórico.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro, StatusDespesa
+
+CONFIGURACOES = [("json", False), ("json", True), ("journal", True), ("sqlite", False)]
+
+
+def nomes(resultado):
+    return sorted(despesa.nome for despesa in resultado.despesas)
+
+
+@pytest.fixture(params=CONFIGURACOES, ids=lambda c: f"{c[0]}-{'sob_demanda' if c[1] else 'todas'}")
+def gerenciador(request, tmp_path):
+    armazenamento, sob_demanda = request.param
+    gerenciador = GerenciadorFinanceiro(tmp_path, armazenamento=armazenamento,
+                                        sob_demanda=sob_demanda)
+    hoje = datetime.now()
+    gerenciador.adicionar_despesa("Água e Luz", 100.0, hoje - timedelta(days=400),
+                                  CategoriaDespesa.FIXA, StatusDespesa.PAGA)
+    gerenciador.adicionar_despesa("Mercado", 50.0, hoje, CategoriaDespesa.VARIAVEL)
+    gerenciador.adicionar_despesa("Aguaceiro", 10.0, hoje, CategoriaDespesa.VARIAVEL)
+    gerenciador.salvar_dados()  # no modo sob demanda, arquiva "Água e Luz"
+    yield gerenciador
+    gerenciador.armazenamento.fechar()
+
+
+def test_prefixo_sem_acento_nem_maiusculas(gerenciador):
+    assert nomes(gerenciador.buscar_despesas("AGU")) == ["Aguaceiro", "Água e Luz"]
+    assert nomes(gerenciador.buscar_despesas("agu lu")) == ["Água e Luz"]
+    assert nomes(gerenciador.buscar_despesas("luz agu")) == ["Água e Luz"]
+    assert nomes(gerenciador.buscar_despesas("erc")) == []
+
+
+def test_excluida_some_do_indice_ja_montado(gerenciador):
+    mercado, = gerenciador.buscar_despesas("mer").despesas
+    gerenciador.excluir_despesa(mercado.id)
+    assert gerenciador.buscar_despesas("mer").total == 0
+    assert nomes(gerenciador.buscar_despesas("agu")) == ["Aguaceiro", "Água e Luz"]
+
+
+def test_excluida_do_historico_some_da_busca(gerenciador):
+    agua_e_luz, = gerenciador.buscar_despesas("agu lu").despesas
+    gerenciador.excluir_despesa(agua_e_luz.id)
+    assert nomes(gerenciador.buscar_despesas("agu")) == ["Aguaceiro"]
+
+
+def test_incluida_depois_entra_no_indice(gerenciador):
+    gerenciador.buscar_despesas("agu")
+    gerenciador.adicionar_despesa("Agulha", 5.0, datetime.now(), CategoriaDespesa.VARIAVEL)
+    assert nomes(gerenciador.buscar_despesas("agul")) == ["Agulha"]
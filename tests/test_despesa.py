@@ -0,0 +1,53 @@
+"""
+TRIMONEY - Testes da Despesa
+
+Despesa guarda o valor em centavos, mas continua aceitando o valor em
+reais (valor=...), e sem __dict__ por instância.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from financeiro import CategoriaDespesa, Despesa, StatusDespesa
+
+VENCIMENTO = datetime(2024, 3, 10)
+
+
+def nova(**valores):
+    return Despesa(id=1, nome="Luz", vencimento=VENCIMENTO,
+                   categoria=CategoriaDespesa.FIXA, status=StatusDespesa.PENDENTE, **valores)
+
+
+@pytest.mark.parametrize("valor, centavos", [(150.0, 15000), (0.1 + 0.2, 30), (2.675, 268),
+                                             (-19.99, -1999), (0, 0)])
+def test_valor_em_reais_vira_centavos(valor, centavos):
+    despesa = nova(valor=valor)
+    assert despesa.centavos == centavos
+    assert despesa == nova(centavos=centavos)
+
+
+def test_centavos_posicional():
+    despesa = Despesa(1, "Luz", 15000, VENCIMENTO, CategoriaDespesa.FIXA,
+                      StatusDespesa.PENDENTE)
+    assert despesa.valor == 150.0
+    assert Despesa.from_dict(despesa.to_dict()) == despesa
+
+
+def test_reais_na_posicao_dos_centavos_falha():
+    # Chamada posicional de antes dos centavos: 10,50 não pode virar 0,105
+    with pytest.raises(TypeError):
+        Despesa(1, "Luz", 10.5, VENCIMENTO, CategoriaDespesa.FIXA, StatusDespesa.PAGA)
+
+
+@pytest.mark.parametrize("valores", [{}, {'centavos': 100, 'valor': 1.0}, {'centavos': 10.0}])
+def test_centavos_ou_valor(valores):
+    with pytest.raises(TypeError):
+        nova(**valores)
+
+
+def test_sem_dict_por_instancia():
+    despesa = nova(valor=10.0)
+    assert not hasattr(despesa, '__dict__')
+    with pytest.raises(AttributeError):
+        despesa.observacao = "x"
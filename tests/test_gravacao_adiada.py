@@ -0,0 +1,76 @@
+"""
+TRIMONEY - Testes da gravação adiada no modo sob demanda
+
+A gravação adiada roda numa thread própria e, ao compactar, arquiva as
+pagas antigas (mexe nos índices) segurando a trava do gerenciador; as
+leituras dos índices feitas na thread de dados esperam por ela. Um
+pagamento comum só entra na fila, sem gravar na hora.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro, StatusDespesa
+
+LEITURAS = {
+    'calcular_resumo': lambda g: g.calcular_resumo(),
+    'filtrar_despesas': lambda g: g.filtrar_despesas("todas"),
+    'iterar_despesas': lambda g: list(g.iterar_despesas()),
+    'totais_mensais': lambda g: g.totais_mensais(),
+    'despesas': lambda g: g.despesas,
+}
+
+
+@pytest.fixture
+def gerenciador(tmp_path):
+    gerenciador = GerenciadorFinanceiro(tmp_path, sob_demanda=True, gravacao_adiada=30)
+    gerenciador.definir_saldo(1000)
+    antiga = datetime.now() - timedelta(days=200)
+    for dias in range(5):
+        gerenciador.adicionar_despesa("Luz", 10.0, antiga + timedelta(days=dias),
+                                      CategoriaDespesa.FIXA, StatusDespesa.PAGA)
+    yield gerenciador
+    gerenciador.armazenamento.fechar()
+
+
+@pytest.mark.parametrize("leitura", sorted(LEITURAS))
+def test_leitura_espera_a_gravacao_em_segundo_plano(gerenciador, leitura):
+    concluida = threading.Event()
+
+    def ler():
+        LEITURAS[leitura](gerenciador)
+        concluida.set()
+
+    with gerenciador._trava:  # como a thread da gravação adiada ao compactar
+        thread = threading.Thread(target=ler)
+        thread.start()
+        assert not concluida.wait(0.1)
+    assert concluida.wait(5)
+    thread.join()
+
+
+def test_arquivamento_em_segundo_plano_mantem_os_totais(gerenciador):
+    antes = gerenciador.calcular_resumo()
+    gerenciador.salvar_dados()  # compacta e arquiva as pagas antigas
+    assert gerenciador.despesas == []
+    assert gerenciador.calcular_resumo() == antes
+
+
+def test_pagamento_comum_fica_na_fila(gerenciador, monkeypatch):
+    despesa = gerenciador.adicionar_despesa("Água", 10.0, datetime.now(), CategoriaDespesa.FIXA)
+    gerenciador.descarregar()
+    gravacoes = []
+    registrar_lote = gerenciador.armazenamento.backend.registrar_lote
+    monkeypatch.setattr(gerenciador.armazenamento.backend, "registrar_lote",
+                        lambda operacoes, estado: (gravacoes.append(operacoes),
+                                                   registrar_lote(operacoes, estado)))
+
+    gerenciador.definir_saldo(500)  # ainda na fila
+
+    assert gerenciador.marcar_despesa_como_paga(despesa.id)
+    assert gravacoes == []
+    gerenciador.descarregar()
+    assert [operacao['op'] for operacoes in gravacoes for operacao in operacoes] == [
+        'saldo', 'pagar']
@@ -0,0 +1,51 @@
+"""
+TRIMONEY - Testes da importação de extratos
+
+Importar de novo o mesmo extrato não duplica despesas: lançamentos com
+mesmo nome, valor e data dos já gravados, ou repetidos no próprio arquivo,
+são contados como duplicados, também depois de reabrir os dados.
+"""
+
+import pytest
+
+from financeiro import GerenciadorFinanceiro, StatusDespesa
+from importacao import importar_extrato
+
+EXTRATO = (
+    "Data;Descrição;Valor\n"
+    "05/01/2026;Mercado;-123,45\n"
+    "05/01/2026;MERCADO;-123,45\n"  # repetido no próprio arquivo
+    "06/01/2026;Salário;5.000,00\n"  # crédito
+    "xx;Inválida;1\n"
+    "07/01/2026;Luz;-89,90\n"
+)
+
+
+@pytest.fixture
+def extrato(tmp_path):
+    caminho = tmp_path / "extrato.csv"
+    caminho.write_text(EXTRATO, encoding="utf-8")
+    return caminho
+
+
+def despesas(gerenciador):
+    return sorted((d.nome, d.centavos, d.status) for d in gerenciador.iterar_despesas())
+
+
+@pytest.mark.parametrize("armazenamento", ["json", "journal", "sqlite"])
+@pytest.mark.parametrize("reabrir", [False, True])
+def test_reimportar_o_mesmo_extrato_nao_duplica(tmp_path, extrato, armazenamento, reabrir):
+    pasta = tmp_path / "dados"
+    gerenciador = GerenciadorFinanceiro(pasta, armazenamento=armazenamento)
+    primeira = importar_extrato(gerenciador, extrato, tamanho_lote=2)
+    assert (primeira.lidas, primeira.importadas, primeira.duplicadas,
+            primeira.ignoradas, primeira.invalidas) == (5, 2, 1, 1, 1)
+    if reabrir:
+        gerenciador.armazenamento.fechar()
+        gerenciador = GerenciadorFinanceiro(pasta, armazenamento=armazenamento)
+
+    segunda = importar_extrato(gerenciador, extrato)
+    assert (segunda.importadas, segunda.duplicadas) == (0, 3)
+    assert despesas(gerenciador) == [("Luz", 8990, StatusDespesa.PAGA),
+                                     ("Mercado", 12345, StatusDespesa.PAGA)]
+    gerenciador.armazenamento.fechar()
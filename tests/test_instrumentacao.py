@@ -0,0 +1,32 @@
+"""
+TRIMONEY - Testes da instrumentação
+
+A captura com cProfile vê o que roda na thread de dados: até o Python
+3.11 cada thread liga o próprio perfil (um .prof por thread); a partir
+do 3.12 o da interface já vê todas.
+"""
+
+import pstats
+
+import instrumentacao
+from assincrono import GerenciadorAssincrono
+
+
+def trabalho_na_thread_de_dados():
+    return sum(numero * numero for numero in range(10_000))
+
+
+def test_cprofile_captura_a_thread_de_dados(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentacao, "CAPTURA", "cprofile")
+    dados = GerenciadorAssincrono(None, entregar=lambda callback: callback())
+    instrumentacao.iniciar_captura()
+    dados.executar(instrumentacao.iniciar_captura)
+    dados.executar(trabalho_na_thread_de_dados).result()
+    dados.executar(instrumentacao.parar_captura)
+    dados.encerrar()
+    caminhos = instrumentacao.encerrar_captura(tmp_path)
+
+    assert caminhos[0] == tmp_path / "trimoney_perfil.prof"
+    funcoes = {funcao for caminho in caminhos
+               for (_, _, funcao) in pstats.Stats(str(caminho)).stats}
+    assert "trabalho_na_thread_de_dados" in funcoes
@@ -0,0 +1,52 @@
+"""
+TRIMONEY - Testes do journal
+
+Um registro truncado no fim do journal (app encerrado no meio da escrita)
+é descartado na carga, sem perder as operações anteriores, e as operações
+seguintes não se misturam a ele.
+"""
+
+from datetime import datetime
+
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro
+
+
+def abrir(pasta):
+    return GerenciadorFinanceiro(pasta, armazenamento="journal")
+
+
+def nomes(gerenciador):
+    return sorted(despesa.nome for despesa in gerenciador.iterar_despesas())
+
+
+def adicionar(gerenciador, nome):
+    gerenciador.adicionar_despesa(nome, 10.0, datetime(2030, 1, 15), CategoriaDespesa.FIXA)
+
+
+def test_ultima_linha_truncada_e_descartada(tmp_path):
+    gerenciador = abrir(tmp_path)
+    for nome in ("A", "B", "C"):
+        adicionar(gerenciador, nome)
+    gerenciador.armazenamento.fechar()
+    journal = gerenciador.armazenamento.journal_file
+    conteudo = journal.read_bytes()
+    journal.write_bytes(conteudo[:-10])  # metade do registro de C
+
+    reaberto = abrir(tmp_path)
+    assert nomes(reaberto) == ["A", "B"]
+    adicionar(reaberto, "D")
+    reaberto.armazenamento.fechar()
+
+    assert nomes(abrir(tmp_path)) == ["A", "B", "D"]
+    assert journal.read_bytes().endswith(b"\n")
+
+
+def test_linha_sem_quebra_final_e_descartada(tmp_path):
+    gerenciador = abrir(tmp_path)
+    adicionar(gerenciador, "A")
+    adicionar(gerenciador, "B")
+    gerenciador.armazenamento.fechar()
+    journal = gerenciador.armazenamento.journal_file
+    journal.write_bytes(journal.read_bytes()[:-1])  # JSON completo, sem o "\n"
+
+    assert nomes(abrir(tmp_path)) == ["A"]
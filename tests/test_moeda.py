@@ -0,0 +1,65 @@
+"""
+TRIMONEY - Testes da formatação de moeda
+
+moeda.formatar_moeda, formatar_moedas e formatar_centavos dão a mesma
+saída, byte a byte, que a formatação original (f-string trocando os
+separadores) para valores aleatórios e para os casos de borda: negativos,
+meio centavo, -0.0, grandes, nan/inf.
+"""
+
+import random
+
+import pytest
+
+from moeda import formatar_centavos, formatar_moeda, formatar_moedas
+
+BORDAS = (0.0, -0.0, 0, -0.004, 0.004, 0.005, -0.005, 2.675, -2.675,
+          999.995, 1000, -1000, 1e20, -1e20, 10 ** 15, -10 ** 15,
+          float('nan'), float('inf'), float('-inf'))
+
+
+def formatar_original(valor: float) -> str:
+    """Cópia do GerenciadorFinanceiro.formatar_moeda anterior"""
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def gerar_casos(quantidade: int, semente: int = 7):
+    """Valores que exercitam todos os caminhos do formatador"""
+    aleatorio = random.Random(semente)
+    for _ in range(quantidade):
+        tipo = aleatorio.randrange(5)
+        if tipo == 0:
+            yield round(aleatorio.uniform(-1e6, 1e6), 2)
+        elif tipo == 1:
+            yield (aleatorio.randrange(-10 ** 9, 10 ** 9) + 0.5) / 100  # meio centavo
+        elif tipo == 2:
+            yield aleatorio.uniform(-1e13, 1e13)
+        elif tipo == 3:
+            yield aleatorio.uniform(-1, 1) * 10 ** aleatorio.randrange(-5, 20)
+        else:
+            yield aleatorio.randrange(-10 ** 8, 10 ** 8)
+
+
+@pytest.mark.parametrize("valor", BORDAS, ids=repr)
+def test_bordas_iguais_a_original(valor):
+    assert formatar_moeda(valor) == formatar_original(valor)
+
+
+def test_valores_aleatorios_iguais_a_original():
+    casos = list(gerar_casos(50_000))
+    esperados = [formatar_original(valor) for valor in casos]
+    for valor, esperado in zip(casos, esperados):
+        assert formatar_moeda(valor) == esperado, valor
+    # A segunda passada sai do cache
+    assert [formatar_moeda(valor) for valor in casos] == esperados
+
+
+def test_em_lote_igual_a_original():
+    casos = list(BORDAS) + list(gerar_casos(10_000, semente=11))
+    assert formatar_moedas(casos) == [formatar_original(valor) for valor in casos]
+
+
+def test_centavos_iguais_a_original():
+    for centavos in [0, 1, -1, 99, -99, 100_000, -100_000, 10 ** 15] + [
+            valor for valor in gerar_casos(10_000) if isinstance(valor, int)]:
+        assert formatar_centavos(centavos) == formatar_original(centavos / 100), centavos
@@ -0,0 +1,55 @@
+"""
+TRIMONEY - Testes do registro de perfis
+
+Ids de perfis não são reaproveitados: um perfil criado depois de uma
+exclusão ganha id (e pasta) novos, mesmo com o registro reaberto ou
+refeito pelas pastas, e excluir de novo não esbarra no backup anterior.
+"""
+
+from perfis import PASTA_PERFIS, Perfil, RegistroPerfis
+
+
+def test_excluir_criar_e_excluir_de_novo(tmp_path):
+    registro = RegistroPerfis(tmp_path)
+    primeiro = registro.criar_perfil("Casa")
+    registro.excluir_perfil(primeiro.id)
+    segundo = registro.criar_perfil("Casa")
+    registro.excluir_perfil(segundo.id)
+
+    assert segundo.id != primeiro.id
+    assert [perfil.id for perfil in registro.perfis] == [1]
+    assert sorted(pasta.name for pasta in (tmp_path / PASTA_PERFIS).iterdir()) == [
+        f"{primeiro.id}.excluido", f"{segundo.id}.excluido"]
+
+
+def test_id_novo_depois_de_reabrir(tmp_path):
+    registro = RegistroPerfis(tmp_path)
+    excluido = registro.criar_perfil("Casa")
+    registro.excluir_perfil(excluido.id)
+    registro.fechar()
+
+    assert RegistroPerfis(tmp_path).criar_perfil("Viagem").id > excluido.id
+
+
+def test_id_novo_com_registro_refeito_pelas_pastas(tmp_path):
+    registro = RegistroPerfis(tmp_path)
+    excluido = registro.criar_perfil("Casa")
+    registro.excluir_perfil(excluido.id)
+    registro.arquivo.write_text("{ilegível", encoding='utf-8')
+
+    reaberto = RegistroPerfis(tmp_path)
+    novo = reaberto.criar_perfil("Viagem")
+    reaberto.excluir_perfil(novo.id)
+    assert novo.id > excluido.id
+
+
+def test_backup_existente_nao_impede_a_exclusao(tmp_path):
+    # Registro antigo, sem proximo_id, com o backup de um perfil de mesmo id
+    (tmp_path / PASTA_PERFIS / "2.excluido").mkdir(parents=True)
+    (tmp_path / PASTA_PERFIS / "2.excluido" / "trimoney_data.json").write_text("{}")
+    (tmp_path / PASTA_PERFIS / "2").mkdir()
+    registro = RegistroPerfis(tmp_path)
+    registro._perfis[2] = Perfil(2, "Casa", f"{PASTA_PERFIS}/2")
+
+    registro.excluir_perfil(2)
+    assert (tmp_path / PASTA_PERFIS / "2.excluido2").is_dir()
@@ -0,0 +1,60 @@
+"""
+TRIMONEY - Testes da projeção do saldo
+
+O saldo projetado desconta as pendentes (vencidas inclusive) e as
+ocorrências recorrentes até cada dia; o primeiro dia negativo, achado por
+bisseção, é o mesmo da varredura dia a dia e acompanha as mutações.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro
+from recorrencia import Frequencia
+
+HOJE = datetime.combine(date.today(), datetime.min.time())
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def gerenciador(request, tmp_path):
+    gerenciador = GerenciadorFinanceiro(tmp_path, armazenamento=request.param)
+    gerenciador.definir_saldo(100.0)
+    for dias, valor in ((-3, 10.0), (10, 30.0), (20, 50.0), (30, 40.0)):
+        gerenciador.adicionar_despesa(f"Conta {dias}", valor, HOJE + timedelta(days=dias),
+                                      CategoriaDespesa.FIXA)
+    yield gerenciador
+    gerenciador.armazenamento.fechar()
+
+
+def primeiro_negativo_varrendo(gerenciador, dias):
+    for dia, saldo in gerenciador.projecao_saldo(HOJE, HOJE + timedelta(days=dias)):
+        if saldo < 0:
+            return dia
+    return None
+
+
+def test_primeiro_dia_negativo(gerenciador):
+    # 100 - 10 (vencida) - 30 - 50 = 10 até o dia 29; a de 40 no dia 30 passa do saldo
+    assert gerenciador.saldo_projetado(HOJE + timedelta(days=29)) == 10.0
+    assert gerenciador.primeiro_saldo_negativo() == (HOJE + timedelta(days=30)).date()
+    assert gerenciador.primeiro_saldo_negativo(HOJE + timedelta(days=29)) is None
+
+
+def test_acompanha_as_mutacoes(gerenciador):
+    conta_30 = next(d for d in gerenciador.iterar_despesas() if d.nome == "Conta 30")
+    gerenciador.excluir_despesa(conta_30.id)
+    assert gerenciador.primeiro_saldo_negativo() is None
+
+    gerenciador.adicionar_despesa("Cartão", 200.0, HOJE, CategoriaDespesa.VARIAVEL)
+    assert gerenciador.primeiro_saldo_negativo() == HOJE.date()
+
+
+def test_recorrencia_igual_a_varredura(gerenciador):
+    gerenciador.definir_saldo(500.0)
+    gerenciador.adicionar_recorrencia("Aluguel", 70.0, HOJE + timedelta(days=5),
+                                      Frequencia.SEMANAL, intervalo=2)
+    # 500 - 130 = 370 de pendentes; 6 ocorrências de 70 passam do saldo
+    esperado = primeiro_negativo_varrendo(gerenciador, 365)
+    assert esperado == (HOJE + timedelta(days=5 + 14 * 5)).date()
+    assert gerenciador.primeiro_saldo_negativo() == esperado
@@ -0,0 +1,57 @@
+"""
+TRIMONEY - Testes das despesas recorrentes
+
+Ids de regra não são reusados, nem depois de reabrir os dados: o id de
+uma ocorrência guardado pela interface (que inclui o id da regra) nunca
+passa a apontar para a ocorrência de outra regra.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from armazenamento import ArmazenamentoJournal
+from financeiro import GerenciadorFinanceiro
+from recorrencia import Frequencia, id_ocorrencia
+
+INICIO = datetime(2030, 1, 10)
+
+
+def abrir(pasta, armazenamento):
+    if armazenamento == "journal_compactando":
+        armazenamento = ArmazenamentoJournal(pasta / "trimoney_data.json", limite_compactacao=1)
+    return GerenciadorFinanceiro(pasta, armazenamento=armazenamento)
+
+
+def cadastrar(gerenciador, nome):
+    return gerenciador.adicionar_recorrencia(nome, 50.0, INICIO, Frequencia.MENSAL)
+
+
+@pytest.mark.parametrize("armazenamento", ["json", "journal", "journal_compactando", "sqlite"])
+@pytest.mark.parametrize("reabrir", [False, True])
+def test_regra_excluida_nao_tem_o_id_reusado(tmp_path, armazenamento, reabrir):
+    gerenciador = abrir(tmp_path, armazenamento)
+    cadastrar(gerenciador, "Aluguel")
+    excluida = cadastrar(gerenciador, "Academia")
+    ocorrencia_excluida = id_ocorrencia(excluida.id, INICIO.date().toordinal())
+    gerenciador.excluir_recorrencia(excluida.id)
+    if reabrir:
+        gerenciador.armazenamento.fechar()
+        gerenciador = abrir(tmp_path, armazenamento)
+
+    nova = cadastrar(gerenciador, "Internet")
+    assert nova.id > excluida.id
+    assert gerenciador.get_despesa_por_id(ocorrencia_excluida) is None
+    gerenciador.armazenamento.fechar()
+
+
+@pytest.mark.parametrize("armazenamento", ["json", "journal", "sqlite"])
+def test_so_regras_excluidas_nao_reinicia_os_ids(tmp_path, armazenamento):
+    gerenciador = abrir(tmp_path, armazenamento)
+    regra = cadastrar(gerenciador, "Academia")
+    gerenciador.excluir_recorrencia(regra.id)
+    gerenciador.armazenamento.fechar()
+
+    reaberto = abrir(tmp_path, armazenamento)
+    assert cadastrar(reaberto, "Internet").id == regra.id + 1
+    reaberto.armazenamento.fechar()
@@ -0,0 +1,51 @@
+"""
+TRIMONEY - Testes da gravação atômica do snapshot
+
+Cada snapshot é gravado via .tmp + rename, com cabeçalho e checksum, e a
+geração anterior fica no .bak. Um arquivo principal corrompido ou
+truncado cede lugar ao .bak (e é preservado como .corrompido); uma queda
+entre os renames é recuperada pelo .tmp.
+"""
+
+import os
+from datetime import datetime
+
+import pytest
+
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro
+
+
+def nomes(gerenciador):
+    return sorted(despesa.nome for despesa in gerenciador.iterar_despesas())
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    gerenciador = GerenciadorFinanceiro(tmp_path, armazenamento="json")
+    for nome in ("A", "B"):
+        gerenciador.adicionar_despesa(nome, 10.0, datetime(2030, 1, 15), CategoriaDespesa.FIXA)
+    return tmp_path
+
+
+def test_principal_corrompido_volta_para_o_bak(pasta):
+    arquivo = pasta / "trimoney_data.json"
+    conteudo = bytearray(arquivo.read_bytes())
+    conteudo[-5] ^= 0xFF  # mesmo tamanho, checksum diferente
+    arquivo.write_bytes(bytes(conteudo))
+
+    assert nomes(GerenciadorFinanceiro(pasta, armazenamento="json")) == ["A"]
+    assert (pasta / "trimoney_data.json.corrompido").read_bytes() == bytes(conteudo)
+
+
+def test_principal_truncado_volta_para_o_bak(pasta):
+    arquivo = pasta / "trimoney_data.json"
+    arquivo.write_bytes(arquivo.read_bytes()[:-20])
+
+    assert nomes(GerenciadorFinanceiro(pasta, armazenamento="json")) == ["A"]
+
+
+def test_queda_entre_os_renames_recupera_o_tmp(pasta):
+    # O principal já virou .bak e o .tmp ainda não virou o principal
+    os.replace(pasta / "trimoney_data.json", pasta / "trimoney_data.json.tmp")
+
+    assert nomes(GerenciadorFinanceiro(pasta, armazenamento="json")) == ["A", "B"]
@@ -0,0 +1,70 @@
+"""
+TRIMONEY - Testes das transações do gerenciador
+
+Um bloco transacao() que falha descarta as mutações dele, em memória e
+no disco, em todos os backends e também com a gravação adiada (cujas
+mutações ainda na fila não podem levar junto as do lote cancelado).
+"""
+
+from datetime import datetime
+
+import pytest
+
+from armazenamento import ArmazenamentoJournal
+from financeiro import CategoriaDespesa, GerenciadorFinanceiro
+
+CONFIGURACOES = [
+    ("json", None),
+    ("json", 0),
+    ("json", 30),
+    ("journal", None),
+    ("journal", 0),
+    ("journal", 30),
+    ("journal_compactando", 0),  # cada descarga da fila compacta o snapshot
+    ("journal_compactando", 30),
+    ("sqlite", None),
+]
+
+
+def abrir(pasta, armazenamento, gravacao_adiada):
+    if armazenamento == "journal_compactando":
+        armazenamento = ArmazenamentoJournal(pasta / "trimoney_data.json", limite_compactacao=1)
+    return GerenciadorFinanceiro(pasta, armazenamento=armazenamento,
+                                 gravacao_adiada=gravacao_adiada)
+
+
+def nomes(gerenciador):
+    return sorted(despesa.nome for despesa in gerenciador.iterar_despesas())
+
+
+def adicionar(gerenciador, nome):
+    gerenciador.adicionar_despesa(nome, 10.0, datetime(2030, 1, 15), CategoriaDespesa.FIXA)
+
+
+@pytest.mark.parametrize("armazenamento, gravacao_adiada", CONFIGURACOES)
+def test_transacao_cancelada_descarta_o_lote(tmp_path, armazenamento, gravacao_adiada):
+    gerenciador = abrir(tmp_path, armazenamento, gravacao_adiada)
+    adicionar(gerenciador, "A")  # ainda na fila da gravação adiada
+
+    with pytest.raises(RuntimeError):
+        with gerenciador.transacao():
+            adicionar(gerenciador, "B")
+            raise RuntimeError("falha no meio do lote")
+
+    assert nomes(gerenciador) == ["A"]
+    gerenciador.descarregar()
+    gerenciador.armazenamento.fechar()
+    assert nomes(abrir(tmp_path, armazenamento, None)) == ["A"]
+
+
+@pytest.mark.parametrize("armazenamento, gravacao_adiada", CONFIGURACOES)
+def test_transacao_concluida_grava_o_lote(tmp_path, armazenamento, gravacao_adiada):
+    gerenciador = abrir(tmp_path, armazenamento, gravacao_adiada)
+    adicionar(gerenciador, "A")
+    with gerenciador.transacao():
+        adicionar(gerenciador, "B")
+        adicionar(gerenciador, "C")
+
+    gerenciador.descarregar()
+    gerenciador.armazenamento.fechar()
+    assert nomes(abrir(tmp_path, armazenamento, None)) == ["A", "B", "C"]